@@ -0,0 +1,278 @@
+"""
+ANSI escape sequences in command output.
+
+Output is parsed once, as it arrives, into the visible text and its style runs:
+a flat array('Q') of (start, length, style) triples covering the line, or None
+for a line in the default style. A style is a 64-bit int packing the foreground
+and background colors and the attributes, so runs compare, hash and slice
+without a lookup table. Colors are kept as ANSI codes, not RGB: they are
+resolved against the color scheme only when a line is drawn (Palette), so a
+theme switch recolors text without composing it again.
+"""
+import re
+from array import array
+from config import ANSI_COLORS
+
+# Style bits: foreground color, background color, attributes.
+# A color is 0 (default), 1 + an index into the 256-color table, or TRUECOLOR | 0xRRGGBB.
+COLOR_BITS = 25
+COLOR_MASK = (1 << COLOR_BITS) - 1
+TRUECOLOR = 1 << 24
+BG_SHIFT = COLOR_BITS
+ATTR_SHIFT = 2 * COLOR_BITS
+
+BOLD = 0x01
+DIM = 0x02
+UNDERLINE = 0x04
+REVERSE = 0x08
+CONCEAL = 0x10
+STRIKE = 0x20
+
+DEFAULT = 0
+
+# CSI ... final byte, OSC ... BEL/ST, any other escape (ESC, intermediates, final byte), or a stray ESC
+SEQUENCE = re.compile(r'\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)?|[ -/]*[0-~]?)')
+
+
+def build_table():
+    """
+    Returns the 256-color table: ANSI_COLORS, the 6x6x6 color cube and 24 grays.
+    """
+    steps = (0, 95, 135, 175, 215, 255)
+    table = [tuple(c) for c in ANSI_COLORS]
+    table += [(steps[i // 36], steps[i // 6 % 6], steps[i % 6]) for i in range(216)]
+    table += [(8 + 10 * i,) * 3 for i in range(24)]
+    return table
+
+
+COLOR_TABLE = build_table()
+
+
+def style_attrs(style):
+    return style >> ATTR_SHIFT
+
+
+# --- SGR ---
+def extended_color(codes, i):
+    """
+    Reads a 38/48 color (5;n or 2;r;g;b) starting at codes[i]. Returns
+    (color, index of the next code); color is None if it was malformed.
+    """
+    if i < len(codes) and codes[i] == 5 and i + 1 < len(codes):
+        return 1 + min(255, codes[i + 1]), i + 2
+    if i < len(codes) and codes[i] == 2 and i + 3 < len(codes):
+        r, g, b = (min(255, c) for c in codes[i + 1:i + 4])
+        return TRUECOLOR | r << 16 | g << 8 | b, i + 4
+    return None, len(codes)
+
+
+def apply_sgr(style, params):
+    """
+    Returns style updated by the parameters of an SGR sequence (ESC [ params m).
+    """
+    codes = [int(p) if p.isdigit() else 0 for p in params.replace(':', ';').split(';')]
+    fg = style & COLOR_MASK
+    bg = style >> BG_SHIFT & COLOR_MASK
+    attrs = style >> ATTR_SHIFT
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        i += 1
+        if code == 0:
+            fg = bg = attrs = 0
+        elif code == 1:
+            attrs |= BOLD
+        elif code == 2:
+            attrs |= DIM
+        elif code == 4:
+            attrs |= UNDERLINE
+        elif code == 7:
+            attrs |= REVERSE
+        elif code == 8:
+            attrs |= CONCEAL
+        elif code == 9:
+            attrs |= STRIKE
+        elif code == 22:
+            attrs &= ~(BOLD | DIM)
+        elif code == 24:
+            attrs &= ~UNDERLINE
+        elif code == 27:
+            attrs &= ~REVERSE
+        elif code == 28:
+            attrs &= ~CONCEAL
+        elif code == 29:
+            attrs &= ~STRIKE
+        elif 30 <= code <= 37:
+            fg = 1 + code - 30
+        elif 90 <= code <= 97:
+            fg = 1 + code - 90 + 8
+        elif code == 39:
+            fg = 0
+        elif 40 <= code <= 47:
+            bg = 1 + code - 40
+        elif 100 <= code <= 107:
+            bg = 1 + code - 100 + 8
+        elif code == 49:
+            bg = 0
+        elif code in (38, 48):
+            color, i = extended_color(codes, i)
+            if color is not None:
+                if code == 38:
+                    fg = color
+                else:
+                    bg = color
+    return fg | bg << BG_SHIFT | attrs << ATTR_SHIFT
+
+
+class AnsiParser:
+    """
+    Splits lines of one output stream into text and style runs. The style
+    carries over from line to line, as it does on a real terminal; escape
+    sequences other than SGR are dropped. Logs repeat the same few sequences,
+    so the style each one leads to is memoized.
+    """
+    def __init__(self, max_transitions=4096):
+        self.style = DEFAULT
+        self.transitions = {}  # (style, SGR params) -> style
+        self.max_transitions = max_transitions
+
+    def reset(self):
+        self.style = DEFAULT
+
+    def feed(self, line):
+        """
+        Returns (text, runs) for a line; runs is None when it is all default style.
+        """
+        style = self.style
+        if '\x1b' not in line:
+            if style == DEFAULT or not line:
+                return line, None
+            return line, array('Q', (0, len(line), style))
+        transitions = self.transitions
+        # split() alternates the text between sequences with each sequence's SGR params and final byte
+        parts = SEQUENCE.split(line)
+        texts = parts[0::3]
+        runs = []
+        n = 0
+        for chunk, params, final in zip(texts, parts[1::3], parts[2::3]):
+            if chunk:
+                if runs and runs[-1] == style:
+                    runs[-2] += len(chunk)  # same style as the previous run: extend it
+                else:
+                    runs += (n, len(chunk), style)
+                n += len(chunk)
+            if final == 'm':
+                key = (style, params)
+                new = transitions.get(key)
+                if new is None:
+                    if len(transitions) >= self.max_transitions:
+                        transitions.clear()
+                    new = transitions[key] = apply_sgr(style, params)
+                style = new
+        chunk = texts[-1]
+        if chunk:
+            if runs and runs[-1] == style:
+                runs[-2] += len(chunk)
+            else:
+                runs += (n, len(chunk), style)
+        self.style = style
+        text = ''.join(texts)
+        if not any(runs[2::3]):
+            return text, None
+        return text, array('Q', runs)
+
+
+def slice_runs(runs, start, stop):
+    """
+    Returns the runs covering text[start:stop], rebased to start, or None if
+    that part is all default style.
+    """
+    if runs is None:
+        return None
+    if start == 0 and stop >= runs[-3] + runs[-2]:
+        return runs
+    result = array('Q')
+    for i in range(0, len(runs), 3):
+        a = max(runs[i], start)
+        b = min(runs[i] + runs[i + 1], stop)
+        if a < b:
+            result.extend((a - start, b - a, runs[i + 2]))
+    return result if any(result[2::3]) else None
+
+
+def style_at(runs, index):
+    """
+    Returns the style of the character at index.
+    """
+    if runs is not None:
+        for i in range(0, len(runs), 3):
+            if index < runs[i] + runs[i + 1]:
+                return runs[i + 2] if index >= runs[i] else DEFAULT
+    return DEFAULT
+
+
+# --- Colors ---
+class Palette:
+    """
+    Resolves styles to colors for one color scheme: default colors are the
+    scheme's text and background, bold brightens colors 0-7, dim and reverse
+    blend and swap. ramp() gives the shades of a style from its background to
+    its foreground, as used by the palette-indexed line surfaces in glyphs.py.
+    """
+    def __init__(self, colors, max_palettes=4096):
+        self.fg = tuple(colors['text'][:3])
+        self.bg = tuple(colors['bg'][:3])
+        self.key = (self.fg, self.bg)
+        self.ramps = {}
+        self.palettes = {}  # (styles, levels) -> colors; lines of a log share a few style sets
+        self.max_palettes = max_palettes
+
+    def color(self, code, default, bright=False):
+        if code == 0:
+            return default
+        if code & TRUECOLOR:
+            return code >> 16 & 0xFF, code >> 8 & 0xFF, code & 0xFF
+        index = code - 1
+        if bright and index < 8:
+            index += 8
+        return COLOR_TABLE[index]
+
+    def resolve(self, style):
+        """
+        Returns the (foreground, background) RGB colors of a style.
+        """
+        attrs = style >> ATTR_SHIFT
+        fg = self.color(style & COLOR_MASK, self.fg, attrs & BOLD)
+        bg = self.color(style >> BG_SHIFT & COLOR_MASK, self.bg)
+        if attrs & REVERSE:
+            fg, bg = bg, fg
+        if attrs & DIM:
+            fg = tuple((f + b) // 2 for f, b in zip(fg, bg))
+        if attrs & CONCEAL:
+            fg = bg
+        return fg, bg
+
+    def ramp(self, style, levels):
+        key = (style, levels)
+        ramp = self.ramps.get(key)
+        if ramp is None:
+            fg, bg = self.resolve(style)
+            top = levels - 1
+            ramp = [tuple(b + (f - b) * k // top for f, b in zip(fg, bg)) for k in range(levels)]
+            self.ramps[key] = ramp
+        return ramp
+
+    def colors(self, styles, levels):
+        """
+        Returns the palette of a line surface whose slots hold styles.
+        """
+        key = (styles, levels)
+        colors = self.palettes.get(key)
+        if colors is None:
+            if len(self.palettes) >= self.max_palettes:
+                self.palettes.clear()
+            colors = []
+            for style in styles:
+                colors += self.ramp(style, levels)
+            self.palettes[key] = colors
+        return colors
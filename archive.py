@@ -0,0 +1,208 @@
+import os
+import mmap
+import time
+import struct
+import threading
+import numpy as np
+
+_OFFSET = struct.Struct('<Q')
+
+
+def fold(text):
+    """
+    Returns the case-folded UTF-8 bytes that lines and queries are hashed from.
+    Folding the str, not the bytes, also folds non-ASCII letters.
+    """
+    return text.lower().encode('utf-8', 'replace')
+
+
+def trigram_bits(data, bits_log2):
+    """
+    Hashes every byte trigram of data to two Bloom filter bit positions.
+    Returns a uint32 array of positions (empty if data is shorter than 3 bytes).
+    """
+    a = np.frombuffer(data, dtype=np.uint8)
+    if len(a) < 3:
+        return np.empty(0, dtype=np.uint32)
+    codes = a[:-2].astype(np.uint32) | (a[1:-1].astype(np.uint32) << 8) | (a[2:].astype(np.uint32) << 16)
+    shift = np.uint32(32 - bits_log2)
+    h1 = (codes * np.uint32(2654435761)) >> shift
+    h2 = ((codes ^ (codes >> np.uint32(7))) * np.uint32(2246822519)) >> shift
+    return np.concatenate((h1, h2))
+
+
+class ScrollbackArchive:
+    """
+    Append-only on-disk log of every output line for one session.
+
+    Three files share a base name:
+      .log  the lines as UTF-8, newline separated
+      .idx  one little-endian uint64 byte offset per line
+      .blm  one trigram Bloom filter per block of block_lines lines
+    All three are read through mmap, so scrolling and searching millions of lines
+    keeps resident memory flat; only the Bloom filter of the open block lives in RAM.
+    Searches skip every block whose filter rules the query out.
+    """
+    def __init__(self, directory, name=None, block_lines=512, bloom_bytes=8192):
+        os.makedirs(directory, exist_ok=True)
+        if name is None:
+            name = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+        base = os.path.join(directory, name)
+        self.paths = {ext: base + ext for ext in ('.log', '.idx', '.blm')}
+        self.files = {ext: open(path, 'ab') for ext, path in self.paths.items()}
+        self.block_lines = block_lines
+        self.bloom_bytes = bloom_bytes  # must be a power of two
+        self.bloom_log2 = (bloom_bytes * 8).bit_length() - 1
+        self.bloom = np.zeros(bloom_bytes * 8, dtype=bool)
+        self.lock = threading.Lock()
+        self.map_lock = threading.Lock()  # readers on several threads share the maps
+        self.maps = {}
+        self.count = 0      # lines appended
+        self.size = 0       # bytes in the log
+        self.flushed = 0    # lines visible to readers
+        self.flushed_size = 0  # bytes of those lines
+        self.dirty = False
+
+    def __len__(self):
+        return self.count
+
+    # --- Writing ---
+    def append(self, text):
+        self.extend((text,))
+
+    def extend(self, lines):
+        """
+        Appends lines, indexing them a block-sized batch at a time.
+        """
+        lines = list(lines)
+        with self.lock:
+            while lines:
+                room = self.block_lines - self.count % self.block_lines
+                batch, lines = lines[:room], lines[room:]
+                data = [line.encode('utf-8', 'replace') + b'\n' for line in batch]
+                offsets = np.cumsum([self.size] + [len(d) for d in data[:-1]], dtype=np.uint64)
+                self.files['.idx'].write(offsets.astype('<u8').tobytes())
+                joined = b''.join(data)
+                self.files['.log'].write(joined)
+                self.size += len(joined)
+                self.count += len(batch)
+                # Trigrams spanning two lines only add harmless false positives
+                self.bloom[trigram_bits(fold('\n'.join(batch)), self.bloom_log2)] = True
+                if self.count % self.block_lines == 0:
+                    self.files['.blm'].write(np.packbits(self.bloom, bitorder='little').tobytes())
+                    self.bloom[:] = False
+            self.dirty = True
+
+    def flush(self):
+        """
+        Makes appended lines visible to readers.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            for f in self.files.values():
+                f.flush()
+            self.flushed = self.count
+            self.flushed_size = self.size
+            self.dirty = False
+
+    def close(self):
+        self.flush()
+        with self.map_lock:
+            for m in self.maps.values():
+                m.close()
+            self.maps.clear()
+        for f in self.files.values():
+            f.close()
+
+    # --- Reading ---
+    # Lines below a flushed count never change, so readers work from a snapshot
+    # of (flushed lines, their bytes) while the writer keeps appending.
+    def snapshot(self):
+        self.flush()
+        with self.lock:
+            return self.flushed, self.flushed_size
+
+    def _map(self, ext, needed):
+        """
+        Returns an mmap of a file covering at least needed bytes, remapping as it grows.
+        """
+        with self.map_lock:
+            m = self.maps.get(ext)
+            if m is None or len(m) < needed:
+                # The old map is left to the garbage collector: another thread may still be reading it
+                with open(self.paths[ext], 'rb') as f:
+                    m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.maps[ext] = m
+            return m
+
+    def _offset(self, index, snapshot):
+        """
+        Returns the byte offset where line number index starts.
+        """
+        flushed, size = snapshot
+        if index >= flushed:
+            return size
+        idx = self._map('.idx', (index + 1) * _OFFSET.size)
+        return _OFFSET.unpack_from(idx, index * _OFFSET.size)[0]
+
+    def _read(self, start, stop, snapshot):
+        start = max(0, start)
+        stop = min(stop, snapshot[0])
+        if start >= stop:
+            return []
+        begin = self._offset(start, snapshot)
+        end = self._offset(stop, snapshot)
+        log = self._map('.log', end)
+        return log[begin:end].decode('utf-8', 'replace').split('\n')[:stop - start]
+
+    def lines(self, start, count):
+        """
+        Returns up to count lines from line number start.
+        """
+        return self._read(start, max(0, start) + count, self.snapshot())
+
+    def line(self, index):
+        lines = self.lines(index, 1)
+        if not lines:
+            raise IndexError('archive index out of range')
+        return lines[0]
+
+    def _candidate_blocks(self, positions, stop, flushed):
+        """
+        Returns the numbers of the blocks before line stop that may contain every
+        hashed trigram, newest first.
+        """
+        closed = min(flushed // self.block_lines, -(-stop // self.block_lines))
+        blocks = -(-stop // self.block_lines)
+        candidates = list(range(blocks - 1, closed - 1, -1))  # The open block has no filter on disk yet
+        if not closed:
+            return candidates
+        if not len(positions):
+            return candidates + list(range(closed - 1, -1, -1))
+        blm = self._map('.blm', closed * self.bloom_bytes)
+        blooms = np.frombuffer(blm, dtype=np.uint8, count=closed * self.bloom_bytes).reshape(closed, self.bloom_bytes)
+        hits = np.all((blooms[:, positions >> 3] >> (positions & 7)) & 1, axis=1)
+        return candidates + np.flatnonzero(hits)[::-1].tolist()
+
+    def search(self, query, limit=20, stop=None):
+        """
+        Returns (line_number, text) pairs containing query (case-insensitive) among
+        the lines before stop, newest first. Blocks whose trigram filter lacks any
+        query trigram are skipped. Safe to call from any thread: the scan covers
+        the lines flushed when it starts.
+        """
+        snapshot = self.snapshot()
+        stop = snapshot[0] if stop is None else min(stop, snapshot[0])
+        needle = query.lower()
+        positions = trigram_bits(fold(query), self.bloom_log2)
+        matches = []
+        for block in self._candidate_blocks(positions, stop, snapshot[0]):
+            start = block * self.block_lines
+            lines = self._read(start, min(start + self.block_lines, stop), snapshot)
+            for i in range(len(lines) - 1, -1, -1):
+                if needle in lines[i].lower():
+                    matches.append((start + i, lines[i]))
+                    if len(matches) >= limit:
+                        return matches
+        return matches
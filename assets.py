@@ -0,0 +1,161 @@
+import os
+import struct
+import hashlib
+import threading
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+_IMAGE_HEADER = struct.Struct('<II')
+
+
+def file_hash(path):
+    """
+    Returns the SHA-1 hex digest of a file's contents.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AssetManager:
+    """
+    Loads fonts, sounds and images on a thread pool and hands out one shared
+    instance of each. Decoded sounds (raw PCM in the mixer's format) and scaled
+    images (raw RGBA) are cached on disk under cache_dir, keyed by the source
+    file's hash plus the mixer format or target size, so later launches skip
+    decoding and resampling entirely.
+    Loads are started with preload() and collected with the font(), sound() and
+    image() getters, which block only if the asset is still in flight.
+    """
+    def __init__(self, cache_dir='.cache/assets', workers=4):
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='assets')
+        self.lock = threading.Lock()
+        self.futures = {}   # asset key -> Future of the loaded (unconverted) asset
+        self.assets = {}    # asset key -> shared instance, ready for use
+        self.hits = 0       # disk cache hits
+        self.misses = 0
+
+    # --- Loading ---
+    def _submit(self, key, load, *args):
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None:
+                future = self.executor.submit(load, *args)
+                self.futures[key] = future
+            return future
+
+    def preload(self, fonts=(), sounds=(), images=()):
+        """
+        Starts loading assets in the background.
+        fonts: (path, size) pairs; sounds: paths; images: (path, fit) pairs where
+        fit is the (width, height) box the image is scaled down to, or None.
+        """
+        for path, size in fonts:
+            self._submit(('font', path, size), pygame.font.Font, path, size)
+        for path in sounds:
+            self.load_sound(path)
+        for path, fit in images:
+            self._submit(('image', path, fit), self._load_image, path, fit)
+
+    def load_sound(self, path):
+        """
+        Starts loading a sound and returns its Future.
+        """
+        return self._submit(('sound', path), self._load_sound, path)
+
+    def _cache_path(self, digest, suffix):
+        return os.path.join(self.cache_dir, f"{digest}-{suffix}")
+
+    def _read_cache(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def _write_cache(self, path, data):
+        """
+        Writes a cache entry atomically so a crash never leaves a torn file behind.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # The cache is only an optimization
+
+    def _load_sound(self, path):
+        freq, fmt, channels = pygame.mixer.get_init()
+        cache = self._cache_path(file_hash(path), f"{freq}-{fmt}-{channels}.pcm")
+        data = self._read_cache(cache)
+        if data is not None:
+            return pygame.mixer.Sound(buffer=data)
+        sound = pygame.mixer.Sound(path)
+        self._write_cache(cache, sound.get_raw())
+        return sound
+
+    def _load_image(self, path, fit):
+        digest = file_hash(path)
+        suffix = f"{fit[0]}x{fit[1]}.rgba" if fit else "full.rgba"
+        cache = self._cache_path(digest, suffix)
+        data = self._read_cache(cache)
+        if data is not None:
+            w, h = _IMAGE_HEADER.unpack_from(data)
+            return pygame.image.frombytes(data[_IMAGE_HEADER.size:], (w, h), 'RGBA')
+        image = pygame.image.load(path)
+        if fit:
+            scale = min(fit[0] / image.get_width(), fit[1] / image.get_height(), 1.0)
+            size = (max(1, int(image.get_width() * scale)), max(1, int(image.get_height() * scale)))
+            if size != image.get_size():
+                if image.get_bitsize() < 24:
+                    # smoothscale needs 24 or 32 bit pixels
+                    rgba = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+                    rgba.blit(image, (0, 0))
+                    image = rgba
+                image = pygame.transform.smoothscale(image, size)
+        size = image.get_size()
+        self._write_cache(cache, _IMAGE_HEADER.pack(*size) + pygame.image.tobytes(image, 'RGBA'))
+        return image
+
+    # --- Shared instances ---
+    def _get(self, key, load, *args, convert=None):
+        asset = self.assets.get(key)
+        if asset is None:
+            asset = self._submit(key, load, *args).result()
+            if convert is not None:
+                asset = convert(asset)
+            self.assets[key] = asset
+        return asset
+
+    def font(self, path, size):
+        return self._get(('font', path, size), pygame.font.Font, path, size)
+
+    def sound(self, path, wait=True):
+        """
+        Returns the shared Sound, or None if wait is False and it is still loading.
+        Raises the loading error if it failed, so callers can stop asking.
+        """
+        key = ('sound', path)
+        if not wait and key not in self.assets:
+            if not self.load_sound(path).done():
+                return None
+        return self._get(key, self._load_sound, path)
+
+    def image(self, path, fit=None):
+        """
+        Returns the shared image scaled down to fit, converted for fast blitting.
+        Must be called on the display thread once a display mode is set.
+        """
+        return self._get(('image', path, fit), self._load_image, path, fit,
+                         convert=lambda image: image.convert_alpha())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
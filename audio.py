@@ -0,0 +1,151 @@
+import time
+import random
+import pygame
+from array import array
+
+
+def configure_mixer(frequency=44100, buffer=256):
+    """
+    Requests a small mixer buffer ahead of pygame.init(). The buffer is the
+    floor of audio latency: 256 frames at 44.1 kHz is under 6 ms against
+    pygame's default of 512. Has no effect once the mixer is running.
+    """
+    if pygame.mixer.get_init() is None:
+        pygame.mixer.pre_init(frequency, -16, 2, buffer)
+
+
+class AudioEngine:
+    """
+    Plays already decoded sounds on a fixed pool of mixer channels.
+    The first `keypress_voices` channels are reserved for key clicks, so typing
+    can never starve other sounds of channels (or the other way round). Key clicks
+    requested during a frame are coalesced into one voice started by update(); when
+    every voice is busy the one that has played longest is stolen. Other sounds
+    start at once on a free unreserved channel, stealing the oldest if none is free.
+    Counters:
+      played     sounds started
+      coalesced  key clicks merged into another one of the same frame
+      stolen     voices cut short to start a newer sound
+      dropped    sounds not played because the mixer is not running
+      underruns  sounds that started more than deadline_ms after they were requested
+    Latency is the time from request to start, kept for the last `window` sounds;
+    the mixer buffer adds buffer_ms on top of it.
+    """
+    def __init__(self, channels=16, keypress_voices=4, buffer=256, deadline_ms=1000.0 / 30, window=120):
+        self.voices = []
+        self.voice_started = []
+        self.buffer_ms = 0.0
+        self.deadline_ms = deadline_ms
+        self.window = window
+        self.keypress_at = None  # perf_counter of the first key click waiting this frame
+        self.keypresses = 0      # key clicks requested this frame
+        self.reset()
+        init = pygame.mixer.get_init()
+        self.ready = init is not None
+        if not self.ready:
+            return
+        self.buffer_ms = buffer / init[0] * 1000
+        pygame.mixer.set_num_channels(max(channels, keypress_voices + 1))
+        pygame.mixer.set_reserved(keypress_voices)
+        self.voices = [pygame.mixer.Channel(i) for i in range(keypress_voices)]
+        self.voice_started = [0.0] * keypress_voices
+
+    def reset(self):
+        self.played = self.coalesced = self.stolen = self.dropped = self.underruns = 0
+        self.latency = array('d', bytes(8 * self.window))
+        self.latency_index = 0
+        self.latency_count = 0
+
+    # --- Playback ---
+    def play(self, sound, requested=None):
+        """
+        Starts a sound now on an unreserved channel. Returns the channel, or None.
+        """
+        if not self.ready:
+            self.dropped += 1
+            return None
+        channel = pygame.mixer.find_channel()
+        if channel is None:
+            channel = pygame.mixer.find_channel(True)
+            self.stolen += 1
+        if channel is None:
+            self.dropped += 1
+            return None
+        channel.play(sound)
+        self.started(requested)
+        return channel
+
+    def keypress(self):
+        """
+        Requests a key click; it is played by the next update().
+        """
+        if self.keypresses:
+            self.coalesced += 1
+        else:
+            self.keypress_at = time.perf_counter()
+        self.keypresses += 1
+
+    def update(self, keypress_sounds):
+        """
+        Starts this frame's key click, if any, on a keypress voice. Called once per frame.
+        """
+        if not self.keypresses:
+            return
+        self.keypresses = 0
+        requested = self.keypress_at
+        if not keypress_sounds or not self.ready:
+            self.dropped += 1
+            return
+        started = self.voice_started
+        voice = None
+        for i, channel in enumerate(self.voices):
+            if not channel.get_busy():
+                voice = i
+                break
+        if voice is None:
+            voice = started.index(min(started))
+            self.stolen += 1
+        self.voices[voice].play(random.choice(keypress_sounds))
+        started[voice] = time.perf_counter()
+        self.started(requested)
+
+    def started(self, requested):
+        self.played += 1
+        if requested is None:
+            return
+        ms = (time.perf_counter() - requested) * 1000
+        self.latency[self.latency_index] = ms
+        self.latency_index = (self.latency_index + 1) % self.window
+        self.latency_count = min(self.latency_count + 1, self.window)
+        if ms > self.deadline_ms:
+            self.underruns += 1
+
+    # --- Statistics ---
+    def stats(self):
+        values = sorted(self.latency[:self.latency_count])
+        n = len(values)
+        return {
+            'played': self.played,
+            'coalesced': self.coalesced,
+            'stolen': self.stolen,
+            'dropped': self.dropped,
+            'underruns': self.underruns,
+            'latency_mean': sum(values) / n if n else 0.0,
+            'latency_p99': values[min(n - 1, int(n * 0.99))] if n else 0.0,
+            'latency_max': values[-1] if n else 0.0,
+            'buffer_ms': self.buffer_ms,
+        }
+
+    def report(self):
+        """
+        Returns the counters as lines of text.
+        """
+        if not self.ready:
+            return ["Audio: mixer not running."]
+        s = self.stats()
+        return [
+            f"Audio: {s['played']} played, {s['coalesced']} coalesced, {s['stolen']} stolen, "
+            f"{s['dropped']} dropped, {s['underruns']} underruns",
+            f"  latency mean {s['latency_mean']:.2f} ms, p99 {s['latency_p99']:.2f} ms, "
+            f"max {s['latency_max']:.2f} ms (+{s['buffer_ms']:.1f} ms mixer buffer)",
+        ]
@@ -0,0 +1,323 @@
+"""
+Headless frame-time benchmarks for the terminal, effects and splash screens.
+
+Runs every render path offscreen through SDL's dummy drivers and reports p50/p99
+frame times, Python allocations per frame and text throughput, written as JSON so
+runs can be compared:
+
+    python benchmark.py --out before.json
+    python benchmark.py --out after.json --compare before.json
+"""
+import os
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import pygame
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+SCROLLBACK_SIZES = [1000, 100000]
+EFFECT_SETS = {
+    'none': (),
+    'crt': ('scanlines', 'noise', 'flicker'),
+    'full': ('glow', 'scanlines', 'noise', 'flicker', 'corruption', 'jitter', 'warp'),
+}
+LINES_PER_FRAME = 5  # output streamed in while drawing, to keep the damage realistic
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))]
+
+
+def measure(frame, frames, warmup=5, alloc_frames=10):
+    """
+    Times frame() and returns p50/p99/mean in ms plus allocation stats.
+    alloc_kb_per_frame is the peak Python heap growth inside a frame and
+    net_blocks_per_frame the Python blocks it leaves behind; pixel buffers
+    allocated by SDL are not traced.
+    """
+    for i in range(warmup):
+        frame(i)
+    times = []
+    for i in range(frames):
+        t0 = time.perf_counter()
+        frame(i)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    tracemalloc.start()
+    peaks = []
+    blocks = sys.getallocatedblocks()
+    for i in range(alloc_frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        frame(frames + i)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    blocks = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    return {
+        'frames': frames,
+        'p50_ms': round(percentile(times, 50), 3),
+        'p99_ms': round(percentile(times, 99), 3),
+        'mean_ms': round(sum(times) / len(times), 3),
+        'alloc_kb_per_frame': round(sum(peaks) / len(peaks) / 1024.0, 1),
+        'net_blocks_per_frame': round(blocks / alloc_frames, 1),
+    }
+
+
+def make_terminal(size, archive_dir, scrollback=0, effects=()):
+    from terminal import Terminal
+    screen = pygame.display.set_mode(size)
+    term = Terminal(screen=screen, archive_dir=archive_dir)
+    term.use_pipeline(term.build_pipeline(effects))
+    chunk = 10000
+    for start in range(0, scrollback, chunk):
+        term.add_output([f"{i:08d} SYS> routing packet through node {i % 977} [OK]"
+                         for i in range(start, min(scrollback, start + chunk))])
+    return term
+
+
+def bench_terminal(results, resolutions, frames, archive_dir):
+    for res in resolutions:
+        for lines in SCROLLBACK_SIZES:
+            for name, effects in EFFECT_SETS.items():
+                term = make_terminal(RESOLUTIONS[res], archive_dir, lines, effects)
+
+                def frame(i):
+                    term.add_output([f"stream {i}.{j} :: 0x{i * 7919 + j:08x}" for j in range(LINES_PER_FRAME)])
+                    term.draw()
+                    term.present()
+                result = measure(frame, frames)
+                result.update(name='terminal.draw', resolution=res, scrollback=lines, effects=name)
+                results.append(result)
+                term.close()
+
+
+def bench_throughput(results, resolutions, archive_dir, total=20000):
+    """
+    Lines per second pushed through add_output and drawn, STREAM_LINES_PER_FRAME at a time,
+    as plain text and as ANSI-colored log lines.
+    """
+    from config import STREAM_LINES_PER_FRAME
+    cases = {
+        'terminal.throughput': lambda i: f"{i:08d} dump 0123456789abcdef 0123456789abcdef 0123456789abcdef",
+        'terminal.throughput.ansi': lambda i: (f"\x1b[2m{i:08d}\x1b[0m \x1b[1;3{i % 7 + 1}mdump\x1b[0m "
+                                               f"\x1b[38;5;{i % 256}m0123456789abcdef\x1b[0m 0123456789abcdef "
+                                               f"\x1b[4m0123456789abcdef\x1b[24m"),
+    }
+    for res in resolutions:
+        for name, line in cases.items():
+            term = make_terminal(RESOLUTIONS[res], archive_dir)
+            lines = [line(i) for i in range(total)]
+            t0 = time.perf_counter()
+            for start in range(0, total, STREAM_LINES_PER_FRAME):
+                term.add_output(lines[start:start + STREAM_LINES_PER_FRAME])
+                term.draw()
+                term.present()
+            elapsed = time.perf_counter() - t0
+            results.append({'name': name, 'resolution': res, 'effects': 'default',
+                            'lines': total, 'lines_per_s': round(total / elapsed)})
+            term.close()
+
+
+def bench_panes(results, resolutions, frames, archive_dir, pane_counts=(1, 8)):
+    """
+    Frame time with 1 and 8 sessions, idle and with one pane streaming output.
+    """
+    from terminal import Terminal
+    for res in resolutions:
+        for panes in pane_counts:
+            for state in ('idle', 'streaming'):
+                screen = pygame.display.set_mode(RESOLUTIONS[res])
+                term = Terminal(screen=screen, archive_dir=archive_dir, sessions=panes)
+                term.use_pipeline(term.build_pipeline(EFFECT_SETS['crt']))
+                for session in term.sessions:
+                    session.add_output([f"{i:08d} SYS> routing packet through node {i % 977} [OK]" for i in range(200)])
+
+                def frame(i):
+                    if state == 'streaming':
+                        term.add_output([f"stream {i}.{j} :: 0x{i * 7919 + j:08x}" for j in range(LINES_PER_FRAME)])
+                    term.draw()
+                    term.present()
+                result = measure(frame, frames)
+                result.update(name=f'terminal.panes.{panes}.{state}', resolution=res, effects='crt')
+                results.append(result)
+                term.close()
+
+
+def sample_frame(size, font, colors):
+    """
+    Returns a 32-bit surface filled with terminal-like text to run effects on.
+    """
+    surface = pygame.Surface(size, depth=32)
+    surface.fill(colors['bg'])
+    line_h = font.get_height() + 2
+    for row, y in enumerate(range(16, size[1] - line_h, line_h)):
+        surface.blit(font.render(f"{row:04d} ACCESS NODE {row * 37 % 1000:03d} :: LINK ESTABLISHED", True,
+                                 colors['text']), (16, y))
+    return surface
+
+
+def bench_effects(results, resolutions, frames):
+    import effects
+    from config import COLOR_PRESETS, COLOR_SCHEME, FONT_NAME, FONT_SIZE
+    colors = COLOR_PRESETS[COLOR_SCHEME]
+    font = pygame.font.Font(FONT_NAME, FONT_SIZE)
+    for res in resolutions:
+        size = RESOLUTIONS[res]
+        pygame.display.set_mode(size)
+        source = sample_frame(size, font, colors)
+        surface = source.copy()
+        ctx = effects.EffectContext(size)
+        cases = {
+            'apply_scanlines': lambda i: effects.apply_scanlines(surface, 32, 2, ctx=ctx),
+            'apply_scanlines.uncached': lambda i: effects.apply_scanlines(surface, 32, 2),
+            'apply_noise': lambda i: effects.apply_noise(surface, 32, ctx=ctx),
+            'apply_glow': lambda i: effects.apply_glow(surface, colors['glow'], 8, ctx=ctx),
+            'apply_moving_scanlines': lambda i: effects.apply_moving_scanlines(surface, 32, 2, i % 8, i % 4),
+            'corrupt_surface': lambda i: effects.corrupt_surface(surface, 0.2, 32, dest=ctx.surface('corrupt')),
+            'apply_text_glitch': lambda i: [effects.apply_text_glitch("parsing memory fragments...", 0.15)
+                                            for _ in range(size[1] // 26)],
+        }
+        stages = {
+            'GlowStage': effects.GlowStage(colors['glow'], 4),
+            'ScanlineStage': effects.ScanlineStage(32, 4),
+            'NoiseStage': effects.NoiseStage(16),
+            'FlickerStage': effects.FlickerStage(0.15),
+            'CorruptionStage': effects.CorruptionStage(0.2, 32, 1.0, 0.2),
+            'JitterStage': effects.JitterStage(2, colors['bg']),
+            'WarpStage': effects.WarpStage(0.08, colors['bg']),
+        }
+        noise_bank = effects.NoiseBank()
+        noise_bank.build()
+        corruption_bank = effects.CorruptionBank()
+        bank_ctx = effects.EffectContext(size)
+        bank_ctx.noise_bank = noise_bank
+        cases['apply_noise.bank'] = lambda i: effects.apply_noise(surface, 32, ctx=bank_ctx)
+        cases['corrupt_surface.bank'] = lambda i: effects.corrupt_surface(surface, 0.2, 32, dest=ctx.surface('corrupt'),
+                                                                          bank=corruption_bank)
+        stages['NoiseStage.bank'] = effects.NoiseStage(16, bank=noise_bank)
+        stages['CorruptionStage.bank'] = effects.CorruptionStage(0.2, 32, 1.0, 0.2, bank=corruption_bank)
+        for name, stage in stages.items():
+            pipeline = effects.PostProcessPipeline([stage], ctx)
+            cases[name] = lambda i, pipeline=pipeline: pipeline.run(surface, None, i / 60.0)
+        for name, fn in cases.items():
+            def frame(i, fn=fn):
+                surface.blit(source, (0, 0))
+                fn(i)
+            result = measure(frame, frames)
+            result.update(name=f'effects.{name}', resolution=res)
+            results.append(result)
+
+
+def bench_splash(results, resolutions, frames):
+    from splash import SplashScreen
+    from config import COLOR_PRESETS, COLOR_SCHEME, FONT_NAME, FONT_SIZE
+    font = pygame.font.Font(FONT_NAME, FONT_SIZE)
+    for res in resolutions:
+        screen = pygame.display.set_mode(RESOLUTIONS[res])
+        splash = SplashScreen(screen, font, COLOR_PRESETS[COLOR_SCHEME])
+        logo = splash.load_logo()
+        # Sweep each animation's timeline so every phase is covered
+        result = measure(lambda i: splash.draw_logo_frame(logo, (i % 168) / 60.0), frames)
+        result.update(name='splash.show_logo_intro', resolution=res)
+        results.append(result)
+        result = measure(lambda i: splash.draw_boot_frame((i % 360) / 60.0), frames)
+        result.update(name='splash.run', resolution=res)
+        results.append(result)
+
+
+def result_key(result):
+    return tuple(str(result.get(k)) for k in ('name', 'resolution', 'scrollback', 'effects'))
+
+
+def compare(results, baseline_path):
+    """
+    Prints the p50/p99 or throughput change of every result also in the baseline.
+    """
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        label = ' '.join(k for k in result_key(result) if k != 'None')
+        if 'lines_per_s' in result:
+            change = (result['lines_per_s'] / max(1, old['lines_per_s']) - 1) * 100
+            print(f"{label:<60} lines/s {old['lines_per_s']:>9} -> {result['lines_per_s']:>9} ({change:+.1f}%)")
+        else:
+            change = (result['p50_ms'] / max(1e-9, old['p50_ms']) - 1) * 100
+            print(f"{label:<60} p50 {old['p50_ms']:>8.2f} -> {result['p50_ms']:>8.2f} ms ({change:+.1f}%)"
+                  f"  p99 {old['p99_ms']:>8.2f} -> {result['p99_ms']:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--out', default='benchmark.json', help='JSON file to write results to')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--frames', type=int, default=60, help='timed frames per case')
+    parser.add_argument('--resolutions', default=','.join(RESOLUTIONS), help='comma-separated subset of ' + ', '.join(RESOLUTIONS))
+    parser.add_argument('--suites', default='terminal,throughput,panes,effects,splash')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the random effects, so runs see the same glitches')
+    args = parser.parse_args()
+    resolutions = [r for r in args.resolutions.split(',') if r]
+    suites = set(args.suites.split(','))
+
+    from effects import seed_effects
+    pygame.init()
+    seed_effects(args.seed)
+    results = []
+    archive_dir = tempfile.mkdtemp(prefix='crt-bench-')
+    try:
+        if 'terminal' in suites:
+            bench_terminal(results, resolutions, args.frames, archive_dir)
+        if 'throughput' in suites:
+            bench_throughput(results, resolutions, archive_dir)
+        if 'panes' in suites:
+            bench_panes(results, resolutions, args.frames, archive_dir)
+        if 'effects' in suites:
+            bench_effects(results, resolutions, args.frames)
+        if 'splash' in suites:
+            bench_splash(results, resolutions, args.frames)
+    finally:
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        pygame.quit()
+
+    for result in results:
+        label = ' '.join(k for k in result_key(result) if k != 'None')
+        if 'lines_per_s' in result:
+            print(f"{label:<60} {result['lines_per_s']:>9} lines/s")
+        else:
+            print(f"{label:<60} p50 {result['p50_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms"
+                  f"  {result['alloc_kb_per_frame']:>8.1f} KB/frame")
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'frames': args.frames,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
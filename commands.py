@@ -1,34 +1,129 @@
+import threading
+from registry import Command, CommandTrie, UsageError, discover
+from settings import SCHEMA, ConfigError
+from config import COLOR_PRESETS
+
 class CommandHandler:
     """
     Handles terminal commands and their output.
+    Commands live in a prefix trie, so lookups, completion, unambiguous
+    abbreviations ('se' for 'search') and help listings stay fast however many
+    plugin commands are registered. Plugins are discovered from metadata only
+    and imported the first time one of their commands runs.
     """
     def __init__(self):
-        self.commands = {}
-        self.register('help', self.cmd_help)
-        self.register('access', self.cmd_access)
-        self.register('exit', self.cmd_exit)
+        self.commands = CommandTrie()  # name or alias -> Command
+        self.archive = None  # ScrollbackArchive to search, set by the terminal
+        self.jump = None     # callback scrolling the view to a history index
+        self.profiler = None  # FrameProfiler of the terminal, set by the terminal
+        self.audio = None     # AudioEngine whose counters 'perf' reports, set by the terminal
+        self.settings = None  # RuntimeConfig changed by 'set' and 'theme', set by the terminal
+        self.context = threading.local()  # per worker thread: origin of the running command
+        self.register('help', self.cmd_help, "Show this help message: help [command or prefix]")
+        self.register('access', self.cmd_access, "Simulate system access")
+        self.register('search', self.cmd_search, "Search the session archive: search <text>", aliases=('grep',))
+        self.register('perf', self.cmd_perf, "Frame timing stats: perf [on|off|hud|reset|audio]")
+        self.register('set', self.cmd_set, "Show or change settings: set [name [value]]")
+        self.register('theme', self.cmd_theme, "Show or switch the color theme: theme [name]")
+        self.register('exit', self.cmd_exit, "Exit the terminal")
+
+    def register(self, name, func, help='', aliases=()):
+        self.add(Command(name, func, help, aliases))
+
+    def add(self, command):
+        """
+        Registers a Command under its name and aliases. Names already taken are kept.
+        """
+        for name in (command.name,) + command.aliases:
+            if name in self.commands:
+                print(f"Command '{name}' is already registered; ignoring the one from {command.origin}")
+            else:
+                self.commands.insert(name, command)
+
+    def load_plugins(self, directory=None, index_path=None, entry_points=True):
+        """
+        Registers the plugin commands found in a directory and in installed
+        packages' entry points, without importing any of them.
+        """
+        for command in discover(directory, index_path, entry_points):
+            self.add(command)
 
-    def register(self, name, func):
-        self.commands[name] = func
+    def complete(self, prefix):
+        """
+        Returns the sorted command names starting with prefix.
+        """
+        return self.commands.complete(prefix.lower())
 
-    def handle(self, line):
+    def resolve(self, name):
+        """
+        Returns the Command for a name, alias or unambiguous abbreviation, or None.
+        """
+        name = name.lower()
+        command = self.commands.get(name)
+        if command is None:
+            match = self.commands.unique(name)
+            if match is not None:
+                command = match[1]
+            else:
+                # An abbreviation of a command and its own aliases is not ambiguous
+                found = {id(c): c for _, c in self.commands.items(name)}
+                if len(found) == 1:
+                    command, = found.values()
+        return command
+
+    def handle(self, line, origin=None):
+        """
+        Runs a command line. origin is the history index of its echo, if any;
+        commands reading the history (search) only look at lines before it.
+        """
+        self.context.origin = origin
         parts = line.strip().split()
         if not parts:
             return ''
         cmd = parts[0].lower()
         args = parts[1:]
-        if cmd in self.commands:
-            return self.commands[cmd](args)
-        else:
+        command = self.resolve(cmd)
+        if command is None:
+            candidates = self.commands.complete(cmd, limit=6) if cmd else []
+            if candidates:
+                return f"Ambiguous command: {cmd} ({', '.join(candidates[:5])}{', ...' if len(candidates) > 5 else ''})."
             return f"Unknown command: {cmd}. Type 'help' for a list of commands."
+        try:
+            command.load()
+            return command(args)
+        except UsageError as e:
+            return [line for line in (str(e).strip(), command.parser().format_usage().strip()) if line]
 
     def cmd_help(self, args):
-        return [
-            "Available commands:",
-            "  help   - Show this help message",
-            "  access - Simulate system access",
-            "  exit   - Exit the terminal"
-        ]
+        if args:
+            command = self.commands.get(args[0].lower())
+            if command is not None:
+                return self.describe(command)
+        prefix = args[0].lower() if args else ''
+        listed = [(name, command) for name, command in self.commands.items(prefix) if name == command.name]
+        if not listed:
+            return f"No commands matching '{prefix}'."
+        width = max(6, max(len(name) for name, _ in listed))
+        lines = ["Available commands:"]
+        for name, command in listed:
+            alias = f" (alias: {', '.join(command.aliases)})" if command.aliases else ''
+            lines.append(f"  {name:<{width}} - {command.help or 'Plugin from ' + str(command.origin)}{alias}")
+        return lines
+
+    def describe(self, command):
+        lines = [f"{command.name} - {command.help}" if command.help else command.name]
+        if command.aliases:
+            lines.append(f"  aliases: {', '.join(command.aliases)}")
+        if command.origin:
+            lines.append(f"  from: {command.origin}")
+        try:
+            parser = command.parser()
+        except Exception as e:
+            lines.append(f"  failed to load: {e}")
+            return lines
+        if parser is not None:
+            lines.extend(parser.format_help().rstrip().split('\n'))
+        return lines
 
     def cmd_access(self, args):
         return [
@@ -36,5 +131,99 @@ class CommandHandler:
             "Welcome, Operator. System ready for input."
         ]
 
+    def cmd_search(self, args):
+        if not args:
+            return "Usage: search <text>"
+        if self.archive is None:
+            return "Search unavailable: the session archive is disabled."
+        query = ' '.join(args)
+        # Output arriving after this command was typed, its own echo included, is not searched
+        origin = self.context.origin
+        matches = self.archive.search(query, stop=len(self.archive) if origin is None else origin)
+        if not matches:
+            return f"No matches for '{query}'."
+        if self.jump is not None:
+            self.jump(matches[0][0])
+        return [f"{len(matches)} match(es) for '{query}', newest first:"] + \
+            [f"{n:>8}: {text}" for n, text in matches]
+
+    def cmd_perf(self, args):
+        profiler = self.profiler
+        if profiler is None:
+            return "Profiler unavailable."
+        action = args[0].lower() if args else ''
+        if action == 'on':
+            profiler.reset()
+            profiler.enabled = True
+            return "Frame profiler enabled."
+        if action == 'off':
+            profiler.enabled = False
+            profiler.hud = False
+            return "Frame profiler disabled."
+        if action == 'hud':
+            if not profiler.enabled:
+                profiler.reset()
+                profiler.enabled = True
+            profiler.hud = not profiler.hud
+            return f"Performance HUD {'shown' if profiler.hud else 'hidden'}."
+        if action == 'reset':
+            profiler.reset()
+            if self.audio is not None:
+                self.audio.reset()
+            return "Frame profiler statistics cleared."
+        if action == 'audio':
+            return self.audio.report() if self.audio is not None else "Audio engine unavailable."
+        if action:
+            return "Usage: perf [on|off|hud|reset|audio]"
+        lines = profiler.report()
+        if self.audio is not None:
+            lines += self.audio.report()
+        return lines
+
+    def cmd_set(self, args):
+        settings = self.settings
+        if settings is None:
+            return "Settings unavailable."
+        if not args:
+            overrides = settings.overrides()
+            return [f"{name:<22} {format_setting(value)}{' *' if name in overrides else ''}"
+                    for name, value in sorted(settings.values.items())] + ["(* changed from config.py)"]
+        name = args[0].lower()
+        if name not in SCHEMA:
+            matches = [n for n in sorted(SCHEMA) if n.startswith(name)]
+            if len(matches) != 1:
+                return f"Unknown setting: {name}. Type 'set' for a list."
+            name, = matches
+        if len(args) == 1:
+            return f"{name} = {format_setting(settings[name])}"
+        try:
+            settings.set(name, ' '.join(args[1:]))
+        except ConfigError as e:
+            return f"Invalid setting: {e}"
+        except OSError as e:
+            return f"{name} = {format_setting(settings[name])} (not saved: {e})"
+        return f"{name} = {format_setting(settings[name])}"
+
+    def cmd_theme(self, args):
+        settings = self.settings
+        if settings is None:
+            return "Settings unavailable."
+        current = settings['color_scheme']
+        if not args:
+            return "Themes: " + ', '.join(f"{name}*" if name == current else name for name in COLOR_PRESETS)
+        try:
+            settings.set('color_scheme', args[0])
+        except ConfigError as e:
+            return f"Invalid theme: {e}"
+        except OSError as e:
+            return f"Theme set to {settings['color_scheme']} (not saved: {e})."
+        return f"Theme set to {settings['color_scheme']}."
+
     def cmd_exit(self, args):
-        return ["Exiting terminal..."] 
\ No newline at end of file
+        return ["Exiting terminal..."] 
+
+
+def format_setting(value):
+    if isinstance(value, bool):
+        return 'on' if value else 'off'
+    return str(value)
@@ -25,10 +25,137 @@ COLOR_PRESETS = {
     },
 }
 
+# ANSI colors 0-15 for SGR-colored command output (VGA text mode palette); the
+# default foreground and background follow the color scheme
+ANSI_COLORS = [
+    (0, 0, 0), (170, 0, 0), (0, 170, 0), (170, 85, 0),
+    (0, 0, 170), (170, 0, 170), (0, 170, 170), (170, 170, 170),
+    (85, 85, 85), (255, 85, 85), (85, 255, 85), (255, 255, 85),
+    (85, 85, 255), (255, 85, 255), (85, 255, 255), (255, 255, 255),
+]
+
 # Font settings
 FONT_NAME = 'Assets/PerfectDOSVGA437.ttf'  # Place your retro font in assets/
 FONT_SIZE = 24
 
+# Asset loading: fonts, sounds and images load on ASSET_WORKERS background threads.
+# Decoded sounds and scaled images are cached in ASSET_CACHE_DIR, keyed by file
+# hash plus mixer format or resolution (safe to delete)
+ASSET_CACHE_DIR = '.cache/assets'
+ASSET_WORKERS = 4
+
+# Glyph atlas / rendered line cache memory limit
+GLYPH_CACHE_MB = 16
+
+# Audio: a small mixer buffer (in sample frames) keeps key clicks under ~6 ms of
+# output latency; KEYPRESS_VOICES of the AUDIO_CHANNELS mixer channels are
+# reserved for key clicks, the oldest click being cut off when all are busy
+AUDIO_BUFFER = 256
+AUDIO_CHANNELS = 16
+KEYPRESS_VOICES = 4
+
+# Input: held keys repeat after KEY_REPEAT_DELAY ms every KEY_REPEAT_INTERVAL ms;
+# INPUT_HISTORY submitted lines are kept for up/down (shift+up/down scroll a row);
+# an ambiguous tab completion lists at most COMPLETION_LIST_LIMIT command names
+KEY_REPEAT_DELAY = 400
+KEY_REPEAT_INTERVAL = 35
+INPUT_HISTORY = 500
+COMPLETION_LIST_LIMIT = 50
+
+# Plugin commands: modules in PLUGIN_DIR declaring @registry.command functions, plus
+# commands installed packages register under the 'cyberpunk_terminal.commands'
+# entry point group. Only their metadata is read at startup (cached in PLUGIN_INDEX);
+# a plugin is imported the first time one of its commands runs.
+PLUGIN_DIR = 'plugins'
+PLUGIN_INDEX = '.cache/plugins.json'
+PLUGIN_ENTRY_POINTS = True
+
+# Sessions: the terminal starts with SESSIONS tiled panes, each an independent
+# session with its own scrollback and command queue (F2 opens a pane, F4 closes
+# the active one, F6 / Shift+F6 or a click moves the focus), at most MAX_SESSIONS
+SESSIONS = 1
+MAX_SESSIONS = 8
+
+# Remote server: with REMOTE_LISTEN set (e.g. ['tcp://0.0.0.0:7777', 'unix:///tmp/crt.sock'])
+# the terminal also serves its commands to remote clients (server.py), mirroring
+# their commands and output in the first pane. Output goes out in frames of up to
+# REMOTE_BATCH_LINES lines or REMOTE_BATCH_MS of output, zlib-compressed from
+# REMOTE_COMPRESS_MIN bytes (None disables); at most REMOTE_QUEUE_FRAMES frames wait
+# per client, after which that client's commands are paused until it reads. The mirror
+# keeps the newest REMOTE_MIRROR_LINES lines if the display falls behind.
+REMOTE_LISTEN = []
+REMOTE_WORKERS = 16
+REMOTE_BATCH_LINES = 256
+REMOTE_BATCH_MS = 20
+REMOTE_COMPRESS_MIN = 512
+REMOTE_QUEUE_FRAMES = 64
+REMOTE_MIRROR_LINES = 2000
+
+# Splash screens: animations are sampled at SPLASH_FPS but only redrawn when
+# something on screen changes; random jitter, glitches and flicker are redrawn
+# SPLASH_GLITCH_RATE times a second, from SPLASH_CORRUPT_VARIANTS pre-corrupted logos
+SPLASH_FPS = 60
+SPLASH_GLITCH_RATE = 15
+SPLASH_CORRUPT_VARIANTS = 4
+
+# Recordings (recorder.py): frames are rendered offscreen at RECORD_FPS against a
+# virtual clock, with the random effects seeded from RECORD_SEED; at most
+# RECORD_QUEUE_FRAMES frames wait for the encoder or frame writer
+RECORD_FPS = 30
+RECORD_SEED = 1
+RECORD_QUEUE_FRAMES = 8
+
+# Runtime settings: the look and pacing options below (colors, effects, text
+# glitches, render mode, frame rates) can be overridden in CONFIG_FILE, a JSON
+# object of lower-case names, e.g. {"color_scheme": "amber", "enable_corruption": false},
+# or changed with the 'set' and 'theme' commands (which save to it). The file is
+# checked every CONFIG_POLL_INTERVAL seconds and applied as soon as it changes.
+CONFIG_FILE = 'settings.json'
+CONFIG_POLL_INTERVAL = 1.0
+
+# Headless mode: render through SDL's dummy video/audio drivers without opening
+# a window (CI runs; benchmark.py always runs headless)
+HEADLESS = False
+
+# Frame profiler: per-phase timings over the last PROFILER_FRAMES frames, dumped
+# by the 'perf' command; PERF_HUD shows the on-screen overlay at startup (F3 toggles)
+PROFILER_ENABLED = False
+PERF_HUD = False
+PROFILER_FRAMES = 240
+
+# Frame pacing: TARGET_FPS while anything moves; after IDLE_DELAY seconds with no
+# input, output or animated effect the terminal redraws at IDLE_FPS (input still
+# wakes it at once). QUALITY_GOVERNOR steps effect quality down when frames miss
+# the TARGET_FPS budget and back up when there is headroom.
+TARGET_FPS = 60
+IDLE_FPS = 10
+IDLE_DELAY = 2.0  # seconds
+QUALITY_GOVERNOR = True
+
+# Render mode: 'full' redraws and flips the whole window every frame,
+# 'damage' redraws only changed regions and updates just those rects
+RENDER_MODE = 'full'
+
+# Effect threading: EFFECT_WORKERS > 1 splits post-processing into horizontal
+# stripes on a thread pool; EFFECT_PIPELINING runs frame N's effects in the
+# background while frame N+1 is composed (one frame of extra latency)
+EFFECT_WORKERS = 0
+EFFECT_PIPELINING = False
+
+# Commands run on this many background threads so the UI never blocks
+COMMAND_WORKERS = 4
+# Streaming command output: lines pulled into the display per frame, and lines a
+# command may buffer before it is blocked until the display catches up
+STREAM_LINES_PER_FRAME = 200
+STREAM_BUFFER_LINES = 1000
+
+# Scrollback ring buffer capacity (lines)
+SCROLLBACK_LINES = 200000
+
+# Disk-backed archive of every output line (scrollable and searchable beyond the ring buffer)
+ENABLE_ARCHIVE = True
+ARCHIVE_DIR = 'archive'  # one .log/.idx/.blm set per session
+
 # Text speed (characters per second, or 0 for instant)
 TEXT_SPEED = 0  # 0 = instant, >0 = typing effect
 
@@ -49,11 +176,19 @@ SCANLINE_OPACITY = 64  # 0-255
 NOISE_OPACITY = 0     # 0-255
 GLOW_RADIUS = 0        # px
 JITTER_AMOUNT = 0      # px
+WARP_AMOUNT = 0.08     # barrel distortion strength
 FLICKER_INTENSITY = 0.0  # 0-1 
 
+# Pre-generated noise bank: NOISE_BANK_FRAMES grain tiles of NOISE_BANK_TILE px,
+# cycled at random wrap-around offsets. Memory: frames * (2 * tile)^2 * 9 bytes
+# (4 * 512^2 * 9 = 9 MB by default), plus 4 bytes per pixel more if apply_noise is used
+NOISE_BANK_FRAMES = 4
+NOISE_BANK_TILE = 256  # px
+
 # Corruption effect toggle and settings
 ENABLE_CORRUPTION = True
 CORRUPTION_CHANCE = 0.012  # Probability per frame to trigger corruption
 CORRUPTION_DURATION = 0.75  # Seconds corruption lasts
 CORRUPTION_INTENSITY = 0.6  # 0-1, how many blocks to corrupt
-CORRUPTION_BLOCK_SIZE = 80  # px 
\ No newline at end of file
+CORRUPTION_BLOCK_SIZE = 80  # px
+CORRUPTION_BANK_MAPS = 64  # pre-generated band displacement maps (~0.5 KB each) 
\ No newline at end of file
@@ -0,0 +1,248 @@
+import pygame
+from collections import deque
+
+
+class GapBuffer:
+    """
+    Editable text kept as a list of characters with a gap at the cursor.
+    Inserting or deleting n characters at the cursor, and moving it n places,
+    costs O(n) however long the text is; a paste of a few KB is one insert.
+    The joined string is cached until the next edit.
+    """
+    def __init__(self, text='', capacity=64):
+        self.chars = [''] * capacity
+        self.gap_start = 0
+        self.gap_end = capacity
+        self._text = ''
+        if text:
+            self.insert(text)
+
+    def __len__(self):
+        return len(self.chars) - (self.gap_end - self.gap_start)
+
+    @property
+    def cursor(self):
+        return self.gap_start
+
+    def text(self):
+        if self._text is None:
+            chars = self.chars
+            self._text = ''.join(chars[:self.gap_start]) + ''.join(chars[self.gap_end:])
+        return self._text
+
+    def insert(self, text):
+        n = len(text)
+        if not n:
+            return
+        if self.gap_end - self.gap_start < n:
+            # Grow the gap to at least double the buffer
+            grow = max(n, len(self.chars))
+            self.chars[self.gap_end:self.gap_end] = [''] * grow
+            self.gap_end += grow
+        self.chars[self.gap_start:self.gap_start + n] = text
+        self.gap_start += n
+        self._text = None
+
+    def backspace(self, n=1):
+        """
+        Deletes up to n characters before the cursor.
+        """
+        n = min(n, self.gap_start)
+        if n:
+            self.gap_start -= n
+            self._text = None
+
+    def delete(self, n=1):
+        """
+        Deletes up to n characters after the cursor.
+        """
+        n = min(n, len(self.chars) - self.gap_end)
+        if n:
+            self.gap_end += n
+            self._text = None
+
+    def move(self, n):
+        """
+        Moves the cursor n characters right (left if negative), shifting only
+        the characters it passes over across the gap.
+        """
+        chars = self.chars
+        if n < 0:
+            n = min(-n, self.gap_start)
+            chars[self.gap_end - n:self.gap_end] = chars[self.gap_start - n:self.gap_start]
+            self.gap_start -= n
+            self.gap_end -= n
+        elif n > 0:
+            n = min(n, len(chars) - self.gap_end)
+            chars[self.gap_start:self.gap_start + n] = chars[self.gap_end:self.gap_end + n]
+            self.gap_start += n
+            self.gap_end += n
+
+    def move_to(self, index):
+        self.move(max(0, min(index, len(self))) - self.gap_start)
+
+    def set_text(self, text):
+        """
+        Replaces the whole text, leaving the cursor at its end.
+        """
+        self.gap_start = 0
+        self.gap_end = len(self.chars)
+        self._text = ''
+        self.insert(text)
+
+
+class InputHistory:
+    """
+    Previously submitted lines, browsed with up/down. The line being typed is
+    kept as a draft and comes back when browsing past the newest entry.
+    """
+    def __init__(self, size=500):
+        self.entries = deque(maxlen=size)
+        self.index = None  # entry being shown, or None while editing the draft
+        self.draft = ''
+
+    def add(self, line):
+        if line and (not self.entries or self.entries[-1] != line):
+            self.entries.append(line)
+        self.index = None
+
+    def previous(self, current):
+        """
+        Returns the entry before the one shown, or None at the oldest entry.
+        """
+        if not self.entries or self.index == 0:
+            return None
+        if self.index is None:
+            self.draft = current
+            self.index = len(self.entries)
+        self.index -= 1
+        return self.entries[self.index]
+
+    def next(self):
+        """
+        Returns the entry after the one shown (the draft past the newest), or None.
+        """
+        if self.index is None:
+            return None
+        self.index += 1
+        if self.index >= len(self.entries):
+            self.index = None
+            return self.draft
+        return self.entries[self.index]
+
+
+class LineEditor:
+    """
+    The terminal's input line: a gap buffer with a cursor, history and command
+    name completion. view() returns just the part of the line that fits on
+    screen, scrolled horizontally to keep the cursor visible.
+    """
+    def __init__(self, history_size=500):
+        self.buffer = GapBuffer()
+        self.history = InputHistory(history_size)
+        self.offset = 0  # first character shown
+
+    def text(self):
+        return self.buffer.text()
+
+    @property
+    def cursor(self):
+        return self.buffer.cursor
+
+    def insert(self, text):
+        self.buffer.insert(text)
+
+    def backspace(self, n=1):
+        self.buffer.backspace(n)
+
+    def delete(self, n=1):
+        self.buffer.delete(n)
+
+    def move(self, n):
+        self.buffer.move(n)
+
+    def home(self):
+        self.buffer.move_to(0)
+
+    def end(self):
+        self.buffer.move_to(len(self.buffer))
+
+    def submit(self):
+        """
+        Returns the line and clears the editor, recording the line in the history.
+        """
+        line = self.buffer.text()
+        self.history.add(line.strip())
+        self.buffer.set_text('')
+        self.offset = 0
+        return line
+
+    def history_previous(self):
+        line = self.history.previous(self.buffer.text())
+        if line is not None:
+            self.buffer.set_text(line)
+
+    def history_next(self):
+        line = self.history.next()
+        if line is not None:
+            self.buffer.set_text(line)
+
+    def complete(self, completer):
+        """
+        Completes the command name at the start of the line. completer(prefix)
+        returns the sorted names starting with prefix. A unique match is filled
+        in with a trailing space; otherwise the longest common prefix is. Returns
+        the candidates when the line could not be extended, else an empty list.
+        """
+        text = self.buffer.text()
+        cursor = self.buffer.cursor
+        head = text[:cursor]
+        prefix = head.lstrip()
+        if ' ' in prefix:
+            return []
+        matches = completer(prefix)
+        if not matches:
+            return []
+        if len(matches) == 1:
+            completion = matches[0] + ' '
+        else:
+            # Sorted, so the first and last names bound the common prefix
+            first, last = matches[0], matches[-1]
+            n = 0
+            while n < min(len(first), len(last)) and first[n] == last[n]:
+                n += 1
+            completion = first[:n]
+        if len(completion) <= len(prefix):
+            return matches
+        self.buffer.insert(completion[len(prefix):])
+        return []
+
+    def view(self, cols):
+        """
+        Returns the visible slice of the line and the cursor column within it.
+        """
+        cursor = self.buffer.cursor
+        if cursor < self.offset:
+            self.offset = cursor
+        elif cursor >= self.offset + cols:
+            self.offset = cursor - cols + 1
+        self.offset = max(0, min(self.offset, len(self.buffer) - cols + 1))
+        return self.buffer.text()[self.offset:self.offset + cols], cursor - self.offset
+
+
+def clipboard_text():
+    """
+    Returns the text on the system clipboard, or '' if there is none.
+    """
+    try:
+        get_text = getattr(pygame.scrap, 'get_text', None)
+        if get_text is not None:
+            return get_text() or ''
+        if not pygame.scrap.get_init():
+            pygame.scrap.init()
+        data = pygame.scrap.get(pygame.SCRAP_TEXT)
+    except pygame.error:
+        return ''
+    if not data:
+        return ''
+    return data.decode('utf-8', 'replace').rstrip('\0')
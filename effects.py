@@ -2,38 +2,279 @@ import pygame
 import random
 import numpy as np
 import string
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Every random effect draws from these two generators; seed_effects() makes a run reproducible
+rng = random.Random()
+np_rng = np.random.default_rng()
+
+def seed_effects(seed):
+    """
+    Reseeds the effect generators in place (modules holding them see the change).
+    Texture banks built afterwards are reproducible too.
+    """
+    rng.seed(seed)
+    np_rng.bit_generator.state = np.random.PCG64(seed).state
+
+# --- Texture banks ---
+class NoiseBank:
+    """
+    A few pre-generated grain tiles, built once on a background thread. Each frame
+    the screen is covered with tile-sized blocks, every block reading a random
+    tile at a random wrap-around offset, so the grain never visibly repeats while
+    a frame costs only the blocks' placement.
+    Tiles are stored wrapped to twice their size so any offset is a plain slice.
+    Memory: frames * (2 * tile)^2 bytes, plus that again times 8 (NoiseStage grain)
+    or 4 (noise overlay surface) for each derived format in use.
+    """
+    def __init__(self, frames=4, tile=256):
+        self.frames = frames
+        self.tile = tile
+        self.gray = None
+        self.formats = {}
+        self.placement = None
+        self.ready = threading.Event()
+        self.started = False
+        self.rng = np.random.default_rng(np_rng.integers(2**63))
+
+    def available(self):
+        """
+        Returns True once the bank is built, starting the background build on first call.
+        Until then users fall back to generating fresh noise.
+        """
+        if not self.started:
+            self.started = True
+            threading.Thread(target=self.build, name='noise-bank', daemon=True).start()
+        return self.ready.is_set()
+
+    def build(self):
+        if self.ready.is_set():
+            return
+        t = self.tile
+        gray = np.frombuffer(self.rng.bytes(self.frames * t * t), dtype=np.uint8).reshape(self.frames, t, t)
+        self.gray = np.tile(gray, (1, 2, 2))
+        self.ready.set()
+
+    def derived(self, key, convert, variant=None):
+        """
+        Returns the bank converted once into another pixel format, cached by key.
+        Asking for another variant of a format (say, a new opacity) replaces the
+        cached one rather than keeping both.
+        """
+        entry = self.formats.get(key)
+        if entry is None or entry[0] != variant:
+            entry = self.formats[key] = (variant, convert(self.gray))
+        return entry[1]
+
+    def shuffle(self, size):
+        """
+        Picks this frame's (tile, y offset, x offset) for every block of the screen.
+        """
+        w, h = size
+        t = self.tile
+        shape = (-(-h // t), -(-w // t))
+        placement = np.empty(shape + (3,), dtype=np.intp)
+        placement[..., 0] = self.rng.integers(0, self.frames, shape)
+        placement[..., 1:] = self.rng.integers(0, t, shape + (2,))
+        self.placement = placement
+
+    def blocks(self, y0, x0, h, w):
+        """
+        Yields (dest_y, dest_x, height, width, tile, src_y, src_x) pieces covering
+        the region (y0, x0, h, w) of the screen, with dest relative to the region.
+        """
+        t = self.tile
+        placement = self.placement
+        for by in range(y0 // t, (y0 + h - 1) // t + 1):
+            top = max(y0, by * t)
+            bottom = min(y0 + h, by * t + t)
+            for bx in range(x0 // t, (x0 + w - 1) // t + 1):
+                left = max(x0, bx * t)
+                right = min(x0 + w, bx * t + t)
+                f, oy, ox = placement[by, bx]
+                yield (top - y0, left - x0, bottom - top, right - left,
+                       f, oy + top - by * t, ox + left - bx * t)
+
+
+class CorruptionBank:
+    """
+    Pre-generated corruption displacement maps: each map is a list of band
+    positions and horizontal shifts as fractions of the screen size. A burst frame
+    picks a random map and rotates it by a random vertical offset, wrapping around.
+    """
+    def __init__(self, maps=64, bands=32):
+        rng = np.random.default_rng(np_rng.integers(2**63))
+        self.rng = rng
+        self.ys = rng.random((maps, bands))
+        self.shifts = rng.uniform(-1.0 / 8, 1.0 / 8, (maps, bands))
+
+    def bands(self, size, intensity=0.2, block_size=32):
+        """
+        Same as corruption_bands(): a list of (y, x_shift) pairs.
+        """
+        w, h = size
+        count = min(int(h * intensity // block_size), self.ys.shape[1])
+        if count <= 0:
+            return []
+        m = self.rng.integers(len(self.ys))
+        ys = (self.ys[m, :count] + self.rng.random()) % 1.0 * (max(0, h - block_size) + 1)
+        shifts = self.shifts[m, :count] * w
+        return list(zip(ys.astype(int).tolist(), shifts.astype(int).tolist()))
+
+# --- Effect buffers ---
+class EffectContext:
+    """
+    Owns the framebuffer and the scratch surfaces used by the effects, keyed by
+    window size. Buffers are reused across frames and rebuilt only on resize.
+    """
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.surfaces = {}
+        self.noise_pixels = None
+        self.noise_bank = None  # optional NoiseBank for noise_surface()
+
+    def resize(self, size):
+        """
+        Drops every buffer if the window size changed. Returns True if it did.
+        """
+        size = tuple(size)
+        if size == self.size:
+            return False
+        self.size = size
+        self.surfaces.clear()
+        self.noise_pixels = None
+        return True
+
+    def surface(self, name, size=None, flags=0, depth=0):
+        """
+        Returns a pooled surface, allocating it on first use for this size.
+        """
+        size = self.size if size is None else tuple(size)
+        key = (name, size, flags, depth)
+        surf = self.surfaces.get(key)
+        if surf is None:
+            # An explicit depth of 0 is rejected; leave it out to get the display format
+            surf = pygame.Surface(size, flags, depth) if depth else pygame.Surface(size, flags)
+            self.surfaces[key] = surf
+        return surf
+
+    @property
+    def framebuffer(self):
+        # 32-bit so the post-processing pipeline can view its pixels directly
+        return self.surface('framebuffer', depth=32)
+
+    def scanline_overlay(self, opacity, spacing):
+        """
+        Returns a full-size layer with the scanlines pre-baked into it. The layer is
+        blitted with BLEND_MULT, which darkens exactly like black at the given alpha
+        but skips per-pixel alpha blending.
+        """
+        key = ('scanlines', self.size, opacity, spacing)
+        overlay = self.surfaces.get(key)
+        if overlay is None:
+            w, h = self.size
+            overlay = pygame.Surface(self.size)
+            overlay.fill((255, 255, 255))
+            shade = 255 - opacity
+            for y in range(0, h, spacing * 2):
+                overlay.fill((shade, shade, shade), (0, y, w, spacing))
+            self.surfaces[key] = overlay
+        return overlay
+
+    def tint_layer(self, color, size):
+        """
+        Returns an SRCALPHA layer filled with color, refilled only when the color changes.
+        """
+        color = tuple(color)
+        key = ('tint', tuple(size), color)
+        layer = self.surfaces.get(key)
+        if layer is None:
+            layer = pygame.Surface(size, pygame.SRCALPHA)
+            layer.fill(color)
+            self.surfaces[key] = layer
+        return layer
+
+    def noise_surface(self):
+        """
+        Returns the full-size noise surface refilled in place with fresh grain.
+        """
+        surf = self.surface('noise')
+        w, h = self.size
+        bank = self.noise_bank
+        if bank is not None and bank.available():
+            packed = bank.derived('packed', lambda gray: np.multiply(gray, np.uint32(0x010101), dtype=np.uint32))
+            bank.shuffle(self.size)
+            pixels = pygame.surfarray.pixels2d(surf).T
+            for dy, dx, bh, bw, f, sy, sx in bank.blocks(0, 0, h, w):
+                pixels[dy:dy + bh, dx:dx + bw] = packed[f, sy:sy + bh, sx:sx + bw]
+            del pixels  # Unlock the surface!
+            return surf
+        if self.noise_pixels is None:
+            # Scratch array laid out like the surface rows so the copy is contiguous
+            self.noise_pixels = np.empty((h, w), dtype=np.uint32).T
+        gray = np.frombuffer(np_rng.bytes(w * h), dtype=np.uint8).reshape(h, w).T
+        np.multiply(gray, np.uint32(0x010101), out=self.noise_pixels, casting='unsafe')
+        pixels = pygame.surfarray.pixels2d(surf)
+        pixels[...] = self.noise_pixels
+        del pixels  # Unlock the surface!
+        return surf
 
 # --- Scanlines ---
-def apply_scanlines(surface, opacity=32, spacing=2):
+def apply_scanlines(surface, opacity=32, spacing=2, rect=None, ctx=None):
     """
     Draws horizontal scanlines over the surface.
+    rect: optional area to limit drawing to; scanline phase stays aligned to the full surface.
+    ctx: optional EffectContext holding a pre-baked scanline layer for this size.
     """
-    w, h = surface.get_size()
-    scanline = pygame.Surface((w, spacing), pygame.SRCALPHA)
+    area = surface.get_rect() if rect is None else pygame.Rect(rect).clip(surface.get_rect())
+    if ctx is not None and ctx.size == surface.get_size():
+        surface.blit(ctx.scanline_overlay(opacity, spacing), area, area, special_flags=pygame.BLEND_MULT)
+        return
+    scanline = pygame.Surface((area.width, spacing), pygame.SRCALPHA)
     scanline.fill((0, 0, 0, opacity))
-    for y in range(0, h, spacing*2):
-        surface.blit(scanline, (0, y))
+    period = spacing * 2
+    old_clip = surface.get_clip()
+    surface.set_clip(area)
+    for y in range(area.top - area.top % period, area.bottom, period):
+        surface.blit(scanline, (area.left, y))
+    surface.set_clip(old_clip)
 
 # --- Noise/Grain ---
-def apply_noise(surface, opacity=32):
+def apply_noise(surface, opacity=32, rect=None, ctx=None):
     """
     Overlays random noise (grain) on the surface.
     """
-    arr = np.random.randint(0, 255, (surface.get_height(), surface.get_width()), dtype=np.uint8)
-    noise = pygame.surfarray.make_surface(np.stack([arr]*3, axis=-1))
+    area = surface.get_rect() if rect is None else pygame.Rect(rect).clip(surface.get_rect())
+    if ctx is not None and ctx.size == surface.get_size():
+        noise = ctx.noise_surface()
+    else:
+        arr = np_rng.integers(0, 255, (surface.get_width(), surface.get_height()), dtype=np.uint8)
+        noise = pygame.surfarray.make_surface(np.stack([arr]*3, axis=-1))
     noise.set_alpha(opacity)
-    surface.blit(noise, (0, 0))
+    surface.blit(noise, area, area)
 
 # --- Glow/Bloom ---
-def apply_glow(surface, color, radius=8):
+def apply_glow(surface, color, radius=8, rect=None, ctx=None):
     """
     Simulates phosphor glow by blurring a copy of the surface and tinting it.
     """
-    glow = pygame.transform.smoothscale(surface, (surface.get_width()//2, surface.get_height()//2))
-    glow = pygame.transform.smoothscale(glow, surface.get_size())
+    if rect is not None:
+        surface = surface.subsurface(pygame.Rect(rect).clip(surface.get_rect()))
+    size = surface.get_size()
+    small_size = (max(1, size[0] // 2), max(1, size[1] // 2))
+    if ctx is not None:
+        small = pygame.transform.smoothscale(surface, small_size, ctx.surface('glow_small', small_size))
+        glow = pygame.transform.smoothscale(small, size, ctx.surface('glow', size))
+        tint = ctx.tint_layer(color, size)
+    else:
+        glow = pygame.transform.smoothscale(surface, small_size)
+        glow = pygame.transform.smoothscale(glow, size)
+        tint = pygame.Surface(size, pygame.SRCALPHA)
+        tint.fill(color)
     glow.set_alpha(80)
-    tint = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
-    tint.fill(color)
     glow.blit(tint, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
     surface.blit(glow, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
 
@@ -42,7 +283,7 @@ def jitter_rect(rect, amount=1):
     """
     Returns a new rect with slight horizontal jitter.
     """
-    dx = random.randint(-amount, amount)
+    dx = rng.randint(-amount, amount)
     return rect.move(dx, 0)
 
 # --- Flicker ---
@@ -50,7 +291,22 @@ def flicker_alpha(base_alpha, intensity=0.15):
     """
     Returns a slightly randomized alpha for flicker effect.
     """
-    return max(0, min(255, int(base_alpha * (1.0 + random.uniform(-intensity, intensity)))))
+    return max(0, min(255, int(base_alpha * (1.0 + rng.uniform(-intensity, intensity)))))
+
+GLITCH_CHARSET = string.ascii_letters + string.digits + "!@#$%^&*()_+-=~[]{}|;:',.<>?/\\"
+
+def text_glitch_cells(text, glitch_chance=0.15, charset=None):
+    """
+    Returns a list of (index, char) glyph cells to swap for a glitch effect.
+    Lets renderers patch individual cells of a cached line instead of re-rendering it.
+    """
+    if charset is None:
+        charset = GLITCH_CHARSET
+    cells = []
+    for i, c in enumerate(text):
+        if c != ' ' and rng.random() < glitch_chance:
+            cells.append((i, rng.choice(charset)))
+    return cells
 
 def apply_text_glitch(text, glitch_chance=0.15, charset=None):
     """
@@ -58,14 +314,12 @@ def apply_text_glitch(text, glitch_chance=0.15, charset=None):
     glitch_chance: probability (0-1) that a character is replaced.
     charset: string of possible glitch characters (defaults to ASCII symbols).
     """
-    if charset is None:
-        charset = string.ascii_letters + string.digits + "!@#$%^&*()_+-=~[]{}|;:',.<>?/\\"
-    glitched = []
-    for c in text:
-        if c != ' ' and random.random() < glitch_chance:
-            glitched.append(random.choice(charset))
-        else:
-            glitched.append(c)
+    cells = text_glitch_cells(text, glitch_chance, charset)
+    if not cells:
+        return text
+    glitched = list(text)
+    for i, c in cells:
+        glitched[i] = c
     return ''.join(glitched)
 
 def apply_moving_scanlines(surface, opacity=32, spacing=2, offset_x=0, offset_y=0):
@@ -80,19 +334,688 @@ def apply_moving_scanlines(surface, opacity=32, spacing=2, offset_x=0, offset_y=
         x_offset = int((y + offset_y) * offset_x / (h if h else 1))  # proportional diagonal
         surface.blit(scanline, (x_offset, y + offset_y))
 
-def corrupt_surface(surface, intensity=0.2, block_size=32):
+def corruption_bands(size, intensity=0.2, block_size=32):
+    """
+    Picks the horizontal bands to corrupt as a list of (y, x_shift) pairs.
+    """
+    w, h = size
+    num_blocks = int(h * intensity // block_size)
+    bands = []
+    for _ in range(num_blocks):
+        y = rng.randint(0, max(0, h - block_size))
+        x_shift = rng.randint(-w // 8, w // 8)
+        bands.append((y, x_shift))
+    return bands
+
+def blit_corruption(dest, source, bands, block_size=32):
+    """
+    Blits shifted bands of source onto dest in one batch and returns the damaged rects.
+    """
+    bounds = source.get_rect()
+    w = bounds.width
+    rects = [pygame.Rect(0, y, w, block_size).clip(bounds) for y, _ in bands]
+    dest.blits([(source, (x_shift, y), rect) for (y, x_shift), rect in zip(bands, rects)], doreturn=False)
+    return rects
+
+def corrupt_surface(surface, intensity=0.2, block_size=32, dest=None, bank=None):
     """
     Randomly shifts horizontal bands or blocks of the surface for a corruption effect.
     intensity: 0-1, how many blocks to corrupt.
     block_size: size of each block in pixels.
+    dest: optional surface of the same size to reuse instead of copying.
+    bank: optional CorruptionBank to draw the bands from.
     """
-    w, h = surface.get_size()
-    corrupted = surface.copy()
-    num_blocks = int(h * intensity // block_size)
-    for _ in range(num_blocks):
-        y = random.randint(0, h - block_size)
-        x_shift = random.randint(-w // 8, w // 8)
-        rect = pygame.Rect(0, y, w, block_size)
-        band = surface.subsurface(rect).copy()
-        corrupted.blit(band, (x_shift, y))
-    return corrupted 
\ No newline at end of file
+    if dest is None:
+        corrupted = surface.copy()
+    else:
+        corrupted = dest
+        corrupted.blit(surface, (0, 0))
+    if bank is not None:
+        bands = bank.bands(surface.get_size(), intensity, block_size)
+    else:
+        bands = corruption_bands(surface.get_size(), intensity, block_size)
+    blit_corruption(corrupted, surface, bands, block_size)
+    return corrupted
+
+# --- Post-processing pipeline ---
+def pixel_view(surface):
+    """
+    Returns a zero-copy (h, w, 4) uint8 view of a 32-bit surface's pixels.
+    The surface stays locked until the view is deleted.
+    """
+    if surface.get_bytesize() != 4:
+        raise ValueError("pixel_view needs a 32-bit surface")
+    pixels = pygame.surfarray.pixels2d(surface).T.view(np.uint8)
+    return pixels.reshape(pixels.shape[0], -1, 4)
+
+def channel_index(surface):
+    """
+    Returns the byte offsets of the R, G and B channels within a pixel.
+    """
+    shifts = surface.get_shifts()[:3]
+    if sys.byteorder == 'little':
+        return tuple(shift // 8 for shift in shifts)
+    return tuple(3 - shift // 8 for shift in shifts)
+
+def expand_rect(rect, margin, align, bounds):
+    """
+    Grows rect by margin on every side, out to multiples of align, clipped to bounds.
+    """
+    left = (rect.left - margin) // align * align
+    top = (rect.top - margin) // align * align
+    right = -(-(rect.right + margin) // align) * align
+    bottom = -(-(rect.bottom + margin) // align) * align
+    return pygame.Rect(left, top, right - left, bottom - top).clip(bounds)
+
+
+def merge_rects(rects):
+    """
+    Returns rects with every overlapping group replaced by its union, so no
+    pixel is covered twice.
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+def disjoint_rects(rects):
+    """
+    Returns rects cut into pieces that cover the same pixels, each exactly once.
+    """
+    done = []
+    for rect in rects:
+        pieces = [pygame.Rect(rect)]
+        for other in done:
+            cut = []
+            for piece in pieces:
+                if not piece.colliderect(other):
+                    cut.append(piece)
+                    continue
+                # Keep the bands of piece above, below, left and right of other
+                if piece.top < other.top:
+                    cut.append(pygame.Rect(piece.left, piece.top, piece.width, other.top - piece.top))
+                if other.bottom < piece.bottom:
+                    cut.append(pygame.Rect(piece.left, other.bottom, piece.width, piece.bottom - other.bottom))
+                top, bottom = max(piece.top, other.top), min(piece.bottom, other.bottom)
+                if piece.left < other.left:
+                    cut.append(pygame.Rect(piece.left, top, other.left - piece.left, bottom - top))
+                if other.right < piece.right:
+                    cut.append(pygame.Rect(other.right, top, piece.right - other.right, bottom - top))
+            pieces = cut
+        done.extend(pieces)
+    return done
+
+
+class EffectStage:
+    """
+    Base class for pipeline stages.
+    kind: 'tone' stages contribute a per-row gain or grain and are fused into one pass,
+          'region' stages run over each redrawn region,
+          'frame' stages run once over the whole frame and return the rects they touched.
+    animated: the stage changes the image every frame even if the content did not.
+    blits: the stage works on a subsurface with pygame blitters instead of the pixel view.
+    halo: rows of neighbouring context the stage reads around each row it writes.
+    enabled: the pipeline skips disabled stages (quality governor).
+    active: the stage is mid-way through a timed effect such as a corruption burst.
+    """
+    name = 'stage'
+    kind = 'region'
+    animated = False
+    blits = False  # apply() receives a subsurface instead of the pixel view
+    halo = 0
+    enabled = True
+    active = False
+
+    def prepare(self, pipeline, size):
+        """
+        Picks this frame's random parameters before any region is processed.
+        """
+
+    def apply(self, pipeline, view, y0, x0=0):
+        raise NotImplementedError
+
+class ScanlineStage(EffectStage):
+    name = 'scanlines'
+    kind = 'tone'
+
+    def __init__(self, opacity=32, spacing=2):
+        self.opacity = opacity
+        self.spacing = spacing
+
+    def row_gain(self, gain):
+        period = self.spacing * 2
+        shade = 256 - self.opacity
+        for off in range(self.spacing):
+            gain[off::period] = gain[off::period] * np.uint32(shade) >> 8
+
+class FlickerStage(EffectStage):
+    name = 'flicker'
+    kind = 'tone'
+    animated = True
+
+    def __init__(self, intensity=0.15):
+        self.intensity = intensity
+        self.level = 256
+
+    def prepare(self, pipeline, size):
+        self.level = int(256 * (1.0 - rng.uniform(0, self.intensity)))
+
+    def row_gain(self, gain):
+        gain[:] = gain * np.uint32(self.level) >> 8  # 256 * 256 overflows the uint16 gain
+
+class NoiseStage(EffectStage):
+    name = 'noise'
+    kind = 'tone'
+    animated = True
+
+    def __init__(self, opacity=32, every=1, bank=None):
+        self.opacity = opacity
+        self.every = every  # regenerate the grain every N frames, reusing it in between
+        self.bank = bank    # optional NoiseBank; grain is then read from its tiles
+        self.frame = 0
+        self.size = None
+        self.grain = None
+        self.tiles = None
+
+    def prepare(self, pipeline, size):
+        w, h = size
+        self.frame += 1
+        if self.every > 1 and self.frame % self.every and self.size == size:
+            return
+        self.size = size
+        bank = self.bank
+        if bank is not None and bank.available():
+            opacity = self.opacity
+            self.tiles = bank.derived('grain', lambda gray: np.multiply(
+                np.repeat(gray[..., None], 4, axis=3), opacity, dtype=np.uint16), opacity)
+            bank.shuffle(size)
+            self.grain = None
+            return
+        gray = np.frombuffer(np_rng.bytes(w * h), dtype=np.uint8).reshape(h, w)
+        # Replicate each gray value into all four bytes of a pixel in one packed op
+        packed = pipeline.scratch('grain_packed', (h, w), np.uint32)
+        np.multiply(gray, np.uint32(0x01010101), out=packed, casting='unsafe')
+        self.grain = pipeline.scratch('grain', (h, w, 4), np.uint16)
+        np.multiply(packed.view(np.uint8).reshape(h, w, 4), np.uint16(self.opacity), out=self.grain)
+
+    def row_gain(self, gain):
+        gain[:] = gain * np.uint32(256 - self.opacity) >> 8
+
+    def add_grain(self, out, y0, x0=0):
+        """
+        Adds the grain of the region out covers, at (y0, x0) on the screen, to out.
+        """
+        h, w = out.shape[:2]
+        if self.grain is not None:
+            np.add(out, self.grain[y0:y0 + h, x0:x0 + w], out=out)
+            return
+        tiles = self.tiles
+        for dy, dx, bh, bw, f, sy, sx in self.bank.blocks(y0, x0, h, w):
+            block = out[dy:dy + bh, dx:dx + bw]
+            np.add(block, tiles[f, sy:sy + bh, sx:sx + bw], out=block)
+
+class ToneStage(EffectStage):
+    """
+    Fused scanline/flicker/noise pass: one multiply by a per-row gain plus grain.
+    When nothing affects every row, only the darkened rows are touched.
+    """
+    name = 'tone'
+    kind = 'region'
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.name = '+'.join(stage.name for stage in stages)
+        self.gain = None
+        self.noise = None
+        self.sparse = False
+
+    @property
+    def enabled(self):
+        return any(stage.enabled for stage in self.stages)
+
+    @property
+    def animated(self):
+        return any(stage.animated for stage in self.stages if stage.enabled)
+
+    def prepare(self, pipeline, size):
+        w, h = size
+        self.gain = pipeline.scratch('gain', (h,), np.uint16)
+        self.gain.fill(256)
+        self.noise = None
+        stages = [stage for stage in self.stages if stage.enabled]
+        for stage in stages:
+            stage.prepare(pipeline, size)
+            stage.row_gain(self.gain)
+            if isinstance(stage, NoiseStage):
+                self.noise = stage
+        self.sparse = self.noise is None and not any(isinstance(s, FlickerStage) for s in stages)
+        self.period = next((s.spacing * 2 for s in stages if isinstance(s, ScanlineStage)), 1)
+
+    def apply(self, pipeline, view, y0, x0=0):
+        h, w = view.shape[:2]
+        if self.sparse:
+            # Only scanlines: darken the affected row phases through strided views
+            for phase in range(min(self.period, h)):
+                g = int(self.gain[y0 + phase])
+                if g == 256:
+                    continue
+                rows = view[phase::self.period]
+                tmp = pipeline.scratch('tone_rows', (-(-h // self.period), w, 4), np.uint16)[:rows.shape[0]]
+                np.multiply(rows, np.uint16(g), out=tmp)  # a Python int would multiply in uint8 and wrap
+                np.right_shift(tmp, 8, out=rows, casting='unsafe')
+            return
+        tmp = pipeline.scratch('tone', view.shape, np.uint16)
+        np.multiply(view, self.gain[y0:y0 + h, None, None], out=tmp)
+        if self.noise is not None:
+            self.noise.add_grain(tmp, y0, x0)
+        np.right_shift(tmp, 8, out=view, casting='unsafe')
+
+class GlowStage(EffectStage):
+    """
+    Phosphor bloom: scales the region down, blurs and tints it with NumPy at the
+    reduced resolution, then scales it back up and adds it with a saturating blit.
+    Works on the surface rather than the pixel view because the resampling and the
+    additive blit are done by pygame's blitters.
+    """
+    name = 'glow'
+    blits = True
+
+    def __init__(self, color, radius=8, scale=2):
+        self.color = color
+        self.radius = radius
+        self.scale = scale
+
+    @property
+    def halo(self):
+        return self.scale * (self.passes() + 1)
+
+    def passes(self):
+        return max(1, self.radius // (2 * self.scale))
+
+    def apply(self, pipeline, surface, y0, x0=0, source=None, top=0, left=0):
+        """
+        Adds glow to surface. source, when given, is the unprocessed image around
+        the target: top rows above it and left columns to its left, plus as many
+        below and to the right, so stripes processed in parallel (and damaged
+        regions) blur across their edges without reading any glowed output.
+        """
+        if source is None:
+            source = surface
+        f = self.scale
+        w, h = source.get_size()
+        ws, hs = w // f, h // f
+        if hs < 3 or ws < 3:
+            return
+        small = pipeline.scratch_surface('glow_small', (ws, hs))
+        pygame.transform.scale(source, (ws, hs), small)
+        channels = pipeline.channels
+        planes = pipeline.scratch('glow_planes', (3, hs, ws), np.uint16)
+        blur = pipeline.scratch('glow_blur', (3, hs, ws), np.uint16)
+        packed = pygame.surfarray.pixels2d(small).T
+        word = pipeline.scratch('glow_word', (hs, ws), np.uint32)
+        # Split packed pixels into contiguous R, G, B planes (strided byte access is slow)
+        for plane, byte in zip(planes, channels):
+            np.right_shift(packed, 8 * byte, out=word)
+            np.bitwise_and(word, 0xFF, out=word)
+            np.copyto(plane, word, casting='unsafe')
+        for _ in range(self.passes()):
+            # Separable [1 2 1] / 4 blur, vertically then horizontally
+            np.copyto(blur, planes)
+            mid = blur[:, 1:-1]
+            np.add(planes[:, :-2], planes[:, 2:], out=mid)
+            mid += planes[:, 1:-1]
+            mid += planes[:, 1:-1]
+            np.right_shift(mid, 2, out=mid)
+            np.copyto(planes, blur)
+            mid = planes[:, :, 1:-1]
+            np.add(blur[:, :, :-2], blur[:, :, 2:], out=mid)
+            mid += blur[:, :, 1:-1]
+            mid += blur[:, :, 1:-1]
+            np.right_shift(mid, 2, out=mid)
+        # Tint: per-channel strength from the glow color and its alpha
+        alpha = self.color[3] if len(self.color) > 3 else 80
+        strength = pipeline.scratch('glow_strength', (3, 1, 1), np.uint16)
+        strength[:, 0, 0] = [c * alpha // 255 for c in self.color[:3]]
+        np.multiply(planes, strength, out=planes)
+        np.right_shift(planes, 8, out=planes)
+        packed.fill(0)
+        for plane, byte in zip(planes, channels):
+            np.left_shift(plane, 8 * byte, out=word, dtype=np.uint32)
+            packed |= word
+        del packed  # Unlock the surface!
+        glow = pipeline.scratch_surface('glow', (w, h))
+        pygame.transform.scale(small, (w, h), glow)
+        surface.blit(glow, (0, 0), (left, top, surface.get_width(), surface.get_height()),
+                     special_flags=pygame.BLEND_RGB_ADD)
+
+class CorruptionStage(EffectStage):
+    """
+    Shifts random horizontal bands while a corruption burst is active.
+    """
+    name = 'corruption'
+    kind = 'frame'
+
+    def __init__(self, intensity=0.2, block_size=32, chance=0.0, duration=0.0, bank=None):
+        self.intensity = intensity
+        self.bank = bank  # optional CorruptionBank to draw the bands from
+        self.block_size = block_size
+        self.chance = chance
+        self.duration = duration
+        self.active = False
+        self.end_time = 0.0
+        self.bands = []
+
+    def prepare(self, pipeline, size):
+        now = pipeline.now
+        self.bands = []
+        if not self.active and rng.random() < self.chance:
+            self.active = True
+            self.end_time = now + self.duration
+        if self.active:
+            if self.bank is not None:
+                self.bands = self.bank.bands(size, self.intensity, self.block_size)
+            else:
+                self.bands = corruption_bands(size, self.intensity, self.block_size)
+            if now > self.end_time:
+                self.active = False
+
+    def apply(self, pipeline, view, y0, x0=0):
+        h, w = view.shape[:2]
+        rects = []
+        band = pipeline.scratch('band', (self.block_size, w, 4), np.uint8)
+        for y, x_shift in self.bands:
+            rows = view[y:y + self.block_size]
+            src = band[:rows.shape[0]]
+            np.copyto(src, rows)
+            if x_shift > 0:
+                rows[:, x_shift:] = src[:, :w - x_shift]
+            elif x_shift < 0:
+                rows[:, :w + x_shift] = src[:, -x_shift:]
+            rects.append(pygame.Rect(0, y, w, rows.shape[0]))
+        return rects
+
+class JitterStage(EffectStage):
+    """
+    Shifts the whole frame horizontally by a few random pixels.
+    """
+    name = 'jitter'
+    kind = 'frame'
+    animated = True
+
+    def __init__(self, amount=1, bg=(0, 0, 0)):
+        self.amount = amount
+        self.bg = bg
+        self.dx = 0
+
+    def prepare(self, pipeline, size):
+        self.dx = rng.randint(-self.amount, self.amount)
+
+    def apply(self, pipeline, view, y0, x0=0):
+        h, w = view.shape[:2]
+        dx = max(-w, min(w, self.dx))
+        if dx == 0:
+            return []
+        src = pipeline.scratch('frame', view.shape, np.uint8)
+        np.copyto(src, view)
+        if dx > 0:
+            view[:, dx:] = src[:, :w - dx]
+            edge = view[:, :dx]
+        else:
+            view[:, :w + dx] = src[:, -dx:]
+            edge = view[:, w + dx:]
+        for c, byte in zip(self.bg, pipeline.channels):
+            edge[:, :, byte] = c
+        return [pygame.Rect(0, 0, w, h)]
+
+class WarpStage(EffectStage):
+    """
+    Barrel distortion of the tube face using a remap table built once per size.
+    """
+    name = 'warp'
+    kind = 'frame'
+
+    def __init__(self, amount=0.08, bg=(0, 0, 0)):
+        self.amount = amount
+        self.bg = bg
+        self.size = None
+        self.index = None
+
+    def build(self, size):
+        w, h = size
+        ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+        nx = xs / max(1, w - 1) * 2 - 1
+        ny = ys / max(1, h - 1) * 2 - 1
+        k = 1.0 + self.amount * (nx * nx + ny * ny)
+        sx = np.rint((nx * k + 1) * 0.5 * (w - 1)).astype(np.intp)
+        sy = np.rint((ny * k + 1) * 0.5 * (h - 1)).astype(np.intp)
+        inside = (sx >= 0) & (sx < w) & (sy >= 0) & (sy < h)
+        # Pixels mapped off the tube read a background sentinel stored after the frame
+        self.index = np.where(inside, sy * w + sx, h * w).ravel()  # intp, so take() needs no conversion
+        self.size = size
+
+    def begin(self, pipeline, view):
+        """
+        Snapshots the frame so row stripes can be remapped in parallel.
+        """
+        h, w = view.shape[:2]
+        if self.size != (w, h):
+            self.build((w, h))
+        self.source = pipeline.scratch('warp_src', (h * w + 1, 4), np.uint8)
+        np.copyto(self.source[:-1].reshape(h, w, 4), view)
+        for c, byte in zip(self.bg, pipeline.channels):
+            self.source[-1, byte] = c
+
+    def apply_rows(self, pipeline, view, y0, y1):
+        w = view.shape[1]
+        out = pipeline.scratch('warp_out', ((y1 - y0) * w, 4), np.uint8)
+        np.take(self.source, self.index[y0 * w:y1 * w], axis=0, out=out, mode='clip')  # 'raise' would buffer out
+        np.copyto(view[y0:y1], out.reshape(y1 - y0, w, 4))
+
+    def apply(self, pipeline, view, y0, x0=0):
+        h, w = view.shape[:2]
+        self.begin(pipeline, view)
+        self.apply_rows(pipeline, view, 0, h)
+        return [pygame.Rect(0, 0, w, h)]
+
+class PostProcessPipeline:
+    """
+    Composable CRT post-processing over a zero-copy pixel view of a 32-bit surface.
+    Consecutive tone stages (scanlines, flicker, noise) are fused into a single pass;
+    every stage works in place with scratch arrays reused across frames.
+    workers > 1 splits each pass into horizontal stripes run on a thread pool
+    (NumPy releases the GIL); stripes of stages with a halo read from a snapshot.
+    """
+    stripe_align = 8  # rows; keeps stripe edges on glow/scanline cell boundaries
+
+    def __init__(self, stages=(), ctx=None, workers=0):
+        self.stages = list(stages)
+        self.passes = self.compile(self.stages)
+        self.ctx = ctx if ctx is not None else EffectContext((0, 0))
+        self.local = threading.local()
+        self.channels = (2, 1, 0)
+        self.now = 0.0
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='fx') if workers > 1 else None
+        self.timings = {}  # stage name -> ms spent in the last run
+
+    @property
+    def animated(self):
+        return any(stage.animated for stage in self.passes if stage.enabled)
+
+    @property
+    def halo(self):
+        """
+        How far (px) any enabled stage spreads a change beyond the pixels that changed.
+        """
+        return max((stage.halo for stage in self.passes if stage.enabled), default=0)
+
+    @property
+    def busy(self):
+        """
+        True while any enabled stage changes the image from frame to frame.
+        """
+        return any(stage.animated or stage.active for stage in self.passes if stage.enabled)
+
+    @staticmethod
+    def compile(stages):
+        passes = []
+        tone = []
+        for stage in stages:
+            if stage.kind == 'tone':
+                tone.append(stage)
+                continue
+            if tone:
+                passes.append(ToneStage(tone))
+                tone = []
+            passes.append(stage)
+        if tone:
+            passes.append(ToneStage(tone))
+        return passes
+
+    def scratch(self, name, shape, dtype=np.uint8):
+        """
+        Returns a preallocated scratch array, reallocated only when its shape changes.
+        Scratch storage is per thread so parallel stripes never share buffers.
+        """
+        arrays = self.local.__dict__.setdefault('arrays', {})
+        key = (name, np.dtype(dtype).str)
+        arr = arrays.get(key)
+        if arr is None or arr.shape != tuple(shape):
+            arr = np.empty(shape, dtype=dtype)
+            arrays[key] = arr
+        return arr
+
+    def scratch_surface(self, name, size):
+        """
+        Returns a per-thread 32-bit scratch surface, reallocated only when its size changes.
+        """
+        surfaces = self.local.__dict__.setdefault('surfaces', {})
+        surf = surfaces.get(name)
+        if surf is None or surf.get_size() != tuple(size):
+            surf = pygame.Surface(size, 0, 32)
+            surfaces[name] = surf
+        return surf
+
+    def map_rows(self, fn, top, bottom):
+        """
+        Calls fn(y0, y1) over [top, bottom), in parallel stripes when a pool is configured.
+        """
+        if self.executor is None or bottom - top < self.workers * self.stripe_align * 2:
+            fn(top, bottom)
+            return
+        step = -(-(bottom - top) // self.workers)
+        step += -step % self.stripe_align
+        futures = [self.executor.submit(fn, y, min(bottom, y + step)) for y in range(top, bottom, step)]
+        for future in futures:
+            future.result()
+
+    def run_blits(self, stage, surface, rect, source=None):
+        """
+        Runs a blitting stage over rect. A stage with a halo reads the pixels
+        around rect from source, the unprocessed frame, when one is given, and
+        otherwise from a snapshot of rect so parallel stripes see unglowed rows.
+        """
+        halo = stage.halo
+        if not halo or (source is None and self.executor is None):
+            self.map_rows(lambda y0, y1: stage.apply(self, surface.subsurface(
+                (rect.left, y0, rect.width, y1 - y0)), y0, rect.left), rect.top, rect.bottom)
+            return
+        if source is None:
+            source = self.ctx.surface('halo_source', depth=32)
+            source.blit(surface, rect, rect)
+            context = rect
+        else:
+            context = expand_rect(rect, halo, self.stripe_align, surface.get_rect())
+
+        def stripe(y0, y1):
+            top = max(context.top, y0 - halo)
+            bottom = min(context.bottom, y1 + halo)
+            stage.apply(self, surface.subsurface((rect.left, y0, rect.width, y1 - y0)), y0, rect.left,
+                        source=source.subsurface((context.left, top, context.width, bottom - top)),
+                        top=y0 - top, left=rect.left - context.left)
+        self.map_rows(stripe, rect.top, rect.bottom)
+
+    def run(self, surface, rects=None, now=0.0, source=None):
+        """
+        Processes the given regions of surface (all of it by default); where
+        regions overlap, the pixels are still processed only once.
+        source, if given, holds the frame before processing (the regions of
+        surface are copies of it); stages with a halo read around the regions
+        from it, as long as no earlier stage has changed the pixels.
+        Returns the rects touched by whole-frame stages such as corruption.
+        """
+        size = surface.get_size()
+        bounds = surface.get_rect()
+        self.now = now
+        self.channels = channel_index(surface)
+        self.ctx.resize(size)
+        passes = [stage for stage in self.passes if stage.enabled]
+        for stage in passes:
+            stage.prepare(self, size)
+        if rects is None:
+            rects = [bounds]
+        rects = disjoint_rects(r for r in (pygame.Rect(rect).clip(bounds) for rect in rects) if r.width and r.height)
+        view = None
+        damaged = []
+        timings = {}
+        for stage in passes:
+            start = time.perf_counter()
+            if stage.blits:
+                view = None  # Unlock the surface for blitting
+                for rect in rects:
+                    self.run_blits(stage, surface, rect, source)
+            else:
+                if view is None:
+                    view = pixel_view(surface)
+                if stage.kind == 'frame':
+                    if hasattr(stage, 'apply_rows'):
+                        stage.begin(self, view)
+                        self.map_rows(lambda y0, y1: stage.apply_rows(self, view, y0, y1), 0, size[1])
+                        damaged.append(bounds)
+                    else:
+                        damaged.extend(stage.apply(self, view, 0, 0))
+                else:
+                    for rect in rects:
+                        self.map_rows(lambda y0, y1: stage.apply(
+                            self, view[y0:y1, rect.left:rect.right], y0, rect.left), rect.top, rect.bottom)
+            timings[stage.name] = (time.perf_counter() - start) * 1000
+            source = None  # the pixels no longer match the unprocessed frame
+        self.timings = timings
+        del view  # Unlock the surface!
+        return damaged
+
+class AsyncPostProcessor:
+    """
+    Overlaps post-processing with composition: frame N's effects run on a
+    background thread while the caller composes frame N+1 into another buffer.
+    Adds one frame of latency.
+    """
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='fx-frame')
+        self.pending = None
+
+    def submit(self, surface, rects=None, now=0.0):
+        """
+        Starts processing surface and returns the previous frame as
+        (surface, damaged_rects), or None if there was no previous frame.
+        """
+        done = self.wait()
+        self.pending = (self.executor.submit(self.pipeline.run, surface, rects, now), surface)
+        return done
+
+    def wait(self):
+        """
+        Blocks until the in-flight frame is processed and returns it.
+        """
+        if self.pending is None:
+            return None
+        future, surface = self.pending
+        self.pending = None
+        return surface, future.result()
@@ -0,0 +1,200 @@
+import pygame
+import numpy as np
+from collections import OrderedDict
+from ansi import style_attrs, UNDERLINE, STRIKE
+
+# Printable half of code page 437 (0x20-0xFF), in atlas order
+CP437_CHARS = bytes(range(32, 256)).decode('cp437')
+
+
+class GlyphAtlas:
+    """
+    Holds every CP437 glyph of a monospace font rasterised once, packed into one
+    surface per color. Glyphs are looked up by character and blitted as cells,
+    or composed into palette-indexed lines from their coverage (compose).
+    """
+    def __init__(self, font, chars=CP437_CHARS, max_atlases=8):
+        self.font = font
+        self.cell_w, self.cell_h = font.size('W')
+        self.chars = chars
+        self.index = {c: i for i, c in enumerate(chars)}
+        # Master atlas is rendered in white so colored atlases can be derived
+        # by tinting instead of rasterising the font again.
+        self.master = pygame.Surface((self.cell_w * len(chars), self.cell_h), pygame.SRCALPHA)
+        for i, c in enumerate(chars):
+            self.master.blit(font.render(c, True, (255, 255, 255)), (i * self.cell_w, 0))
+        self.atlases = {}
+        self.max_atlases = max_atlases  # colors past these are tinted a cell at a time
+        self.extra = {}
+        # Coverage (alpha) of each glyph cell, for palette-indexed lines; lut maps a
+        # CP437 byte and cells a character to its index in coverage
+        self.coverage = pygame.surfarray.array_alpha(self.master).reshape(len(chars), self.cell_w, self.cell_h)
+        self.quantized = {}
+        self.cells = dict(self.index)
+        self.lut = np.full(256, self.index.get(' ', 0), np.intp)
+        for i, c in enumerate(chars):
+            code = c.encode('cp437', 'ignore')
+            if len(code) == 1:
+                self.lut[code[0]] = i
+
+    def atlas(self, color):
+        """
+        Returns the atlas surface for a color, tinting the master on first use.
+        """
+        color = tuple(color[:3])
+        surf = self.atlases.get(color)
+        if surf is None:
+            surf = self.master.copy()
+            surf.fill(color + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+            self.atlases[color] = surf
+        return surf
+
+    def blit_glyph(self, dest, char, color, pos):
+        """
+        Blits a single glyph cell at pos. Characters outside the atlas are
+        rendered once per color and kept separately.
+        """
+        i = self.index.get(char)
+        if i is not None:
+            area = (i * self.cell_w, 0, self.cell_w, self.cell_h)
+            atlas = self.atlases.get(tuple(color[:3]))
+            if atlas is None and len(self.atlases) < self.max_atlases:
+                atlas = self.atlas(color)
+            if atlas is not None:
+                dest.blit(atlas, pos, area)
+                return
+            # Styled text has too many colors to keep an atlas of each
+            cell = self.master.subsurface(area).copy()
+            cell.fill(tuple(color[:3]) + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+            dest.blit(cell, pos)
+            return
+        key = (char, tuple(color[:3]))
+        surf = self.extra.get(key)
+        if surf is None:
+            surf = self.font.render(char, True, color)
+            self.extra[key] = surf
+        dest.blit(surf, pos)
+
+    # --- Palette-indexed lines ---
+    def cell(self, char):
+        """
+        Returns the coverage index of a character, rasterising characters outside
+        the atlas once on first use.
+        """
+        i = self.cells.get(char)
+        if i is None:
+            alpha = pygame.surfarray.array_alpha(self.font.render(char, True, (255, 255, 255)))
+            cell = np.zeros((1, self.cell_w, self.cell_h), np.uint8)
+            w, h = min(self.cell_w, alpha.shape[0]), min(self.cell_h, alpha.shape[1])
+            cell[0, :w, :h] = alpha[:w, :h]
+            self.coverage = np.concatenate((self.coverage, cell))
+            self.quantized.clear()
+            i = self.cells[char] = len(self.coverage) - 1
+        return i
+
+    def levels(self, levels):
+        """
+        Returns the glyph coverage quantized to levels shades, for every palette
+        slot: [slot, glyph] holds slot * levels + the shade (0 to levels - 1).
+        """
+        q = self.quantized.get(levels)
+        if q is None:
+            shades = ((self.coverage.astype(np.uint16) * (levels - 1) + 127) // 255).astype(np.uint8)
+            base = np.arange(0, 256, levels, dtype=np.uint8)
+            q = shades[None] + base[:, None, None, None]
+            self.quantized[levels] = q
+        return q
+
+    def compose(self, text, runs=None):
+        """
+        Builds a line as an 8-bit surface of palette indices rather than colors:
+        each style of the line gets a slot of levels entries, and a pixel holds
+        slot * levels + its glyph coverage shade. The surface is drawn once the
+        caller sets its palette from the slots' styles (ansi.Palette.colors), so
+        recoloring a line is a palette swap. The whole line is filled by one array
+        operation, however many style runs it has.
+        Returns (surface, styles, levels).
+        """
+        cw, ch = self.cell_w, self.cell_h
+        n = max(1, len(text))
+        try:
+            ids = self.lut[np.frombuffer(text.encode('cp437'), np.uint8)]
+        except UnicodeEncodeError:
+            ids = np.array([self.cell(c) for c in text], np.intp)
+        if runs is None:
+            styles = (0,)
+            slots = None
+        else:
+            styles = tuple(dict.fromkeys(runs[2::3]))
+            slot_of = {style: i for i, style in enumerate(styles)}
+            slots = np.repeat([slot_of[s] for s in runs[2::3]], np.array(runs[1::3], np.intp))
+        levels = 16
+        while levels > 2 and len(styles) * levels > 256:
+            levels //= 2
+        if slots is not None and len(styles) * levels > 256:
+            slots = np.minimum(slots, 256 // levels - 1)  # more styles than slots: the last ones share one
+        if not len(ids):
+            pixels = np.zeros((n, cw, ch), np.uint8)
+        elif slots is None:
+            pixels = self.levels(levels)[0][ids]
+        else:
+            # One gather picks every cell's glyph in its style's slot
+            pixels = self.levels(levels)[slots, ids]
+            for i in range(0, len(runs), 3):
+                attrs = style_attrs(runs[i + 2])
+                if attrs & (UNDERLINE | STRIKE):
+                    cells = slice(runs[i], runs[i] + runs[i + 1])
+                    top = slots[runs[i]] * levels + levels - 1
+                    if attrs & UNDERLINE:
+                        pixels[cells, :, ch - 2] = top
+                    if attrs & STRIKE:
+                        pixels[cells, :, ch // 2] = top
+        surf = pygame.Surface((n * cw, ch), 0, 8)
+        pygame.surfarray.blit_array(surf, pixels.reshape(n * cw, ch))
+        return surf, styles, levels
+
+
+class LineCache:
+    """
+    LRU cache of composed line surfaces keyed by (text, runs), bounded by the
+    approximate pixel memory of the cached surfaces. Lines are cached as
+    palette indices, so the same entry serves every color scheme: a hit under
+    a new palette only has its surface's palette replaced.
+    """
+    def __init__(self, atlas, max_bytes=16 * 1024 * 1024):
+        self.atlas = atlas
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.lines = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, runs, palette):
+        """
+        Returns the cached surface for a line colored by palette, composing it on
+        a miss. Returns None for empty lines so callers can skip the blit.
+        """
+        if not text or (runs is None and text.isspace()):
+            return None
+        key = (text, None if runs is None else runs.tobytes())
+        entry = self.lines.get(key)
+        if entry is not None:
+            self.lines.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = [*self.atlas.compose(text, runs), None]
+            self.lines[key] = entry
+            self.bytes += entry[0].get_width() * entry[0].get_height()
+            while self.bytes > self.max_bytes and len(self.lines) > 1:
+                _, old = self.lines.popitem(last=False)
+                self.bytes -= old[0].get_width() * old[0].get_height()
+        surf, styles, levels, colored = entry
+        if colored != palette.key:
+            surf.set_palette(palette.colors(styles, levels))
+            entry[3] = palette.key
+        return surf
+
+    def clear(self):
+        self.lines.clear()
+        self.bytes = 0
@@ -0,0 +1,84 @@
+from effects import GlowStage, NoiseStage, CorruptionStage, WarpStage, JitterStage
+
+
+class QualityGovernor:
+    """
+    Trades CRT effect quality for frame rate. Frame times are collected over a
+    window of frames; when the slowest tenth misses the frame budget quality drops
+    one step, and after several windows in a row with clear headroom it climbs
+    back one step. Steps are cumulative:
+      1  glow at half its usual resolution
+      2  noise grain refreshed every noise_every frames
+      3  corruption bursts skipped
+      4  glow off
+      5  warp and jitter off
+    """
+    STEPS = ('glow-lowres', 'noise-slow', 'no-corruption', 'no-glow', 'no-warp')
+
+    def __init__(self, pipeline, target_fps=60, window=30, headroom=0.6, calm_windows=3, noise_every=3):
+        self.budget = 1000.0 / target_fps
+        self.window = window
+        self.headroom = headroom          # fraction of the budget that counts as headroom
+        self.calm_windows = calm_windows  # windows with headroom needed to restore a step
+        self.noise_every = noise_every
+        self.samples = []
+        self.calm = 0
+        self.level = 0
+        self.pipeline = None
+        self.glow_scales = {}
+        self.attach(pipeline)
+
+    def attach(self, pipeline):
+        """
+        Governs a (re)built pipeline, applying the current quality level to it.
+        """
+        self.pipeline = pipeline
+        self.glow_scales = {id(stage): stage.scale for stage in pipeline.stages if isinstance(stage, GlowStage)}
+        self.apply()
+
+    @property
+    def step(self):
+        return self.STEPS[self.level - 1] if self.level else 'full'
+
+    def observe(self, frame_ms):
+        """
+        Records the time spent on one frame and adjusts quality once per window.
+        """
+        samples = self.samples
+        samples.append(frame_ms)
+        if len(samples) < self.window:
+            return
+        samples.sort()
+        slow = samples[len(samples) * 9 // 10]
+        samples.clear()
+        if slow > self.budget:
+            self.calm = 0
+            if self.level < len(self.STEPS):
+                self.set_level(self.level + 1)
+        elif slow < self.budget * self.headroom and self.level:
+            self.calm += 1
+            if self.calm >= self.calm_windows:
+                self.calm = 0
+                self.set_level(self.level - 1)
+        else:
+            self.calm = 0
+
+    def set_level(self, level):
+        self.level = max(0, min(len(self.STEPS), level))
+        self.apply()
+
+    def apply(self):
+        level = self.level
+        for stage in self.pipeline.stages:
+            if isinstance(stage, GlowStage):
+                scale = self.glow_scales.get(id(stage), stage.scale)
+                stage.scale = scale * 2 if level >= 1 else scale
+                stage.enabled = level < 4
+            elif isinstance(stage, NoiseStage):
+                stage.every = self.noise_every if level >= 2 else 1
+            elif isinstance(stage, CorruptionStage):
+                stage.enabled = level < 3
+                if not stage.enabled:
+                    stage.active = False
+            elif isinstance(stage, (WarpStage, JitterStage)):
+                stage.enabled = level < 5
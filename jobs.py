@@ -0,0 +1,173 @@
+import time
+import queue
+import asyncio
+import inspect
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class Job:
+    """
+    A command running in the background. Output is streamed through the runner.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, line, on_done=None, buffer_lines=1000, origin=None):
+        self.id = next(Job._ids)
+        self.line = line
+        self.on_done = on_done
+        self.origin = origin  # history index of the command's echo, if it was echoed
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()  # set once the command stops producing
+        self.done = False
+        # Bounded so fast producers block instead of buffering unbounded output
+        self.output = queue.Queue(buffer_lines)
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class CommandRunner:
+    """
+    Runs CommandHandler commands on worker threads so the render loop never blocks.
+    Commands may return a string, a list, a generator or an async iterator; lines are
+    queued per job as they are produced and drained by poll() within a per-frame budget.
+    """
+    def __init__(self, handler, workers=4, delay=0.0, buffer_lines=1000):
+        self.handler = handler
+        self.delay = delay  # Simulated command delay (seconds), waited off the render thread
+        self.buffer_lines = buffer_lines
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='cmd')
+        self.jobs = []
+
+    def submit(self, line, on_done=None, origin=None):
+        """
+        Starts a command and returns its Job. on_done runs on the polling thread;
+        origin is the history index where the command was echoed.
+        """
+        job = Job(line, on_done, self.buffer_lines, origin)
+        self.jobs.append(job)
+        self.executor.submit(self._run, job)
+        return job
+
+    def cancel(self):
+        """
+        Cancels every job in flight. Returns the number of jobs cancelled.
+        """
+        jobs = [job for job in self.jobs if not job.done]
+        for job in jobs:
+            job.cancel()
+        return len(jobs)
+
+    @property
+    def busy(self):
+        return any(not job.done for job in self.jobs)
+
+    def _put(self, job, item):
+        """
+        Blocks while the job's buffer is full, giving up if the job is cancelled.
+        """
+        while not job.cancelled.is_set():
+            try:
+                job.output.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _emit(self, job, output):
+        if isinstance(output, str):
+            output = output.split('\n')
+        for item in output:
+            # An item may hold several lines; each is a line of history (and of the archive)
+            for line in str(item).split('\n'):
+                if not self._put(job, line):
+                    if hasattr(output, 'close'):
+                        output.close()
+                    return
+
+    async def _emit_async(self, job, output):
+        if inspect.isawaitable(output):
+            output = await output
+            if output is not None and not hasattr(output, '__aiter__'):
+                self._emit(job, output)
+                return
+        async for item in output:
+            for line in str(item).split('\n'):
+                while True:
+                    if job.cancelled.is_set():
+                        if hasattr(output, 'aclose'):
+                            await output.aclose()
+                        return
+                    try:
+                        job.output.put_nowait(line)
+                        break
+                    except queue.Full:
+                        await asyncio.sleep(0.01)
+
+    def _run(self, job):
+        try:
+            if self.delay and job.cancelled.wait(self.delay):
+                return
+            output = self.handler.handle(job.line, job.origin)
+            if inspect.isawaitable(output) or hasattr(output, '__aiter__'):
+                asyncio.run(self._emit_async(job, output))
+            elif output is not None:
+                self._emit(job, output)
+        except Exception as e:
+            self._put(job, f"Error: {e}")
+        finally:
+            self._put(job, _DONE)
+            job.finished.set()
+            if job.cancelled.is_set():
+                job.done = True
+
+    def settle(self, timeout=5.0):
+        """
+        Waits until every job has finished or filled its buffer, so what the next
+        poll() returns no longer depends on thread timing (recordings use this).
+        """
+        deadline = time.monotonic() + timeout
+        for job in list(self.jobs):
+            while not job.finished.is_set() and not job.output.full() and time.monotonic() < deadline:
+                job.finished.wait(0.001)
+
+    def poll(self, budget=None):
+        """
+        Drains queued output, at most budget lines in total, sharing the budget
+        round-robin between jobs. Returns the lines to display.
+        """
+        lines = []
+        active = list(self.jobs)
+        while active and (budget is None or len(lines) < budget):
+            for job in list(active):
+                try:
+                    item = job.output.get_nowait()
+                except queue.Empty:
+                    active.remove(job)
+                    continue
+                if item is _DONE:
+                    active.remove(job)
+                    self._finish(job)
+                elif not job.cancelled.is_set():
+                    lines.append(item)
+                if budget is not None and len(lines) >= budget:
+                    break
+        # Cancelled jobs may never get to queue their end marker
+        for job in [job for job in self.jobs if job.done]:
+            self.jobs.remove(job)
+        return lines
+
+    def _finish(self, job):
+        job.done = True
+        if job in self.jobs:
+            self.jobs.remove(job)
+        if job.on_done is not None and not job.cancelled.is_set():
+            job.on_done(job)
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+
+class LineLayout:
+    """
+    Soft-wraps history lines to the window width. The DOS font is monospace and
+    every glyph occupies one cell, so a line's layout follows from its length and
+    the column count alone; no glyph is ever measured.
+    Wrapped row counts are memoized per line index, so moving the view by a visual
+    row is O(1). A resize only drops the memo: lines are relaid lazily as they are
+    scrolled into view, never by reflowing the whole history.
+    """
+    def __init__(self, cell_w, text_at, max_lines=65536):
+        self.cell_w = cell_w
+        self.text_at = text_at      # callable returning the text of a history line
+        self.cols = 1
+        self.counts = OrderedDict()  # line index -> wrapped rows at self.cols
+        self.max_lines = max_lines
+
+    def resize(self, width):
+        """
+        Sets the wrap width in pixels. Returns True if the column count changed.
+        """
+        cols = max(1, width // self.cell_w)
+        if cols == self.cols:
+            return False
+        self.cols = cols
+        self.counts.clear()
+        return True
+
+    def wrap(self, text):
+        """
+        Splits text into rows of at most cols characters (an empty line is one row).
+        """
+        cols = self.cols
+        if len(text) <= cols:
+            return [text]
+        return [text[i:i + cols] for i in range(0, len(text), cols)]
+
+    def count(self, text):
+        return max(1, -(-len(text) // self.cols))
+
+    def rows(self, index):
+        """
+        Returns the memoized wrapped row count of a history line.
+        """
+        n = self.counts.get(index)
+        if n is None:
+            n = self.count(self.text_at(index))
+            self.counts[index] = n
+            if len(self.counts) > self.max_lines:
+                self.counts.popitem(last=False)
+        return n
+
+    # --- View positions: (line index, wrapped row within that line) ---
+    def back(self, pos, n, first=0):
+        """
+        Moves a position n visual rows towards older lines, stopping at line first.
+        """
+        line, row = pos
+        while n > 0:
+            if row >= n:
+                return line, row - n
+            n -= row + 1
+            if line <= first:
+                return first, 0
+            line -= 1
+            row = self.rows(line) - 1
+        return line, row
+
+    def forward(self, pos, n, total):
+        """
+        Moves a position n visual rows towards newer lines, stopping at the last
+        row of line total - 1.
+        """
+        line, row = pos
+        while n > 0:
+            last = self.rows(line) - 1
+            if row + n <= last:
+                return line, row + n
+            n -= last - row + 1
+            if line >= total - 1:
+                return line, last
+            line += 1
+            row = 0
+        return line, row
+
+    def clamp(self, pos):
+        """
+        Keeps a position inside its line after the column count changed.
+        """
+        line, row = pos
+        return line, min(row, self.rows(line) - 1)
@@ -0,0 +1,39 @@
+from functools import partial
+from config import COLOR_PRESETS
+from effects import text_glitch_cells
+from ansi import Palette
+
+
+def no_cells(text):
+    return ()
+
+
+class RenderPlan:
+    """
+    What the frame loop needs from the runtime settings, worked out once per
+    change: the palette, the ANSI color palette, the effect pipeline, per-row
+    text effects as plain callables, and frame pacing. Drawing code reads
+    these fields and never looks at the settings or config.py itself.
+    """
+    def __init__(self, values, pipeline):
+        self.colors = COLOR_PRESETS[values['color_scheme']]
+        self.bg = self.colors['bg']
+        self.text = self.colors['text']
+        self.border = tuple(c // 3 for c in self.text[:3])
+        # Colors of styled (ANSI) text; cached lines are recolored from it, not recomposed
+        self.palette = Palette(self.colors)
+        self.pipeline = pipeline
+        self.render_mode = values['render_mode']
+        # Whole frames are post-processed when the mode asks for it or effects animate everything
+        self.full_frame = values['render_mode'] != 'damage' or pipeline.animated
+        if values['glitchy_text'] and values['glitch_chance'] > 0:
+            self.glitch_cells = partial(text_glitch_cells, glitch_chance=values['glitch_chance'])
+        else:
+            self.glitch_cells = no_cells
+        self.flicker_rows = values['enable_flicker']
+        self.flicker_intensity = values['flicker_intensity']
+        self.text_speed = values['text_speed']
+        self.target_fps = values['target_fps']
+        self.budget_ms = 1000.0 / values['target_fps']
+        self.idle_wait_ms = 1000 // values['idle_fps']
+        self.idle_delay_ms = values['idle_delay'] * 1000
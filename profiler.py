@@ -0,0 +1,203 @@
+import time
+import pygame
+from array import array
+
+# Bucket edges (ms) of the frame time histograms
+HISTOGRAM_EDGES = (1, 2, 4, 8, 16.7, 33.3, 66.7)
+
+
+class FrameProfiler:
+    """
+    Times the phases of each frame with the monotonic high-resolution
+    time.perf_counter and keeps the last `frames` samples of every section in
+    rolling buffers. Phases are timed as laps: each lap() charges the time since
+    the previous one to a section, so instrumenting a loop costs one call per phase.
+    When disabled every call returns straight away.
+    """
+    def __init__(self, frames=240, enabled=False):
+        self.enabled = enabled
+        self.hud = False
+        self.frames = frames
+        self.samples = {}   # section -> ring of ms per frame
+        self.current = {}   # section -> ms so far this frame
+        self.index = 0      # ring slot of the frame being recorded
+        self.count = 0      # frames recorded, at most self.frames
+        self.frame_start = 0.0
+        self.mark = 0.0
+
+    # --- Recording ---
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start:
+            # Start to start, so the frame limiter's sleep counts towards the frame rate
+            self.current['interval'] = (now - self.frame_start) * 1000
+        self.frame_start = self.mark = now
+
+    def lap(self, name):
+        """
+        Charges the time since the previous lap (or the frame start) to a section.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.mark) * 1000
+        self.mark = now
+
+    def add(self, name, ms):
+        """
+        Charges time measured elsewhere (e.g. pipeline stage timings) to a section.
+        """
+        if not self.enabled:
+            return
+        self.current[name] = self.current.get(name, 0.0) + ms
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        current = self.current
+        current['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        for name in current:
+            if name not in self.samples:
+                self.samples[name] = array('d', bytes(8 * self.frames))
+        for name, ring in self.samples.items():
+            ring[self.index] = current.get(name, 0.0)
+        current.clear()
+        self.index = (self.index + 1) % self.frames
+        self.count = min(self.count + 1, self.frames)
+
+    def reset(self):
+        # Rebound rather than cleared: the 'perf' command may reset from a worker thread
+        self.samples = {}
+        self.current = {}
+        self.index = 0
+        self.count = 0
+        self.frame_start = 0.0
+
+    # --- Statistics ---
+    def sections(self):
+        """
+        Returns the names of the timed phases in the order they were first seen.
+        """
+        return [name for name in list(self.samples) if name not in ('frame', 'interval')]
+
+    def series(self, name):
+        """
+        Returns the recorded samples of a section, oldest first.
+        """
+        ring = self.samples.get(name)
+        if ring is None or not self.count:
+            return []
+        if self.count < self.frames:
+            return ring[:self.count].tolist()
+        return (ring[self.index:] + ring[:self.index]).tolist()
+
+    def stats(self, name):
+        """
+        Returns mean, p50, p99 and max in ms over the rolling window of a section.
+        """
+        values = sorted(self.series(name))
+        if not values:
+            return {'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        n = len(values)
+        return {
+            'mean': sum(values) / n,
+            'p50': values[n // 2],
+            'p99': values[min(n - 1, int(n * 0.99))],
+            'max': values[-1],
+        }
+
+    def histogram(self, name, edges=HISTOGRAM_EDGES):
+        """
+        Returns how many frames fell in each bucket: below edges[0], between
+        consecutive edges, and above the last edge.
+        """
+        counts = [0] * (len(edges) + 1)
+        for value in self.series(name):
+            bucket = 0
+            while bucket < len(edges) and value >= edges[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def fps(self):
+        mean = self.stats('interval')['mean']
+        return 1000.0 / mean if mean else 0.0
+
+    def report(self):
+        """
+        Returns the rolling statistics as lines of text.
+        """
+        if not self.count:
+            return ["No frames profiled yet. Use 'perf on' to start profiling."]
+        frame = self.stats('frame')
+        lines = [
+            f"Last {self.count} frames: {self.fps():.1f} FPS, frame p50 {frame['p50']:.2f} ms, "
+            f"p99 {frame['p99']:.2f} ms, max {frame['max']:.2f} ms",
+            f"  {'section':<20}{'mean':>8}{'p50':>8}{'p99':>8}{'max':>8}  (ms)",
+        ]
+        for name in self.sections():
+            s = self.stats(name)
+            lines.append(f"  {name:<20}{s['mean']:>8.2f}{s['p50']:>8.2f}{s['p99']:>8.2f}{s['max']:>8.2f}")
+        labels = ['<1'] + [f"<{e:g}" for e in HISTOGRAM_EDGES[1:]] + [f">={HISTOGRAM_EDGES[-1]:g}"]
+        counts = self.histogram('frame')
+        lines.append("  frame histogram: " + "  ".join(f"{label}: {n}" for label, n in zip(labels, counts)))
+        return lines
+
+
+class PerfHud:
+    """
+    On-screen overlay with FPS, a frame time graph and per-section bars.
+    Drawn straight to the screen after post-processing so it stays readable.
+    """
+    width = 360
+    graph_h = 60
+
+    def __init__(self, font, budget_ms=1000.0 / 60):
+        self.font = font
+        self.budget_ms = budget_ms  # frame time at the target frame rate
+        self.line_h = self.font.get_height() + 2
+        self.panel = None
+
+    def rect(self, profiler, screen_size):
+        rows = 1 + len(profiler.sections())
+        height = 8 + self.line_h * rows + self.graph_h + 12
+        return pygame.Rect(screen_size[0] - self.width - 8, 8, self.width, height)
+
+    def draw(self, surface, profiler, color):
+        """
+        Draws the overlay at the top right of surface and returns its rect.
+        """
+        rect = self.rect(profiler, surface.get_size())
+        if self.panel is None or self.panel.get_size() != rect.size:
+            self.panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        panel = self.panel
+        panel.fill((0, 0, 0, 190))
+        color = tuple(color[:3])
+        dim = tuple(c // 3 for c in color)
+        frame = profiler.stats('frame')
+        header = f"{profiler.fps():5.1f} FPS  {frame['mean']:5.2f} ms  p99 {frame['p99']:5.2f}"
+        panel.blit(self.font.render(header, True, color), (6, 4))
+        # Frame time graph, scaled so the top is two frame budgets
+        top = 8 + self.line_h
+        bottom = top + self.graph_h
+        scale = self.graph_h / (self.budget_ms * 2)
+        series = profiler.series('frame')[-(self.width - 12):]
+        for x, ms in enumerate(series):
+            bar = min(self.graph_h, int(ms * scale))
+            panel.fill(color if ms <= self.budget_ms else (255, 80, 80), (6 + x, bottom - bar, 1, bar))
+        budget_y = bottom - int(self.budget_ms * scale)
+        panel.fill(dim, (6, budget_y, self.width - 12, 1))
+        # Per-section mean time bars, full width being one frame budget
+        y = bottom + 6
+        bar_x = 150
+        for name in profiler.sections():
+            ms = profiler.stats(name)['mean']
+            panel.blit(self.font.render(f"{name[:14]:<14}{ms:6.2f}", True, color), (6, y))
+            bar = min(self.width - bar_x - 6, int(ms / self.budget_ms * (self.width - bar_x - 6)))
+            panel.fill(dim, (bar_x, y + 3, self.width - bar_x - 6, self.line_h - 6))
+            panel.fill(color, (bar_x, y + 3, bar, self.line_h - 6))
+            y += self.line_h
+        surface.blit(panel, rect)
+        return rect
@@ -0,0 +1,235 @@
+"""
+Deterministic offscreen recordings of the terminal and the splash screens.
+
+Frames are rendered as fast as the machine allows against a virtual clock, with
+every random effect drawn from a seeded generator, so the same seed and input
+script give the same frames on every run. Frames stream through a bounded
+background writer to ffmpeg (video or GIF) or to numbered frame files:
+
+    python recorder.py terminal demo.mp4 --seconds 12 --type help --type access
+    python recorder.py splash splash.gif --seed 7
+    python recorder.py terminal frames/ --format raw
+"""
+import os
+import sys
+import queue
+import shutil
+import argparse
+import threading
+import subprocess
+import pygame
+from config import RECORD_FPS, RECORD_QUEUE_FRAMES, RECORD_SEED, COLOR_PRESETS, COLOR_SCHEME, FONT_NAME, FONT_SIZE
+from effects import seed_effects
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.webm', '.gif')
+
+
+# --- Frame sinks ---
+class FrameFiles:
+    """
+    Writes each frame to a numbered file in a directory: PNG, or raw RGB24 bytes
+    (size and frame rate go in frames.txt for the tools reading them back).
+    """
+    def __init__(self, directory, size, fps, fmt='png'):
+        self.directory = directory
+        self.size = size
+        self.fmt = fmt
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'frames.txt'), 'w') as f:
+            f.write(f"{size[0]}x{size[1]} rgb24 {fps} fps\n")
+
+    def write(self, data):
+        path = os.path.join(self.directory, f'frame_{self.count:06d}.{self.fmt}')
+        if self.fmt == 'png':
+            pygame.image.save(pygame.image.frombuffer(data, self.size, 'RGB'), path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(data)
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class Encoder:
+    """
+    Pipes raw RGB24 frames into ffmpeg, which encodes them by the output's
+    extension (GIFs get a generated palette).
+    """
+    def __init__(self, path, size, fps, ffmpeg='ffmpeg'):
+        binary = shutil.which(ffmpeg)
+        if binary is None:
+            raise RuntimeError(f"{ffmpeg} not found; record to a directory of frames instead")
+        args = [binary, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                '-s', f'{size[0]}x{size[1]}', '-r', str(fps), '-i', '-']
+        if path.endswith('.gif'):
+            args += ['-vf', 'split[a][b];[a]palettegen[p];[b][p]paletteuse']
+        else:
+            args += ['-pix_fmt', 'yuv420p']
+        self.process = subprocess.Popen(args + [path], stdin=subprocess.PIPE)
+
+    def write(self, data):
+        self.process.stdin.write(data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {self.process.returncode}")
+
+
+def open_sink(path, size, fps, fmt='png'):
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        return Encoder(path, size, fps)
+    return FrameFiles(path, size, fps, fmt)
+
+
+class FrameWriter:
+    """
+    Hands frames to a sink on a background thread. At most queue_frames frames
+    wait in between: once the sink falls that far behind, write() blocks, so a
+    long recording never piles up in memory.
+    """
+    def __init__(self, sink, queue_frames=RECORD_QUEUE_FRAMES):
+        self.sink = sink
+        self.queue = queue.Queue(queue_frames)
+        self.frames = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.drain, name='frame-writer', daemon=True)
+        self.thread.start()
+
+    def write(self, surface):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(pygame.image.tobytes(surface, 'RGB'))
+        self.frames += 1
+
+    def drain(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            if self.error is None:
+                try:
+                    self.sink.write(data)
+                except Exception as e:
+                    self.error = e  # Reported by the next write() or close()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+
+# --- Input scripts ---
+def typed(commands, start=0.5, gap=1.5, cps=20):
+    """
+    Returns [(seconds, event)] typing each command at cps characters per second
+    and pressing Enter, waiting gap seconds before the next one.
+    """
+    events = []
+    t = start
+    for command in commands:
+        for c in command:
+            events.append((t, pygame.event.Event(pygame.TEXTINPUT, text=c)))
+            t += 1.0 / cps
+        events.append((t, pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, mod=0, unicode='\r')))
+        t += gap
+    return events
+
+
+def offscreen(size):
+    """
+    Returns a 32-bit surface to render into; a (hidden, with the dummy driver)
+    display mode is set first since loading assets needs one.
+    """
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    return pygame.Surface(size, 0, 32)
+
+
+# --- Recordings ---
+def record_terminal(writer, seconds, fps=RECORD_FPS, seed=RECORD_SEED, events=(), size=(960, 600)):
+    """
+    Records a terminal session of seconds length, replaying events, a list of
+    (seconds, pygame event) as made by typed(). Commands run on their worker
+    threads, but every frame waits for them to settle, so output lands on the
+    same frames each run.
+    """
+    from terminal import Terminal
+    seed_effects(seed)
+    term = Terminal(screen=offscreen(size), archive_dir=None)
+    frame = 0
+    term.ticks = lambda: frame * 1000 // fps
+    term.governor = None  # quality must not follow this machine's speed
+    term.noise_bank.build()
+    term.sim_delay = 0
+    for session in term.sessions:
+        session.runner.delay = 0
+    term.add_output("CYBERPUNK RED TERMINAL ONLINE.")
+    term.add_output("Type 'help' for commands.")
+    pending = sorted(events, key=lambda e: e[0])
+    pygame.event.clear()
+    try:
+        for frame in range(int(seconds * fps)):
+            now = frame / fps
+            while pending and pending[0][0] <= now:
+                pygame.event.post(pending.pop(0)[1])
+            term.handle_events()
+            for session in term.sessions:
+                session.runner.settle()
+            term.update()
+            term.draw()
+            writer.write(term.screen)
+            if not term.running:
+                break
+    finally:
+        term.close()
+
+
+def record_splash(writer, fps=RECORD_FPS, seed=RECORD_SEED, size=(960, 600), intro_duration=2.8):
+    """
+    Records the logo intro followed by the boot sequence.
+    """
+    from splash import SplashScreen
+    seed_effects(seed)
+    screen = offscreen(size)
+    splash = SplashScreen(screen, pygame.font.Font(FONT_NAME, FONT_SIZE), COLOR_PRESETS[COLOR_SCHEME])
+    for timeline in (splash.logo_timeline(splash.load_logo(), intro_duration), splash.boot_timeline()):
+        for i in range(int(timeline.duration * fps)):
+            timeline.frame(screen, i / fps)
+            writer.write(screen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('what', choices=('terminal', 'splash'))
+    parser.add_argument('out', help='video or GIF file (needs ffmpeg), or a directory for frame files')
+    parser.add_argument('--seed', type=int, default=RECORD_SEED)
+    parser.add_argument('--fps', type=int, default=RECORD_FPS)
+    parser.add_argument('--size', default='960x600')
+    parser.add_argument('--seconds', type=float, default=10.0, help='terminal recording length')
+    parser.add_argument('--type', action='append', default=[], help='command to type (repeatable)')
+    parser.add_argument('--format', choices=('png', 'raw'), default='png', help='frame file format')
+    args = parser.parse_args()
+    size = tuple(int(n) for n in args.size.split('x'))
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    writer = FrameWriter(open_sink(args.out, size, args.fps, args.format))
+    try:
+        if args.what == 'terminal':
+            record_terminal(writer, args.seconds, args.fps, args.seed, typed(args.type), size)
+        else:
+            record_splash(writer, args.fps, args.seed, size)
+    finally:
+        writer.close()
+        pygame.quit()
+    print(f"Wrote {writer.frames} frames to {args.out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
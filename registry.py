@@ -0,0 +1,316 @@
+import os
+import ast
+import sys
+import json
+import argparse
+import threading
+import importlib
+import importlib.util
+from importlib import metadata
+
+# Entry point group installed packages register their commands under
+ENTRY_POINT_GROUP = 'cyberpunk_terminal.commands'
+
+
+def command(name, help='', aliases=(), arguments=()):
+    """
+    Marks a plugin function as a terminal command:
+
+        from registry import command
+
+        @command('scan', help='Scan a subnet', arguments=[(('subnet',), {}), (('-p', '--ports'), {'default': '1-1024'})])
+        def scan(args):
+            return f"Scanning {args.subnet}..."
+
+    Discovery reads the name, help and aliases from the decorator call in the
+    source, so they must be literals; the module is only imported when one of
+    its commands first runs. arguments are (args, kwargs) pairs for
+    ArgumentParser.add_argument; with them the function gets an
+    argparse.Namespace instead of the list of words after the command name.
+    """
+    def mark(func):
+        func.command = {'name': name, 'help': help, 'aliases': tuple(aliases), 'arguments': list(arguments)}
+        return func
+    return mark
+
+
+class UsageError(Exception):
+    pass
+
+
+class CommandParser(argparse.ArgumentParser):
+    """
+    ArgumentParser that reports bad arguments as a UsageError instead of exiting.
+    """
+    def error(self, message):
+        raise UsageError(f"{self.prog}: {message}")
+
+    def exit(self, status=0, message=None):
+        raise UsageError(message or '')
+
+
+class Command:
+    """
+    A registered command. Plugin commands carry only their discovered metadata
+    (name, help, and where the function lives) until they first run, when
+    load() imports the module. The argument parser is built once and cached.
+    """
+    def __init__(self, name, func=None, help='', aliases=(), loader=None, attr=None, origin=None):
+        self.name = name
+        self.func = func
+        self.help = help
+        self.aliases = tuple(aliases)
+        self.loader = loader  # callable returning the module defining attr
+        self.attr = attr
+        self.origin = origin  # plugin file or distribution, shown by 'help <command>'
+        self.lock = threading.Lock()
+        self._parser = None
+
+    @property
+    def loaded(self):
+        return self.func is not None
+
+    def load(self):
+        if self.func is None:
+            with self.lock:
+                if self.func is None:
+                    func = self.loader()
+                    for part in self.attr.split('.'):
+                        func = getattr(func, part)
+                    spec = getattr(func, 'command', None)
+                    if spec and not self.help:
+                        self.help = spec['help']
+                    self.func = func
+        return self.func
+
+    def parser(self):
+        """
+        Returns the command's cached argument parser, or None if it takes raw words.
+        """
+        if self._parser is None:
+            spec = getattr(self.load(), 'command', None)
+            if not spec or not spec['arguments']:
+                self._parser = False
+            else:
+                parser = CommandParser(prog=self.name, add_help=False)
+                for args, kwargs in spec['arguments']:
+                    parser.add_argument(*args, **kwargs)
+                self._parser = parser
+        return self._parser or None
+
+    def __call__(self, args):
+        parser = self.parser()
+        if parser is not None:
+            args = parser.parse_args(args)
+        return self.func(args)
+
+
+class _Node:
+    __slots__ = ('children', 'value', 'count')
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+        self.count = 0  # names stored at or below this node
+
+
+class CommandTrie:
+    """
+    Prefix tree mapping command names to Commands. Lookups and prefix queries
+    cost O(length of the prefix) plus the names returned, whatever the number
+    of commands registered; names come out in sorted order.
+    """
+    def __init__(self):
+        self.root = _Node()
+
+    def __len__(self):
+        return self.root.count
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def _node(self, prefix):
+        node = self.root
+        for c in prefix:
+            node = node.children.get(c)
+            if node is None:
+                return None
+        return node
+
+    def insert(self, name, value):
+        path = [self.root]
+        node = self.root
+        for c in name:
+            node = node.children.setdefault(c, _Node())
+            path.append(node)
+        if node.value is None:
+            for n in path:
+                n.count += 1
+        node.value = value
+
+    def get(self, name):
+        node = self._node(name)
+        return node.value if node is not None else None
+
+    def items(self, prefix=''):
+        """
+        Yields (name, value) for every name starting with prefix, in sorted order.
+        """
+        node = self._node(prefix)
+        if node is None:
+            return
+        stack = [(prefix, node)]
+        while stack:
+            name, node = stack.pop()
+            if node.value is not None:
+                yield name, node.value
+            for c in sorted(node.children, reverse=True):
+                stack.append((name + c, node.children[c]))
+
+    def complete(self, prefix, limit=None):
+        names = []
+        for name, _ in self.items(prefix):
+            names.append(name)
+            if limit is not None and len(names) >= limit:
+                break
+        return names
+
+    def unique(self, prefix):
+        """
+        Returns the (name, value) of the only name starting with prefix, or None.
+        """
+        node = self._node(prefix)
+        if node is None or node.count != 1:
+            return None
+        name = prefix
+        while node.value is None:
+            (c, node), = node.children.items()
+            name += c
+        return name, node.value
+
+
+# --- Discovery ---
+def _decorated_commands(path):
+    """
+    Reads the @command(...) declarations of a plugin file without importing it.
+    """
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    found = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for deco in node.decorator_list:
+            if not isinstance(deco, ast.Call):
+                continue
+            target = deco.func
+            if getattr(target, 'id', getattr(target, 'attr', None)) != 'command' or not deco.args:
+                continue
+            try:
+                entry = {'name': ast.literal_eval(deco.args[0]), 'help': '', 'aliases': [], 'attr': node.name}
+                for kw in deco.keywords:
+                    if kw.arg in ('help', 'aliases'):
+                        entry[kw.arg] = ast.literal_eval(kw.value)
+            except ValueError:
+                continue  # not literals; the command can't be discovered lazily
+            entry['aliases'] = list(entry['aliases'])
+            found.append(entry)
+    return found
+
+
+def scan_plugin_dir(directory, index_path=None):
+    """
+    Returns {file path: [command metadata]} for the plugins in a directory.
+    Parsed metadata is kept in an index keyed by file size and mtime, so a file
+    is only parsed again after it changed.
+    """
+    if not os.path.isdir(directory):
+        return {}
+    index = {}
+    if index_path:
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+    found = {}
+    changed = False
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if not entry.name.endswith('.py') or entry.name.startswith('_'):
+            continue
+        st = entry.stat()
+        key = [st.st_size, st.st_mtime_ns]
+        cached = index.get(entry.path)
+        if cached is None or cached['key'] != key:
+            try:
+                cached = {'key': key, 'commands': _decorated_commands(entry.path)}
+            except (OSError, SyntaxError, ValueError) as e:
+                print(f"Failed to scan plugin {entry.path}: {e}")
+                continue
+            index[entry.path] = cached
+            changed = True
+        found[entry.path] = cached['commands']
+    stale = set(index) - set(found)
+    if index_path and (changed or stale):
+        for path in stale:
+            del index[path]
+        try:
+            os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+            tmp = f"{index_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp, index_path)
+        except OSError:
+            pass  # The index is only an optimization
+    return found
+
+
+def _module_loader(path):
+    """
+    Returns a callable importing a plugin file once, on first call.
+    """
+    lock = threading.Lock()
+    module = []
+
+    def load():
+        with lock:
+            if not module:
+                name = 'plugin_' + os.path.splitext(os.path.basename(path))[0]
+                spec = importlib.util.spec_from_file_location(name, path)
+                mod = importlib.util.module_from_spec(spec)
+                sys.modules[name] = mod
+                spec.loader.exec_module(mod)
+                module.append(mod)
+            return module[0]
+    return load
+
+
+def discover(directory=None, index_path=None, entry_points=True):
+    """
+    Returns lazy Commands for the plugins in a directory and those registered
+    by installed packages under ENTRY_POINT_GROUP. Nothing is imported.
+    """
+    commands = []
+    if directory:
+        for path, entries in scan_plugin_dir(directory, index_path).items():
+            loader = _module_loader(path)
+            for e in entries:
+                commands.append(Command(e['name'], help=e['help'], aliases=e['aliases'],
+                                        loader=loader, attr=e['attr'], origin=path))
+    if entry_points:
+        try:
+            eps = metadata.entry_points()
+            eps = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') else eps.get(ENTRY_POINT_GROUP, [])
+        except Exception as e:
+            print(f"Failed to read plugin entry points: {e}")
+            eps = []
+        for ep in eps:
+            module, _, attr = ep.value.partition(':')
+            attr = attr.strip()
+            if not attr:
+                print(f"Skipping plugin entry point {ep.name} = {ep.value}: it must name a function (module:function)")
+                continue
+            dist = getattr(ep, 'dist', None)
+            commands.append(Command(ep.name, loader=lambda module=module: importlib.import_module(module),
+                                    attr=attr, origin=dist.name if dist else module))
+    return commands
@@ -0,0 +1,77 @@
+import sys
+
+FLICKER = 0x01
+
+
+class Scrollback:
+    """
+    Fixed-capacity ring buffer of output lines. Texts are interned and kept in a
+    preallocated slot list with per-line flags in a parallel bytearray and style
+    runs (see ansi.py, None for plain lines) in a parallel list, so appends and
+    evictions are O(1) and a visible window is read in O(rows).
+    Indexes run from 0 (oldest line kept) to len - 1 (newest).
+    """
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.texts = [None] * capacity
+        self.flags = bytearray(capacity)
+        self.runs = [None] * capacity
+        self.head = 0       # slot of the oldest line
+        self.count = 0
+        self.appended = 0   # lines ever appended, evicted ones included
+
+    def __len__(self):
+        return self.count
+
+    def append(self, text, flicker=False, runs=None):
+        slot = (self.head + self.count) % self.capacity
+        self.texts[slot] = sys.intern(text)
+        self.flags[slot] = FLICKER if flicker else 0
+        self.runs[slot] = runs
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.head = (self.head + 1) % self.capacity
+        self.appended += 1
+
+    def extend(self, lines, flicker=False):
+        """
+        Appends lines of text, or of (text, runs) as returned by AnsiParser.feed.
+        """
+        for line in lines:
+            if isinstance(line, str):
+                self.append(line, flicker)
+            else:
+                self.append(line[0], flicker, line[1])
+
+    def _slot(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('scrollback index out of range')
+        return (self.head + index) % self.capacity
+
+    def __getitem__(self, index):
+        """
+        Returns (text, flicker, runs) for a line.
+        """
+        slot = self._slot(index)
+        return self.texts[slot], bool(self.flags[slot] & FLICKER), self.runs[slot]
+
+    def text(self, index):
+        return self.texts[self._slot(index)]
+
+    def window(self, start, count):
+        """
+        Returns the (text, flicker, runs) of up to count lines from start.
+        """
+        start = max(0, start)
+        stop = min(self.count, start + count)
+        return [self[i] for i in range(start, stop)]
+
+    def clear(self):
+        self.texts = [None] * self.capacity
+        self.flags = bytearray(self.capacity)
+        self.runs = [None] * self.capacity
+        self.head = 0
+        self.count = 0
@@ -0,0 +1,484 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import asyncio
+import inspect
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Frame header: payload length, flags
+_HEADER = struct.Struct('>IB')
+FLAG_ZLIB = 1
+MAX_FRAME = 16 * 1024 * 1024
+
+
+# --- Wire format ---
+def encode_frame(message, compress_min=None):
+    """
+    Encodes a message as a length-prefixed frame of compact JSON, compressed
+    with zlib when compress_min is set and the payload is at least that long.
+    """
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    flags = 0
+    if compress_min is not None and len(payload) >= compress_min:
+        packed = zlib.compress(payload, 1)
+        if len(packed) < len(payload):
+            payload, flags = packed, FLAG_ZLIB
+    return _HEADER.pack(len(payload), flags) + payload
+
+
+async def read_frame(reader):
+    """
+    Reads one frame and returns its message, or None at end of stream.
+    """
+    try:
+        size, flags = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    except asyncio.IncompleteReadError:
+        return None
+    if size > MAX_FRAME:
+        raise ValueError(f"frame of {size} bytes exceeds the {MAX_FRAME} byte limit")
+    payload = await reader.readexactly(size)
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+
+def parse_address(address):
+    """
+    Parses 'tcp://host:port', 'host:port' or 'unix:///path/to.sock'.
+    Returns ('tcp', (host, port)) or ('unix', path).
+    """
+    if address.startswith('unix://'):
+        return 'unix', address[len('unix://'):]
+    if address.startswith('tcp://'):
+        address = address[len('tcp://'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+class _Connection:
+    """
+    A connected client. Outgoing frames wait in a bounded queue drained by a
+    writer task; a command whose client reads slowly waits for room in that
+    queue on the event loop, with its output no longer pulled, so it holds no
+    worker thread and never stalls the render loop or other clients.
+    """
+    def __init__(self, reader, writer, queue_frames):
+        self.reader = reader
+        self.writer = writer
+        self.queue = asyncio.Queue(queue_frames)
+        self.jobs = {}  # command id -> cancel Event
+        self.closed = False
+
+    async def send(self, message):
+        if not self.closed:
+            await self.queue.put(message)
+
+    async def write_loop(self, compress_min):
+        writer = self.writer
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:
+                    break
+                writer.write(encode_frame(message, compress_min))
+                # Everything already queued goes out with the same drain
+                while not self.queue.empty():
+                    message = self.queue.get_nowait()
+                    if message is None:
+                        break
+                    writer.write(encode_frame(message, compress_min))
+                await writer.drain()
+                if message is None:
+                    break
+        except ConnectionError:
+            self.closed = True
+
+
+class RemoteServer:
+    """
+    Serves a CommandHandler to remote clients over TCP and/or a Unix socket,
+    on an asyncio event loop. Clients send {'op': 'command', 'id', 'line'} (or
+    {'op': 'cancel', 'id'}) and receive {'op': 'output', 'id', 'lines'} frames,
+    batching up to batch_lines lines or batch_ms of output each, then
+    {'op': 'done', 'id'}. Commands run on a thread pool (async ones on the loop);
+    a worker only pulls a frame's worth of output at a time, so a slow client
+    pauses its own commands without tying up the pool.
+    on_command(line) and on_output(lines), if given, are called on the server's
+    loop thread so a display can mirror the remote traffic.
+    start() runs the loop on a background thread next to the render loop;
+    serve() runs it in the calling thread.
+    """
+    def __init__(self, handler, addresses, workers=16, batch_lines=256, batch_ms=20, queue_frames=64,
+                 compress_min=512, on_command=None, on_output=None):
+        self.handler = handler
+        self.addresses = [parse_address(a) if isinstance(a, str) else a for a in addresses]
+        self.batch_lines = batch_lines
+        self.batch_s = batch_ms / 1000.0
+        self.queue_frames = queue_frames
+        self.compress_min = compress_min  # None disables compression
+        self.on_command = on_command
+        self.on_output = on_output
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='remote')
+        self.loop = None
+        self.servers = []
+        self.connections = set()
+        self.tasks = set()  # running commands
+        self.thread = None
+        self.ready = threading.Event()
+        self.stopped = None
+
+    # --- Lifecycle ---
+    async def listen(self):
+        for kind, where in self.addresses:
+            if kind == 'unix':
+                if os.path.exists(where):
+                    os.unlink(where)
+                server = await asyncio.start_unix_server(self.handle_client, where)
+            else:
+                server = await asyncio.start_server(self.handle_client, *where)
+            self.servers.append(server)
+
+    def bound(self):
+        """
+        Returns the addresses actually listened on (with the real port for port 0).
+        """
+        found = []
+        for server in self.servers:
+            for sock in server.sockets:
+                name = sock.getsockname()
+                found.append(('unix', name) if isinstance(name, str) else ('tcp', name[:2]))
+        return found
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        await self.listen()
+        self.ready.set()
+        await self.stopped.wait()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        for conn in list(self.connections):
+            self.drop(conn)
+
+    def serve(self):
+        asyncio.run(self.run())
+
+    def start(self):
+        """
+        Serves on a daemon thread; returns once listening.
+        """
+        self.thread = threading.Thread(target=self.serve, name='remote-server', daemon=True)
+        self.thread.start()
+        self.ready.wait(5)
+        return self
+
+    def stop(self):
+        if self.loop is not None and self.stopped is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+        if self.thread is not None:
+            self.thread.join(2)
+        self.executor.shutdown(wait=False)
+
+    # --- Connections ---
+    async def handle_client(self, reader, writer):
+        conn = _Connection(reader, writer, self.queue_frames)
+        self.connections.add(conn)
+        write_task = asyncio.create_task(conn.write_loop(self.compress_min))
+        try:
+            while True:
+                message = await read_frame(reader)
+                if message is None:
+                    break
+                op = message.get('op')
+                if op == 'command':
+                    self.start_command(conn, message.get('id'), str(message.get('line', '')))
+                elif op == 'cancel' and message.get('id') in conn.jobs:
+                    conn.jobs[message['id']].set()
+        except (ConnectionError, ValueError, zlib.error) as e:
+            print(f"Remote client dropped: {e}")
+        finally:
+            self.drop(conn)
+            # Flush what is queued, unless the client is too slow to take it
+            try:
+                conn.queue.put_nowait(None)
+                await asyncio.wait_for(write_task, 1.0)
+            except (asyncio.QueueFull, asyncio.TimeoutError, ConnectionError):
+                write_task.cancel()
+            writer.close()
+
+    def drop(self, conn):
+        conn.closed = True
+        for cancelled in conn.jobs.values():
+            cancelled.set()
+        self.connections.discard(conn)
+
+    # --- Commands ---
+    def start_command(self, conn, job_id, line):
+        cancelled = threading.Event()
+        conn.jobs[job_id] = cancelled
+        if self.on_command is not None:
+            self.on_command(line)
+        task = asyncio.ensure_future(self.run_command(conn, job_id, line, cancelled))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run_command(self, conn, job_id, line, cancelled):
+        """
+        Runs a command, streaming its output to the client in batches.
+        """
+        batch = _Batch(self, conn, job_id, cancelled)
+        error = None
+        try:
+            output = await self.loop.run_in_executor(self.executor, self.handler.handle, line)
+            if inspect.isawaitable(output) or hasattr(output, '__aiter__'):
+                await self._stream_async(batch, output)
+            elif output is not None:
+                await self._stream(batch, output)
+            await batch.flush()
+        except Exception as e:
+            error = str(e)
+        finally:
+            batch.close()
+        conn.jobs.pop(job_id, None)
+        await self.emit(conn, {'op': 'done', 'id': job_id, 'error': error}, cancelled)
+
+    def _pull(self, batch, lines):
+        """
+        Runs on a worker thread: adds lines to the batch until it is full.
+        Returns False once the output ended or the command was stopped.
+        """
+        for line in lines:
+            if not batch.add(str(line)):
+                if hasattr(lines, 'close'):
+                    lines.close()
+                return False
+            if batch.full:
+                return True
+        return False
+
+    async def _pull_async(self, batch, lines):
+        """
+        Like _pull, for an async iterator.
+        """
+        while True:
+            try:
+                line = await lines.__anext__()
+            except StopAsyncIteration:
+                return False
+            if not batch.add(str(line)):
+                if hasattr(lines, 'aclose'):
+                    await lines.aclose()
+                return False
+            if batch.full:
+                return True
+
+    async def _send(self, batch, pull):
+        """
+        Sends a command's output as pull() fills the batch, starting the next
+        pull only once the batch was queued. Lines that arrive slowly still go
+        out when the batch's timer fires.
+        """
+        pulling = None
+        while True:
+            if pulling is None:
+                pulling = pull()
+            await asyncio.wait((pulling, batch.due), return_when=asyncio.FIRST_COMPLETED)
+            if pulling.done():
+                if not pulling.result():
+                    return
+                pulling = None
+            if not await batch.flush():
+                batch.cancelled.set()  # the output is closed at its next line
+                return
+
+    async def _stream(self, batch, output):
+        if isinstance(output, str):
+            output = output.split('\n')
+        lines = iter(output)
+        await self._send(batch, lambda: self.loop.run_in_executor(self.executor, self._pull, batch, lines))
+
+    async def _stream_async(self, batch, output):
+        if inspect.isawaitable(output):
+            output = await output
+            if output is not None and not hasattr(output, '__aiter__'):
+                await self._stream(batch, output)
+                return
+        lines = aiter(output)
+        await self._send(batch, lambda: asyncio.ensure_future(self._pull_async(batch, lines)))
+
+    async def emit(self, conn, message, cancelled=None):
+        """
+        Queues a message for a client, waiting on the loop while the client's
+        queue is full. Returns False if the client went away or the command was
+        cancelled meanwhile.
+        """
+        if conn.closed:
+            return False
+        if not conn.queue.full():
+            conn.queue.put_nowait(message)
+            return True
+        put = asyncio.ensure_future(conn.send(message))
+        while True:
+            done, _ = await asyncio.wait((put,), timeout=0.05)
+            if done:
+                return not conn.closed
+            if conn.closed or (cancelled is not None and cancelled.is_set()):
+                put.cancel()
+                return False
+
+
+class _Batch:
+    """
+    Collects a command's output lines into frames of up to batch_lines lines,
+    or whatever arrived within batch_ms of a frame's first line. Lines may be
+    added from any thread; frames are sent from the server's loop, where the
+    first line of each frame starts a timer that makes it due.
+    """
+    def __init__(self, server, conn, job_id, cancelled):
+        self.server = server
+        self.loop = server.loop
+        self.conn = conn
+        self.job_id = job_id
+        self.cancelled = cancelled
+        self.lock = threading.Lock()
+        self.lines = []
+        self.timer = None
+        self.due = self.loop.create_future()  # set when the open frame's time is up
+
+    @property
+    def full(self):
+        return len(self.lines) >= self.server.batch_lines
+
+    def add(self, line):
+        """
+        Adds a line. Returns False if the command was cancelled or its client went away.
+        """
+        if self.cancelled.is_set() or self.conn.closed:
+            return False
+        with self.lock:
+            self.lines.append(line)
+            opened = len(self.lines) == 1
+        if opened:
+            self.loop.call_soon_threadsafe(self._open)
+        return True
+
+    def _open(self):
+        if self.timer is None and self.lines:
+            self.timer = self.loop.call_later(self.server.batch_s, self._expire)
+
+    def _expire(self):
+        self.timer = None
+        if not self.due.done():
+            self.due.set_result(None)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    async def flush(self):
+        """
+        Sends the lines collected so far. Returns False if the command was
+        cancelled or its client went away.
+        """
+        self.close()
+        if self.due.done():
+            self.due = self.loop.create_future()
+        with self.lock:
+            lines, self.lines = self.lines, []
+        if not lines:
+            return not (self.cancelled.is_set() or self.conn.closed)
+        if self.server.on_output is not None:
+            self.server.on_output(lines)
+        return await self.server.emit(self.conn, {'op': 'output', 'id': self.job_id, 'lines': lines}, self.cancelled)
+
+
+class RemoteClient:
+    """
+    Minimal asyncio client for RemoteServer, used for testing over the loopback
+    interface or a Unix socket.
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 1
+
+    @classmethod
+    async def connect(cls, address):
+        kind, where = parse_address(address) if isinstance(address, str) else address
+        if kind == 'unix':
+            reader, writer = await asyncio.open_unix_connection(where)
+        else:
+            reader, writer = await asyncio.open_connection(*where)
+        return cls(reader, writer)
+
+    async def command(self, line):
+        """
+        Sends a command and yields its output lines as the batches arrive.
+        """
+        job_id = self.next_id
+        self.next_id += 1
+        self.writer.write(encode_frame({'op': 'command', 'id': job_id, 'line': line}))
+        await self.writer.drain()
+        while True:
+            message = await read_frame(self.reader)
+            if message is None:
+                raise ConnectionError("server closed the connection")
+            if message.get('id') != job_id:
+                continue
+            if message['op'] == 'output':
+                for line in message['lines']:
+                    yield line
+            elif message['op'] == 'done':
+                if message.get('error'):
+                    yield f"Error: {message['error']}"
+                return
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def run_command(address, line):
+    """
+    Connects, runs one command and returns its output lines.
+    """
+    async def main():
+        client = await RemoteClient.connect(address)
+        try:
+            return [line async for line in client.command(line)]
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve terminal commands to remote clients, or send them.")
+    sub = parser.add_subparsers(dest='mode', required=True)
+    serve = sub.add_parser('serve', help="run a headless command server")
+    serve.add_argument('addresses', nargs='+', help="tcp://host:port, host:port or unix:///path")
+    serve.add_argument('--no-compress', action='store_true')
+    send = sub.add_parser('send', help="run commands on a server and print their output")
+    send.add_argument('address')
+    send.add_argument('commands', nargs='+')
+    args = parser.parse_args()
+    if args.mode == 'serve':
+        from config import PLUGIN_DIR, PLUGIN_INDEX, PLUGIN_ENTRY_POINTS
+        from commands import CommandHandler
+        handler = CommandHandler()
+        handler.load_plugins(PLUGIN_DIR, PLUGIN_INDEX, PLUGIN_ENTRY_POINTS)
+        server = RemoteServer(handler, args.addresses, compress_min=None if args.no_compress else 512)
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            pass
+    else:
+        for command in args.commands:
+            for line in run_command(args.address, command):
+                print(line)
+        sys.exit(0)
@@ -0,0 +1,413 @@
+import math
+import pygame
+from collections import deque
+from config import STREAM_LINES_PER_FRAME, STREAM_BUFFER_LINES, SCROLLBACK_LINES, COMMAND_WORKERS, \
+    INPUT_HISTORY, COMPLETION_LIST_LIMIT
+from scrollback import Scrollback
+from archive import ScrollbackArchive
+from layout import LineLayout
+from editor import LineEditor
+from commands import CommandHandler
+from jobs import CommandRunner
+from ansi import AnsiParser, slice_runs
+
+
+def tile(count, rect):
+    """
+    Splits rect into count panes on a near-square grid, filled row by row; the
+    panes of a short last row are widened to use its full width.
+    """
+    cols = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / cols)
+    panes = []
+    for r in range(rows):
+        n = min(cols, count - r * cols)
+        y0 = rect.top + rect.height * r // rows
+        y1 = rect.top + rect.height * (r + 1) // rows
+        for c in range(n):
+            x0 = rect.left + rect.width * c // n
+            x1 = rect.left + rect.width * (c + 1) // n
+            panes.append(pygame.Rect(x0, y0, x1 - x0, y1 - y0))
+    return panes
+
+
+class Session:
+    """
+    One terminal session: its own scrollback (and archive), command handler,
+    background command runner, typewriter, input line and scroll position.
+    The owning Terminal shares its glyph cache, effects and sound between all
+    sessions and tells each one which pane of the screen it occupies.
+    A session redraws only the rows of its pane whose content changed, so an
+    idle pane costs nothing per frame.
+    """
+    def __init__(self, terminal, plugins=(), archive_dir=None, archive_name=None):
+        self.terminal = terminal
+        self.editor = LineEditor(INPUT_HISTORY)
+        self.output_lines = Scrollback(SCROLLBACK_LINES)
+        # Output is split into text and ANSI style runs as it arrives
+        self.ansi = AnsiParser()
+        # Every line also goes to disk; lines evicted from the ring are read back from there
+        self.archive = ScrollbackArchive(archive_dir, archive_name) if archive_dir else None
+        self.pending_jump = None
+        self.command_handler = CommandHandler()
+        for command in plugins:
+            self.command_handler.add(command)
+        self.command_handler.archive = self.archive
+        self.command_handler.jump = lambda index: setattr(self, 'pending_jump', index)
+        self.command_handler.profiler = terminal.profiler
+        self.command_handler.audio = terminal.sound_manager.engine
+        self.command_handler.settings = terminal.settings
+        # Typewriter state: lines waiting to be typed and chars shown of the first one
+        self.typing_buffer = deque()
+        self.typing_index = 0.0
+        self.typing_time = 0
+        self.runner = CommandRunner(self.command_handler, COMMAND_WORKERS, terminal.sim_delay, STREAM_BUFFER_LINES)
+        self.prompt = '> '
+        self.scroll_pos = None  # (line, wrapped row) shown at the bottom; None follows the newest output
+        self.visible_rows = 1
+        # Soft-wrap layout of the history, relaid lazily when the width changes
+        self.layout = LineLayout(terminal.glyphs.cell_w, self.history_text)
+        # Pane on the screen and what was last drawn in it
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.row_keys = None
+        self.input_key = None
+        self.rows_animated = False
+
+    @property
+    def busy(self):
+        return self.runner.busy or bool(self.typing_buffer)
+
+    def close(self):
+        self.runner.shutdown()
+        if self.archive is not None:
+            self.archive.close()
+
+    def add_output(self, text, flicker=False):
+        """
+        Adds text (or list of lines) to output history.
+        """
+        if isinstance(text, str):
+            lines = text.split('\n')
+        else:
+            lines = [part for line in text for part in line.split('\n')]
+        self.append_lines([self.ansi.feed(line) for line in lines], flicker)
+
+    def append_lines(self, lines, flicker=False):
+        """
+        Adds parsed (text, runs) lines to output history. The archive keeps only
+        the text, so lines read back from it are shown in the default style.
+        """
+        self.output_lines.extend(lines, flicker)
+        self.terminal.last_activity = self.terminal.ticks()
+        if self.archive is not None:
+            self.archive.extend([text for text, runs in lines])
+        self.scroll_pos = None
+
+    # --- History and scrolling ---
+    def history_start(self):
+        """
+        Returns the index of the oldest line that can be scrolled to.
+        """
+        if self.archive is not None:
+            return 0
+        return self.output_lines.appended - self.output_lines.count
+
+    def history_len(self):
+        """
+        Returns the index one past the newest history line.
+        """
+        if self.archive is not None:
+            return len(self.archive)
+        return self.output_lines.appended
+
+    def history_window(self, start, count):
+        """
+        Returns (text, flicker, runs) for up to count history lines from start,
+        from the ring buffer where it still holds them and from the archive otherwise.
+        """
+        ring = self.output_lines
+        stop = start + count
+        start = max(start, self.history_start())
+        first = ring.appended - ring.count  # history index of the oldest line in the ring
+        rows = []
+        if start < first:
+            rows = [(text, False, None) for text in self.archive.lines(start, min(stop, first) - start)]
+        start = max(start, first)
+        return rows + ring.window(start - first, stop - start)
+
+    def history_text(self, index):
+        return self.history_window(index, 1)[0][0]
+
+    def tail_pos(self):
+        last = self.history_len() - 1
+        return last, self.layout.rows(last) - 1
+
+    def set_scroll_pos(self, pos):
+        self.scroll_pos = None if pos == self.tail_pos() else pos
+
+    def scroll(self, rows):
+        """
+        Scrolls back (positive) or forward (negative) by a number of visual rows.
+        """
+        total = self.history_len()
+        if total <= self.history_start():
+            return
+        pos = self.scroll_pos or self.tail_pos()
+        if rows > 0:
+            pos = self.layout.back(pos, rows, self.history_start())
+        else:
+            pos = self.layout.forward(pos, -rows, total)
+        self.set_scroll_pos(pos)
+
+    def scroll_to_end(self):
+        self.scroll_pos = None
+
+    def scroll_to_line(self, index):
+        """
+        Jumps so that the line at a history index is the top visible row.
+        """
+        total = self.history_len()
+        index = max(self.history_start(), min(index, total - 1))
+        if index < 0:
+            return
+        self.set_scroll_pos(self.layout.forward((index, 0), self.visible_rows - 1, total))
+
+    # --- Commands ---
+    def handle_command(self, line):
+        """
+        Echoes the command and dispatches it to the background runner.
+        """
+        self.flush_typing()
+        self.ansi.reset()  # colors left set by earlier output end at the prompt
+        self.add_output(self.prompt + line, flicker=True)
+        origin = self.history_len() - 1
+        on_done = None
+        command = self.command_handler.resolve(line.split()[0])
+        if command is not None and command.name == 'exit':
+            on_done = lambda job: self.terminal.close_session(self)
+        self.runner.submit(line, on_done, origin)
+
+    def cancel_commands(self):
+        """
+        Cancels every command in flight (Ctrl+C).
+        """
+        if self.runner.cancel():
+            self.typing_buffer.clear()
+            self.typing_index = 0.0
+            self.ansi.reset()
+            self.add_output('^C')
+
+    def update(self):
+        """
+        Pulls output streamed by running commands into the scrollback, at most
+        STREAM_LINES_PER_FRAME lines per frame. With a text speed set, lines go
+        through the typewriter and no more are pulled until it catches up, which
+        in turn blocks the producing command.
+        """
+        text_speed = self.terminal.plan.text_speed
+        if text_speed > 0:
+            now = self.terminal.ticks()
+            if not self.typing_buffer:
+                self.typing_time = now
+            room = STREAM_LINES_PER_FRAME - len(self.typing_buffer)
+            if room > 0:
+                self.typing_buffer.extend(self.ansi.feed(line) for line in self.runner.poll(room))
+            self.advance_typing(now, text_speed)
+        else:
+            if self.typing_buffer:
+                self.flush_typing()  # typing was just switched off
+            lines = self.runner.poll(STREAM_LINES_PER_FRAME)
+            if lines:
+                self.add_output(lines)
+        # A search jumps to its match once its own output has been displayed
+        if self.pending_jump is not None and not self.runner.busy and not self.typing_buffer:
+            self.scroll_to_line(self.pending_jump)
+            self.pending_jump = None
+        if self.archive is not None:
+            self.archive.flush()
+
+    def advance_typing(self, now, text_speed):
+        """
+        Reveals text_speed characters per second, committing lines as they complete.
+        """
+        dt = (now - self.typing_time) / 1000.0
+        self.typing_time = now
+        if not self.typing_buffer:
+            self.typing_index = 0.0
+            return
+        self.typing_index += text_speed * dt
+        done = []
+        while self.typing_buffer and self.typing_index >= len(self.typing_buffer[0][0]):
+            self.typing_index -= len(self.typing_buffer[0][0])
+            done.append(self.typing_buffer.popleft())
+        if not self.typing_buffer:
+            self.typing_index = 0.0
+        if done:
+            self.append_lines(done)
+
+    def flush_typing(self):
+        """
+        Finishes typing every pending line immediately.
+        """
+        if self.typing_buffer:
+            self.append_lines(list(self.typing_buffer))
+            self.typing_buffer.clear()
+            self.typing_index = 0.0
+
+    # --- Input line ---
+    def apply_edits(self, edits):
+        """
+        Applies edits coalesced by Terminal.handle_events.
+        """
+        editor = self.editor
+        for kind, value in edits:
+            if kind == 'text':
+                editor.insert(''.join(value))
+            elif kind == pygame.K_BACKSPACE:
+                editor.backspace(value)
+            elif kind == pygame.K_DELETE:
+                editor.delete(value)
+            elif kind == pygame.K_LEFT:
+                editor.move(-value)
+            elif kind == pygame.K_RIGHT:
+                editor.move(value)
+
+    def submit_input(self):
+        line = self.editor.submit().strip()
+        if line:
+            self.handle_command(line)
+
+    def paste(self, text):
+        """
+        Inserts clipboard text; every complete line in it is submitted as a command.
+        """
+        text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\t', '    ')
+        lines = ''.join(c for c in text if c >= ' ' or c == '\n').split('\n')
+        for line in lines[:-1]:
+            self.editor.insert(line)
+            self.submit_input()
+        self.editor.insert(lines[-1])
+
+    def complete_input(self):
+        """
+        Tab: completes the command name, listing the candidates when it is ambiguous.
+        """
+        matches = self.editor.complete(self.command_handler.complete)
+        if len(matches) > 1:
+            shown = matches[:COMPLETION_LIST_LIMIT]
+            more = len(matches) - len(shown)
+            self.add_output('  '.join(shown) + (f'  ... {more} more' if more else ''))
+
+    # --- Rendering ---
+    def invalidate(self):
+        """
+        Forces the next draw to repaint the whole pane.
+        """
+        self.row_keys = None
+        self.input_key = None
+
+    def wrap(self, text, runs):
+        """
+        Soft-wraps a line into (text, runs) rows.
+        """
+        parts = self.layout.wrap(text)
+        if runs is None:
+            return [(part, None) for part in parts]
+        cols = self.layout.cols
+        return [(part, slice_runs(runs, i * cols, i * cols + len(part))) for i, part in enumerate(parts)]
+
+    def visible_lines(self, count):
+        """
+        Returns the (text, flicker, runs) wrapped rows on screen, top first: up to count
+        rows ending at the scroll position. Only the lines on screen are wrapped.
+        A line being typed out is shown after the history while following output.
+        """
+        rows = []
+        if self.scroll_pos is None:
+            if self.typing_buffer:
+                text, runs = self.typing_buffer[0]
+                typing = self.wrap(text[:int(self.typing_index)], runs)
+                rows = [(part, False, part_runs) for part, part_runs in reversed(typing)][:count]
+            bottom = self.history_len() - 1
+            bottom_row = None
+        else:
+            bottom, bottom_row = self.scroll_pos
+        first = max(self.history_start(), bottom - (count - len(rows)) + 1)
+        if len(rows) < count and bottom >= first:
+            window = self.history_window(first, bottom - first + 1)
+            for i in range(len(window) - 1, -1, -1):
+                text, flicker, runs = window[i]
+                wrapped = self.wrap(text, runs)
+                if i == len(window) - 1 and bottom_row is not None:
+                    wrapped = wrapped[:bottom_row + 1]
+                for part, part_runs in reversed(wrapped):
+                    rows.append((part, flicker, part_runs))
+                if len(rows) >= count:
+                    break
+        rows = rows[:count]
+        rows.reverse()
+        return rows
+
+    def draw(self, surface, active):
+        """
+        Draws the rows of the pane whose content changed since the last draw
+        into surface, and returns the rects it touched.
+        """
+        term = self.terminal
+        pane = self.rect
+        plan = term.plan
+        bg = plan.bg
+        line_height = term.line_height
+        margin = term.margin
+        if self.layout.resize(pane.width - margin * 2) and self.scroll_pos is not None:
+            self.scroll_pos = self.layout.clamp(self.scroll_pos)
+        lines_to_show = max(0, (pane.height - line_height - margin * 2) // line_height)
+        self.visible_rows = max(1, lines_to_show)
+        full = self.row_keys is None or len(self.row_keys) != lines_to_show
+        if full:
+            surface.fill(bg, pane)
+            self.row_keys = [None] * lines_to_show
+            self.input_key = None
+        surface.set_clip(pane)
+        damage = []
+        # Draw output lines (scrollable), skipping rows whose content is unchanged.
+        rows = self.visible_lines(lines_to_show)
+        self.rows_animated = False
+        y = pane.top + margin
+        for i in range(lines_to_show):
+            if i < len(rows):
+                text, flicker, runs = rows[i]
+                flicker = flicker and plan.flicker_rows
+                self.rows_animated = self.rows_animated or flicker
+            else:
+                text = ''
+                flicker = False
+                runs = None
+            cells = plan.glitch_cells(text)
+            key = (text, runs)
+            if full or cells or flicker or self.row_keys[i] != key:
+                rect = pygame.Rect(pane.left, y, pane.width, line_height)
+                if not full:
+                    surface.fill(bg, rect)
+                term.draw_line(surface, text, (pane.left + margin, y), flicker, cells, runs)
+                # Glitched or flickering rows must be restored on the next frame
+                self.row_keys[i] = None if cells or flicker else key
+                damage.append(rect)
+            y += line_height
+        # Draw input line: only the part around the cursor that fits the pane
+        cw = term.glyphs.cell_w
+        cols = max(1, (pane.width - margin * 2) // cw - len(self.prompt))
+        input_text, cursor = self.editor.view(cols)
+        input_key = (input_text, cursor, active)
+        if full or self.input_key != input_key:
+            input_rect = pygame.Rect(pane.left, pane.bottom - line_height - margin, pane.width, line_height)
+            if not full:
+                surface.fill(bg, input_rect)
+            term.draw_line(surface, self.prompt + input_text, (pane.left + margin, input_rect.top))
+            if active:
+                x = pane.left + margin + (len(self.prompt) + cursor) * cw
+                surface.fill(plan.text, (x, input_rect.bottom - 3, cw, 2))
+            self.input_key = input_key
+            damage.append(input_rect)
+        surface.set_clip(None)
+        return [pane] if full else damage
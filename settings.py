@@ -0,0 +1,218 @@
+import os
+import json
+import threading
+import config
+
+
+class ConfigError(ValueError):
+    pass
+
+
+# --- Value parsers ---
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'on', 'yes'):
+        return True
+    if text in ('0', 'false', 'off', 'no'):
+        return False
+    raise ConfigError(f"expected on or off, got {value!r}")
+
+
+def number(kind, low=None, high=None):
+    def parse(value):
+        if isinstance(value, bool):
+            raise ConfigError(f"expected a number, got {value!r}")
+        try:
+            result = kind(value)
+        except (TypeError, ValueError):
+            raise ConfigError(f"expected {'an integer' if kind is int else 'a number'}, got {value!r}")
+        if (low is not None and result < low) or (high is not None and result > high):
+            raise ConfigError(f"{result} is outside {low}..{high if high is not None else ''}")
+        return result
+    return parse
+
+
+def choice(options):
+    def parse(value):
+        text = str(value).strip().lower()
+        names = options() if callable(options) else options
+        if text not in names:
+            raise ConfigError(f"expected one of {', '.join(names)}, got {value!r}")
+        return text
+    return parse
+
+
+# Settings that can change while the terminal runs, with their parsers; the
+# defaults are the upper-case constants of the same name in config.py
+SCHEMA = {
+    'color_scheme': choice(lambda: list(config.COLOR_PRESETS)),
+    'enable_scanlines': parse_bool,
+    'enable_noise': parse_bool,
+    'enable_glow': parse_bool,
+    'enable_warp': parse_bool,
+    'enable_flicker': parse_bool,
+    'enable_jitter': parse_bool,
+    'enable_corruption': parse_bool,
+    'scanline_opacity': number(int, 0, 255),
+    'noise_opacity': number(int, 0, 255),
+    'glow_radius': number(int, 0, 64),
+    'jitter_amount': number(int, 0, 16),
+    'flicker_intensity': number(float, 0.0, 1.0),
+    'warp_amount': number(float, 0.0, 0.5),
+    'corruption_chance': number(float, 0.0, 1.0),
+    'corruption_duration': number(float, 0.0, 10.0),
+    'corruption_intensity': number(float, 0.0, 1.0),
+    'corruption_block_size': number(int, 4, 512),
+    'glitchy_text': parse_bool,
+    'glitch_chance': number(float, 0.0, 1.0),
+    'text_speed': number(int, 0),
+    'render_mode': choice(('full', 'damage')),
+    'target_fps': number(int, 1, 480),
+    'idle_fps': number(int, 1, 480),
+    'idle_delay': number(float, 0.0),
+}
+
+
+class RuntimeConfig:
+    """
+    The settings in SCHEMA: config.py's values, overridden by a JSON file of
+    {name: value}. Every change is validated as a whole before any of it is
+    applied, then listeners are called with (changed names, None), or with
+    (None, message) when the file holds something invalid. Listeners may be
+    called from other threads (the watcher, command workers).
+    set() and update() save the overrides back to the file; watch() polls the
+    file and reloads it when it changes on disk.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.defaults = {name: getattr(config, name.upper()) for name in SCHEMA}
+        self.values = dict(self.defaults)  # replaced, never mutated, so readers need no lock
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.stopped = threading.Event()
+        self.thread = None
+        if path:
+            try:
+                self.load()
+            except (OSError, ValueError) as e:
+                print(f"Config error in {path}: {e}")
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def validate(self, changes):
+        """
+        Returns the changes parsed, or raises ConfigError naming every bad entry.
+        """
+        parsed = {}
+        errors = []
+        for name, value in changes.items():
+            key = str(name).strip().lower()
+            parse = SCHEMA.get(key)
+            if parse is None:
+                errors.append(f"unknown setting '{name}'")
+                continue
+            try:
+                parsed[key] = parse(value)
+            except ConfigError as e:
+                errors.append(f"{key}: {e}")
+        if errors:
+            raise ConfigError('; '.join(errors))
+        return parsed
+
+    def update(self, changes, save=True):
+        """
+        Applies {name: value} changes. Returns the set of names whose value changed.
+        """
+        parsed = self.validate(changes)
+        failed = None
+        with self.lock:
+            changed = self.replace(dict(self.values, **parsed))
+            if changed and save and self.path:
+                try:
+                    self.save()
+                except OSError as e:
+                    failed = e  # the change still applies, it just won't survive a restart
+        self.notify(changed)
+        if failed is not None:
+            raise failed
+        return changed
+
+    def set(self, name, value):
+        return self.update({name: value})
+
+    def replace(self, values):
+        changed = {name for name, value in values.items() if self.values[name] != value}
+        self.values = values
+        return changed
+
+    def overrides(self):
+        return {name: value for name, value in self.values.items() if value != self.defaults[name]}
+
+    def notify(self, changed=None, error=None):
+        if changed or error:
+            for listener in list(self.listeners):
+                listener(changed, error)
+
+    # --- File ---
+    def file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def load(self):
+        """
+        Reloads the file: settings missing from it go back to their defaults.
+        Returns the set of names whose value changed.
+        """
+        stamp = self.file_stamp()
+        data = {}
+        if stamp is not None:
+            with open(self.path) as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ConfigError("expected a JSON object of setting: value")
+        parsed = self.validate(data)
+        with self.lock:
+            self.stamp = stamp
+            changed = self.replace(dict(self.defaults, **parsed))
+        self.notify(changed)
+        return changed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.overrides(), f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp, self.path)
+        self.stamp = self.file_stamp()
+
+    # --- Watching ---
+    def watch(self, interval=1.0):
+        """
+        Polls the file every interval seconds on a background thread, reloading it
+        when its size or modification time changes.
+        """
+        if self.path and self.thread is None:
+            self.thread = threading.Thread(target=self.poll, args=(interval,), name='config-watch', daemon=True)
+            self.thread.start()
+        return self
+
+    def poll(self, interval):
+        while not self.stopped.wait(interval):
+            if self.file_stamp() == self.stamp:
+                continue
+            try:
+                self.load()
+            except (OSError, ValueError) as e:
+                self.stamp = self.file_stamp()  # report a broken file once, not every poll
+                self.notify(error=f"{self.path}: {e}")
+
+    def stop(self):
+        self.stopped.set()
@@ -1,48 +1,92 @@
 import pygame
 import os
-import random
+from audio import AudioEngine
+from config import AUDIO_BUFFER, AUDIO_CHANNELS, KEYPRESS_VOICES
+
+SOUND_DIR = "Assets/sounds/"
+KEYPRESS_SOUNDS = ('KeyPress1', 'KeyPress2', 'KeyPress3')
+
+
+def sound_files(sound_dir=SOUND_DIR):
+    """Return {name: path} for the sound files in a directory."""
+    if not os.path.exists(sound_dir):
+        return {}
+    return {file.split('.')[0]: os.path.join(sound_dir, file)
+            for file in os.listdir(sound_dir) if file.endswith(('.wav', '.ogg', '.mp3'))}
 
 class SoundManager:
-    def __init__(self):
+    def __init__(self, assets=None):
         self.sounds = {}
+        self.pending = {}  # name -> path of sounds still loading in the asset manager
+        self.assets = assets
         self.enabled = True
+        self.engine = AudioEngine(AUDIO_CHANNELS, KEYPRESS_VOICES, AUDIO_BUFFER)
+        self.keypress_sounds = []  # loaded keypress sounds, rebuilt only while some are still loading
         self.load_sounds()
+        self.refresh_keypress_sounds()
     
     def load_sounds(self):
-        """Load all sound files from the Assets/sounds directory."""
-        sound_dir = "Assets/sounds/"
-        if os.path.exists(sound_dir):
-            for file in os.listdir(sound_dir):
-                if file.endswith(('.wav', '.ogg', '.mp3')):
-                    name = file.split('.')[0]
-                    try:
-                        self.sounds[name] = pygame.mixer.Sound(os.path.join(sound_dir, file))
-                        print(f"Loaded sound: {name}")
-                    except Exception as e:
-                        print(f"Failed to load sound {name}: {e}")
-        else:
-            print(f"Sound directory {sound_dir} not found")
-    
-    def play(self, sound_name):
-        """Play a specific sound by name."""
-        if self.enabled and sound_name in self.sounds:
+        """Load all sound files from the Assets/sounds directory, in the background if an asset manager is set."""
+        files = sound_files()
+        if not files:
+            print(f"Sound directory {SOUND_DIR} not found")
+        for name, path in files.items():
+            if self.assets is not None:
+                self.assets.load_sound(path)
+                self.pending[name] = path
+                continue
+            try:
+                self.sounds[name] = pygame.mixer.Sound(path)
+            except Exception as e:
+                print(f"Failed to load sound {name}: {e}")
+    
+    def get(self, sound_name, wait=False):
+        """Return a loaded sound, or None while it is still loading unless wait is set."""
+        sound = self.sounds.get(sound_name)
+        if sound is None and sound_name in self.pending:
             try:
-                self.sounds[sound_name].play()
+                sound = self.assets.sound(self.pending[sound_name], wait)
+            except Exception as e:
+                print(f"Failed to load sound {sound_name}: {e}")
+                del self.pending[sound_name]
+                return None
+            if sound is not None:
+                self.sounds[sound_name] = sound
+                del self.pending[sound_name]
+        return sound
+    
+    def play(self, sound_name, wait=False):
+        """Play a specific sound by name, right away on a pooled mixer channel."""
+        if not self.enabled:
+            return
+        sound = self.get(sound_name, wait)
+        if sound is not None:
+            try:
+                self.engine.play(sound)
             except Exception as e:
                 print(f"Failed to play sound {sound_name}: {e}")
     
     def play_random_keypress(self):
-        """Play a random keypress sound from the available options."""
-        keypress_sounds = ['Keypress1', 'KeyPress2', 'KeyPress3']
-        available_sounds = [s for s in keypress_sounds if s in self.sounds]
-        
-        if available_sounds:
-            random_sound = random.choice(available_sounds)
-            self.play(random_sound)
+        """Request a keypress sound; keypresses of one frame share a single voice."""
+        if self.enabled:
+            self.engine.keypress()
+    
+    def refresh_keypress_sounds(self):
+        """Rebuild the list of loaded keypress sounds."""
+        self.keypress_sounds = [sound for sound in map(self.get, KEYPRESS_SOUNDS) if sound is not None]
+    
+    def update(self):
+        """Start the keypress sound requested this frame, if any. Called once per frame."""
+        if self.engine.keypresses and any(name in self.pending for name in KEYPRESS_SOUNDS):
+            self.refresh_keypress_sounds()
+        try:
+            self.engine.update(self.keypress_sounds)
+        except Exception as e:
+            print(f"Failed to play keypress sound: {e}")
     
     def play_startup(self):
         """Play the computer startup sound."""
-        self.play('ComputerStart')
+        self.play('ComputerStart', wait=True)
     
     def toggle_sound(self):
         """Toggle sound on/off."""
@@ -1,16 +1,118 @@
 import pygame
 import time
-import random
-from config import GLITCHY_TEXT, GLITCH_CHANCE, ENABLE_CORRUPTION, CORRUPTION_CHANCE, CORRUPTION_DURATION, CORRUPTION_INTENSITY, CORRUPTION_BLOCK_SIZE
-from effects import apply_text_glitch, corrupt_surface
+from config import GLITCHY_TEXT, GLITCH_CHANCE, ENABLE_CORRUPTION, CORRUPTION_CHANCE, CORRUPTION_DURATION, CORRUPTION_INTENSITY, CORRUPTION_BLOCK_SIZE, \
+    SPLASH_FPS, SPLASH_GLITCH_RATE, SPLASH_CORRUPT_VARIANTS
+from effects import apply_text_glitch, corrupt_surface, rng
+
+def check_quit(event):
+    """
+    Quits on window close or Escape, as every splash screen does.
+    """
+    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+        pygame.quit()
+        exit()
+
+def wait_until(deadline):
+    """
+    Handles events until the deadline (a time.time() value), sleeping in between.
+    """
+    while True:
+        for event in pygame.event.get():
+            check_quit(event)
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        event = pygame.event.wait(max(1, int(remaining * 1000)))
+        if event.type != pygame.NOEVENT:
+            check_quit(event)
+
+class Timeline:
+    """
+    Declarative splash animation. Layers are (key, draw) pairs, drawn in order:
+    key(t) returns a hashable state for time t (None hides the layer) and
+    draw(surface, state) blits that state from pre-rendered surfaces.
+    compile() samples every key once at SPLASH_FPS and keeps only the times some
+    state changes, so play() composes and flips at those keyframes and sleeps in
+    between. Random effects are scheduled when the timeline is built, so keys
+    are pure functions of t.
+    """
+    def __init__(self, duration, fps=SPLASH_FPS):
+        self.duration = duration
+        self.fps = fps
+        self.layers = []
+
+    def add(self, key, draw):
+        self.layers.append((key, draw))
+        return self
+
+    def states(self, t):
+        return tuple(key(t) for key, _ in self.layers)
+
+    def compose(self, surface, states):
+        for (_, draw), state in zip(self.layers, states):
+            if state is not None:
+                draw(surface, state)
+
+    def frame(self, surface, t):
+        """
+        Composes the frame at t seconds in.
+        """
+        self.compose(surface, self.states(t))
+
+    def compile(self):
+        """
+        Returns [(t, states)] for every keyframe.
+        """
+        keyframes = []
+        last = None
+        for i in range(int(self.duration * self.fps) + 1):
+            t = i / self.fps
+            states = self.states(t)
+            if states != last:
+                keyframes.append((t, states))
+                last = states
+        return keyframes
+
+    def play(self, screen):
+        """
+        Plays the timeline on the screen. Keyframes already due when the previous
+        one is shown are skipped, so slow hardware drops frames instead of lagging.
+        """
+        keyframes = self.compile()
+        start = time.time()
+        i = 0
+        while i < len(keyframes):
+            wait_until(start + keyframes[i][0])
+            elapsed = time.time() - start
+            while i + 1 < len(keyframes) and keyframes[i + 1][0] <= elapsed:
+                i += 1
+            self.compose(screen, keyframes[i][1])
+            pygame.display.flip()
+            i += 1
+        wait_until(start + self.duration)
+
+def glitch_schedule(duration, chance):
+    """
+    Returns one random draw per SPLASH_GLITCH_RATE tick of the duration, True
+    with the given chance.
+    """
+    return [rng.random() < chance for _ in range(int(duration * SPLASH_GLITCH_RATE) + 1)]
+
+def glitch_tick(t):
+    return int(t * SPLASH_GLITCH_RATE)
 
 class SplashScreen:
     """
     Animated splash/boot screen for the CRT terminal.
     Shows a fake BIOS/boot sequence with typewriter text, flicker, and a progress bar.
+    Each animation is a Timeline over text and logo variants rendered once and cached.
     """
-    def __init__(self, screen, font, colors, duration=6.0):
+    logo_path = "Assets/logo.png"
+    prompt = "press enter to continue"
+
+    def __init__(self, screen, font, colors, duration=6.0, assets=None):
         self.screen = screen
+        self.assets = assets  # optional AssetManager that shares and caches the scaled logo
         self.font = font
         self.colors = colors
         self.duration = duration
@@ -29,166 +131,224 @@ class SplashScreen:
         self.progress_bar_length = 32
         self.bg_color = self.colors['bg']
         self.text_color = self.colors['text']
+        # Rendered text by (text, flicker); boot lines, bar states and prompts repeat
+        self.text_cache = {}
+        self.timelines = {}
 
-    def show_logo_intro(self, logo_path="Assets/logo.png", intro_duration=2.8):
-        clock = pygame.time.Clock()
+    def render_text(self, text, flicker=False):
+        surf = self.text_cache.get((text, flicker))
+        if surf is None:
+            if flicker:
+                color = (self.text_color[0], self.text_color[1], self.text_color[2], 180)
+            else:
+                color = self.text_color
+            surf = self.font.render(text, True, color)
+            # Glitched strings rarely repeat; keep the cache from growing without bound
+            if len(self.text_cache) > 512:
+                self.text_cache.clear()
+            self.text_cache[(text, flicker)] = surf
+        return surf
+
+    def glitch(self, text):
+        return apply_text_glitch(text, GLITCH_CHANCE) if GLITCHY_TEXT else text
+
+    def fill(self, surface, state):
+        surface.fill(self.bg_color)
+
+    def logo_fit(self):
+        """
+        Returns the box the logo is scaled down to fit.
+        """
         w, h = self.screen.get_size()
-        # Load logo
+        return w // 2, h // 3
+
+    def load_logo(self, logo_path=None):
+        """
+        Loads the logo scaled to fit the top of the screen, or None if it is missing.
+        """
+        logo_path = logo_path or self.logo_path
         try:
+            if self.assets is not None:
+                return self.assets.image(logo_path, self.logo_fit())
             logo = pygame.image.load(logo_path).convert_alpha()
         except Exception:
-            logo = None
-        if logo:
-            max_w, max_h = w // 2, h // 3
-            scale = min(max_w / logo.get_width(), max_h / logo.get_height(), 1.0)
-            logo = pygame.transform.smoothscale(logo, (int(logo.get_width()*scale), int(logo.get_height()*scale)))
-        start_time = time.time()
-        running = True
+            return None
+        max_w, max_h = self.logo_fit()
+        scale = min(max_w / logo.get_width(), max_h / logo.get_height(), 1.0)
+        return pygame.transform.smoothscale(logo, (int(logo.get_width()*scale), int(logo.get_height()*scale)))
+
+    def logo_variants(self, logo):
+        """
+        Returns the logo over the background, plain and inverted, and
+        SPLASH_CORRUPT_VARIANTS corrupted copies of each, all rendered once.
+        """
+        inverse_logo = logo.copy()
+        arr = pygame.surfarray.pixels3d(inverse_logo)
+        arr[:, :, :] = 255 - arr[:, :, :]
+        del arr  # Unlock the surface!
+        # Only the logo is inverted; both are drawn over the plain background
+        plain, inverted = pygame.Surface(logo.get_size()), pygame.Surface(logo.get_size())
+        for surf, source in ((plain, logo), (inverted, inverse_logo)):
+            surf.fill(self.bg_color)
+            surf.blit(source, (0, 0))
+        variants = {}
+        for inverse, base in ((False, plain), (True, inverted)):
+            variants[inverse, None] = base
+            if ENABLE_CORRUPTION:
+                for k in range(SPLASH_CORRUPT_VARIANTS):
+                    variants[inverse, k] = corrupt_surface(base, intensity=CORRUPTION_INTENSITY, block_size=CORRUPTION_BLOCK_SIZE)
+        return variants
+
+    def logo_timeline(self, logo, intro_duration=2.8):
+        """
+        The logo intro: a wipe reveal of the jittering logo (flashing inverted and
+        corrupting now and then) over an animated 'parsing memory fragments' line.
+        """
+        w, h = self.screen.get_size()
         dot_states = [".", "..", "..."]
         wipe_duration = 0.7
-        # Corruption effect state for splash
-        corruption_active = False
-        corruption_end_time = 0.0
-        while running:
-            now = time.time()
-            elapsed = now - start_time
-            # --- Corruption logic ---
+        timeline = Timeline(intro_duration)
+        timeline.add(lambda t: 0, self.fill)
+        ticks = int(intro_duration * SPLASH_GLITCH_RATE) + 1
+        if logo:
+            variants = self.logo_variants(logo)
+            logo_x = (w - logo.get_width()) // 2
+            logo_y = h // 4
+            jitter = [(rng.randint(-1, 1), rng.randint(-1, 1)) for _ in range(ticks)]
+            inverted = glitch_schedule(intro_duration, 0.07)
+            # Corruption bursts last CORRUPTION_DURATION; CORRUPTION_CHANCE is per 60 fps frame
+            corrupted = [None] * ticks
             if ENABLE_CORRUPTION:
-                if not corruption_active and random.random() < CORRUPTION_CHANCE:
-                    corruption_active = True
-                    corruption_end_time = now + CORRUPTION_DURATION
-                if corruption_active and now > corruption_end_time:
-                    corruption_active = False
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    exit()
-            self.screen.fill(self.bg_color)
-            # --- Screen wipe animation ---
-            if logo:
-                logo_x = (w - logo.get_width()) // 2
-                logo_y = h // 4
-                offset_x = random.randint(-1, 1)
-                offset_y = random.randint(-1, 1)
-                logo_surf = logo.copy()
-                if random.random() < 0.07:
-                    arr = pygame.surfarray.pixels3d(logo_surf)
-                    arr[:, :, :] = 255 - arr[:, :, :]
-                    del arr  # Unlock the surface!
-                temp_surf = pygame.Surface(logo_surf.get_size(), pygame.SRCALPHA)
-                temp_surf.fill(self.bg_color)
-                temp_surf.blit(logo_surf, (0, 0))
-                # Apply corruption to logo if active
-                if corruption_active:
-                    temp_surf = corrupt_surface(temp_surf, intensity=CORRUPTION_INTENSITY, block_size=CORRUPTION_BLOCK_SIZE)
-                # Wipe reveal
-                if elapsed < wipe_duration:
-                    wipe_height = int(logo_surf.get_height() * (elapsed / wipe_duration))
-                    if wipe_height > 0:
-                        logo_crop = temp_surf.subsurface((0, 0, temp_surf.get_width(), wipe_height)).copy()
-                        self.screen.blit(logo_crop, (logo_x + offset_x, logo_y + offset_y))
-                else:
-                    self.screen.blit(temp_surf, (logo_x + offset_x, logo_y + offset_y))
-            # Animated text at bottom
-            dots = dot_states[int((elapsed * 2) % 3)]
-            base_text = f"parsing memory fragments{dots}"
-            if GLITCHY_TEXT:
-                base_text = apply_text_glitch(base_text, GLITCH_CHANCE)
-            text_surf = self.font.render(base_text, True, self.text_color)
-            self.screen.blit(text_surf, ((w - text_surf.get_width()) // 2, h - self.font.get_height() - 40))
-            pygame.display.flip()
-            clock.tick(60)
-            if elapsed > intro_duration:
-                running = False
+                start_chance = 1 - (1 - CORRUPTION_CHANCE) ** (60 / SPLASH_GLITCH_RATE)
+                burst = max(1, int(CORRUPTION_DURATION * SPLASH_GLITCH_RATE))
+                i = 0
+                while i < ticks:
+                    if rng.random() < start_chance:
+                        k = rng.randrange(SPLASH_CORRUPT_VARIANTS)
+                        corrupted[i:i + burst] = [k] * len(corrupted[i:i + burst])
+                        i += burst
+                    else:
+                        i += 1
 
-    def show_press_enter_screen(self, sound_manager=None):
-        clock = pygame.time.Clock()
+            def logo_key(t):
+                i = glitch_tick(t)
+                rows = logo.get_height() if t >= wipe_duration else int(logo.get_height() * (t / wipe_duration))
+                if rows <= 0:
+                    return None
+                return rows, jitter[i], inverted[i], corrupted[i]
+
+            def draw_logo(surface, state):
+                rows, (dx, dy), inverse, k = state
+                surface.blit(variants[inverse, k], (logo_x + dx, logo_y + dy), (0, 0, logo.get_width(), rows))
+
+            timeline.add(logo_key, draw_logo)
+        # Animated text at bottom
+        texts = [self.glitch(f"parsing memory fragments{dot_states[int((i / SPLASH_GLITCH_RATE * 2) % 3)]}")
+                 for i in range(ticks)]
+
+        def draw_text(surface, text):
+            surf = self.render_text(text)
+            surface.blit(surf, ((w - surf.get_width()) // 2, h - self.font.get_height() - 40))
+
+        timeline.add(lambda t: texts[glitch_tick(t)], draw_text)
+        return timeline
+
+    def show_logo_intro(self, logo_path=None, intro_duration=2.8):
+        self.logo_timeline(self.load_logo(logo_path), intro_duration).play(self.screen)
+
+    def draw_logo_frame(self, logo, elapsed):
+        """
+        Draws one frame of the logo intro, elapsed seconds in.
+        """
+        key = ('logo', id(logo), self.screen.get_size())
+        if key not in self.timelines:
+            self.timelines[key] = self.logo_timeline(logo)
+        self.timelines[key].frame(self.screen, elapsed)
+
+    def draw_static(self, surf):
+        self.screen.fill(self.bg_color)
         w, h = self.screen.get_size()
-        waiting = True
-        prompt = "press enter to continue"
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        # Play startup sound when Enter is pressed
-                        if sound_manager:
-                            sound_manager.play_startup()
-                        waiting = False
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.quit()
-                        exit()
-            self.screen.fill(self.bg_color)
-            surf = self.font.render(prompt, True, self.text_color)
-            self.screen.blit(surf, ((w - surf.get_width()) // 2, (h - surf.get_height()) // 2))
-            pygame.display.flip()
-            clock.tick(60)
+        self.screen.blit(surf, ((w - surf.get_width()) // 2, (h - surf.get_height()) // 2))
+        pygame.display.flip()
 
-    def run(self):
-        clock = pygame.time.Clock()
-        start_time = time.time()
-        fade = 0
+    def show_press_enter_screen(self, sound_manager=None):
+        """
+        Shows the prompt once and sleeps until Enter, redrawing only when the
+        window needs it.
+        """
+        surf = self.render_text(self.prompt)
+        self.draw_static(surf)
+        while True:
+            event = pygame.event.wait()
+            check_quit(event)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                # Play startup sound when Enter is pressed
+                if sound_manager:
+                    sound_manager.play_startup()
+                return
+            if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+                self.draw_static(surf)
+
+    def boot_timeline(self):
+        """
+        The boot sequence: fade in, typewriter lines (glitching and flickering),
+        then a progress bar.
+        """
         fade_in_time = 0.7
         line_delay = 0.32
         progress_time = 2.2
-        lines_shown = 0
-        progress = 0
         w, h = self.screen.get_size()
         margin = 32
         bar_y = h // 2 + 80
-        running = True
-        while running:
-            now = time.time()
-            elapsed = now - start_time
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    exit()
-            self.screen.fill(self.bg_color)
-            # Fade in
-            if elapsed < fade_in_time:
-                fade = int(255 * (1 - elapsed / fade_in_time))
-            else:
-                fade = 0
-            # Typewriter lines
-            lines_shown = min(int((elapsed - fade_in_time) / line_delay), len(self.boot_lines))
+        bar_start = fade_in_time + line_delay * len(self.boot_lines)
+        timeline = Timeline(self.duration)
+        timeline.add(lambda t: 0, self.fill)
+        # Each line's glitched text and flicker for every tick
+        ticks = int(self.duration * SPLASH_GLITCH_RATE) + 1
+        lines = [[(self.glitch(line), rng.random() < 0.07) for line in self.boot_lines] for _ in range(ticks)]
+
+        def lines_key(t):
+            shown = min(int((t - fade_in_time) / line_delay), len(self.boot_lines))
+            return tuple(lines[glitch_tick(t)][:shown]) if shown > 0 else None
+
+        def draw_lines(surface, state):
             y = h // 2 - 100
-            for i in range(lines_shown):
-                line = self.boot_lines[i]
-                # Glitch effect
-                if GLITCHY_TEXT:
-                    line = apply_text_glitch(line, GLITCH_CHANCE)
-                # Flicker effect
-                if random.random() < 0.07:
-                    color = (self.text_color[0], self.text_color[1], self.text_color[2], 180)
-                else:
-                    color = self.text_color
-                surf = self.font.render(line, True, color)
-                self.screen.blit(surf, (margin, y))
+            for text, flicker in state:
+                surface.blit(self.render_text(text, flicker), (margin, y))
                 y += self.font.get_height() + 4
-            # Progress bar
-            if elapsed > fade_in_time + line_delay * len(self.boot_lines):
-                progress = min(1.0, (elapsed - (fade_in_time + line_delay * len(self.boot_lines))) / progress_time)
-                bar_w = int(self.progress_bar_length * progress)
-                bar_str = '[' + '=' * bar_w + ' ' * (self.progress_bar_length - bar_w) + ']'
-                surf = self.font.render(bar_str, True, self.text_color)
-                self.screen.blit(surf, (margin, bar_y))
-            # Fade overlay
-            if fade > 0:
-                overlay = pygame.Surface((w, h))
-                overlay.set_alpha(fade)
-                overlay.fill(self.bg_color)
-                self.screen.blit(overlay, (0, 0))
-            pygame.display.flip()
-            clock.tick(60)
-            # End after duration
-            if elapsed > self.duration:
-                running = False 
\ No newline at end of file
+
+        def bar_key(t):
+            if t <= bar_start:
+                return None
+            progress = min(1.0, (t - bar_start) / progress_time)
+            return int(self.progress_bar_length * progress)
+
+        def draw_bar(surface, bar_w):
+            bar_str = '[' + '=' * bar_w + ' ' * (self.progress_bar_length - bar_w) + ']'
+            surface.blit(self.render_text(bar_str), (margin, bar_y))
+
+        overlay = pygame.Surface((w, h))
+        overlay.fill(self.bg_color)
+
+        def fade_key(t):
+            fade = int(255 * (1 - t / fade_in_time)) if t < fade_in_time else 0
+            return fade or None
+
+        def draw_fade(surface, fade):
+            overlay.set_alpha(fade)
+            surface.blit(overlay, (0, 0))
+
+        timeline.add(lines_key, draw_lines).add(bar_key, draw_bar).add(fade_key, draw_fade)
+        return timeline
+
+    def run(self):
+        self.boot_timeline().play(self.screen)
+
+    def draw_boot_frame(self, elapsed):
+        """
+        Draws one frame of the boot sequence, elapsed seconds in.
+        """
+        key = ('boot', self.screen.get_size())
+        if key not in self.timelines:
+            self.timelines[key] = self.boot_timeline()
+        self.timelines[key].frame(self.screen, elapsed)
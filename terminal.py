@@ -1,186 +1,612 @@
+import os
+import time
 import pygame
 import sys
-import time
-import random
-from config import COLOR_SCHEME, COLOR_PRESETS, FONT_NAME, FONT_SIZE, TEXT_SPEED, \
-    ENABLE_SCANLINES, ENABLE_NOISE, ENABLE_GLOW, ENABLE_WARP, ENABLE_FLICKER, ENABLE_JITTER, \
-    SCANLINE_OPACITY, NOISE_OPACITY, GLOW_RADIUS, JITTER_AMOUNT, FLICKER_INTENSITY, \
-    GLITCHY_TEXT, GLITCH_CHANCE, \
-    ENABLE_CORRUPTION, CORRUPTION_CHANCE, CORRUPTION_DURATION, CORRUPTION_INTENSITY, CORRUPTION_BLOCK_SIZE
-from effects import apply_scanlines, apply_noise, apply_glow, jitter_rect, flicker_alpha, apply_text_glitch, corrupt_surface
+from collections import deque
+from config import COLOR_PRESETS, FONT_NAME, FONT_SIZE, NOISE_BANK_FRAMES, NOISE_BANK_TILE, CORRUPTION_BANK_MAPS, \
+    GLYPH_CACHE_MB, EFFECT_WORKERS, EFFECT_PIPELINING, ENABLE_ARCHIVE, ARCHIVE_DIR, HEADLESS, \
+    PROFILER_ENABLED, PERF_HUD, PROFILER_FRAMES, QUALITY_GOVERNOR, CONFIG_FILE, CONFIG_POLL_INTERVAL, \
+    ASSET_CACHE_DIR, ASSET_WORKERS, AUDIO_BUFFER, KEY_REPEAT_DELAY, KEY_REPEAT_INTERVAL, \
+    PLUGIN_DIR, PLUGIN_INDEX, PLUGIN_ENTRY_POINTS, SESSIONS, MAX_SESSIONS, STREAM_LINES_PER_FRAME, \
+    REMOTE_LISTEN, REMOTE_WORKERS, REMOTE_BATCH_LINES, REMOTE_BATCH_MS, REMOTE_COMPRESS_MIN, REMOTE_QUEUE_FRAMES, \
+    REMOTE_MIRROR_LINES
+from effects import EffectContext, NoiseBank, CorruptionBank, PostProcessPipeline, AsyncPostProcessor, GlowStage, ScanlineStage, NoiseStage, FlickerStage, \
+    CorruptionStage, JitterStage, WarpStage, flicker_alpha, expand_rect, merge_rects
+from glyphs import GlyphAtlas, LineCache
+from ansi import style_at
+from settings import RuntimeConfig
+from plan import RenderPlan
+from editor import clipboard_text
+from session import Session, tile
+from profiler import FrameProfiler, PerfHud
+from governor import QualityGovernor
+from registry import discover
 from commands import CommandHandler
+from server import RemoteServer
 from splash import SplashScreen
 from sounds import SoundManager
+from assets import AssetManager
+from audio import configure_mixer
+
+# Posted by RuntimeConfig listeners (any thread) so settings change between frames
+SETTINGS_CHANGED = pygame.event.custom_type()
+
+# Settings that need the effect pipeline rebuilt
+PIPELINE_SETTINGS = {
+    'color_scheme', 'enable_scanlines', 'enable_noise', 'enable_glow', 'enable_warp', 'enable_flicker',
+    'enable_jitter', 'enable_corruption', 'scanline_opacity', 'noise_opacity', 'glow_radius', 'jitter_amount',
+    'flicker_intensity', 'warp_amount', 'corruption_chance', 'corruption_duration', 'corruption_intensity',
+    'corruption_block_size',
+}
 
 class Terminal:
     """
     CRT Terminal main class. Handles UI, input, output, and effects.
+    Hosts one or more independent sessions tiled in panes (F2 opens one, F4
+    closes the active one, F6 or a click moves the focus). Sessions draw into a
+    shared text layer through one glyph cache, repainting only rows that changed,
+    and the CRT effects run once over the composed screen.
+    Runtime settings (RuntimeConfig, changed by its file or the 'set' and 'theme'
+    commands) are compiled into a RenderPlan that the frame loop just follows.
     """
-    def __init__(self, width=960, height=600, screen=None):
+    def __init__(self, width=960, height=600, screen=None, archive_dir=ARCHIVE_DIR if ENABLE_ARCHIVE else None,
+                 assets=None, sessions=SESSIONS, settings=None, sound_manager=None):
+        configure_mixer(buffer=AUDIO_BUFFER)
         pygame.init()
         pygame.display.set_caption("Cyberpunk CRT Terminal")
+        pygame.key.set_repeat(KEY_REPEAT_DELAY, KEY_REPEAT_INTERVAL)
+        pygame.key.start_text_input()
         if screen is not None:
             self.screen = screen
         else:
             self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(FONT_NAME, FONT_SIZE)
-        self.colors = COLOR_PRESETS[COLOR_SCHEME]
-        self.input_line = ''
-        self.output_lines = []
-        self.max_lines = 100
-        self.command_handler = CommandHandler()
-        self.typing_buffer = []
-        self.typing_index = 0
-        self.typing_time = 0
+        # Fonts and sounds are shared with the splash screen through the asset manager
+        self.assets = assets
+        self.font = self.load_font(FONT_SIZE)
+        self.settings = settings if settings is not None else RuntimeConfig()
+        self.settings.listeners.append(self.settings_changed)
+        self.colors = COLOR_PRESETS[self.settings['color_scheme']]
         self.sim_delay = 0.2  # Simulated command delay (seconds)
         self.running = True
-        self.prompt = '> '
-        self.scroll_offset = 0
         self.line_height = self.font.get_height() + 2
+        # Glyph atlas and rendered line cache, shared by every session
+        self.glyphs = GlyphAtlas(self.font)
+        self.line_cache = LineCache(self.glyphs, GLYPH_CACHE_MB * 1024 * 1024)
         self.margin = 16
-        # Corruption effect state
-        self.corruption_active = False
-        self.corruption_end_time = 0.0
-        # Sound manager
-        self.sound_manager = SoundManager()
+        # Damage tracking state ('full' redraws every frame, 'damage' only changed regions)
+        self.effects = EffectContext(self.screen.get_size())
+        self.damage = []
+        self.repaint = True  # post-process and present the whole frame next time
+        self.corrupted_rects = []
+        # Noise and corruption are drawn from pre-generated banks (noise is built in the background)
+        self.noise_bank = NoiseBank(NOISE_BANK_FRAMES, NOISE_BANK_TILE)
+        self.corruption_bank = CorruptionBank(CORRUPTION_BANK_MAPS)
+        self.effects.noise_bank = self.noise_bank
+        self.pipeline = self.build_pipeline()
+        # Optionally overlap frame N's effects with composing frame N+1
+        self.async_fx = AsyncPostProcessor(self.pipeline) if EFFECT_PIPELINING else None
+        self.frame_parity = 0
+        # Effect quality follows what the hardware sustains; idle frames are throttled
+        self.governor = QualityGovernor(self.pipeline, self.settings['target_fps']) if QUALITY_GOVERNOR else None
+        self.plan = None
+        self.perf_hud = None
+        self.replan()
+        # Milliseconds since startup; recordings substitute a virtual clock
+        self.ticks = pygame.time.get_ticks
+        self.last_activity = 0
+        self.rows_animated = False
+        # Frame profiler and its HUD (F3); both cost next to nothing while off
+        self.profiler = FrameProfiler(PROFILER_FRAMES, PROFILER_ENABLED or PERF_HUD)
+        self.profiler.hud = PERF_HUD
+        self.perf_hud = PerfHud(self.load_font(max(10, FONT_SIZE // 2)), self.plan.budget_ms)
+        self.hud_shown = False
+        self.hud_rect = None
+        # Sound manager: the one that played the splash sounds when given, so there is one audio engine
+        self.sound_manager = sound_manager if sound_manager is not None else SoundManager(assets)
+        # Sessions, one per pane; plugin commands are discovered once and shared
+        self.plugins = discover(PLUGIN_DIR, PLUGIN_INDEX, PLUGIN_ENTRY_POINTS)
+        self.archive_dir = archive_dir
+        self.archive_stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+        self.session_count = 0
+        self.sessions = []
+        self.closed = []  # sessions closed this frame, shut down at the end of update()
+        self.active = 0
+        self.panes_dirty = True  # panes must be tiled and repainted
+        for _ in range(max(1, sessions)):
+            self.open_session()
+        # Remote clients get their own command handler; their traffic is mirrored
+        # into the first pane through a bounded queue drained by update()
+        self.remote = None
+        self.remote_lines = deque(maxlen=REMOTE_MIRROR_LINES)
+        if REMOTE_LISTEN:
+            self.serve(REMOTE_LISTEN)
 
-    def add_output(self, text, flicker=False):
+    def load_font(self, size):
+        if self.assets is not None:
+            return self.assets.font(FONT_NAME, size)
+        return pygame.font.Font(FONT_NAME, size)
+
+    # --- Sessions (panes) ---
+    @property
+    def session(self):
         """
-        Adds text (or list of lines) to output history.
+        The session that has the keyboard focus.
         """
-        if isinstance(text, str):
-            lines = text.split('\n')
-        else:
-            lines = text
-        for line in lines:
-            self.output_lines.append({'text': line, 'flicker': flicker})
-        if len(self.output_lines) > self.max_lines:
-            self.output_lines = self.output_lines[-self.max_lines:]
-        self.scroll_offset = 0
-
-    def handle_command(self, line):
-        self.add_output(self.prompt + line, flicker=True)
-        time.sleep(self.sim_delay)  # Simulated delay
-        output = self.command_handler.handle(line)
-        self.add_output(output)
-        if line.strip().lower() == 'exit':
+        return self.sessions[self.active]
+
+    def open_session(self):
+        """
+        Opens a new session in a new pane and gives it the focus.
+        """
+        if len(self.sessions) >= MAX_SESSIONS:
+            return None
+        self.session_count += 1
+        # The first session keeps the plain archive name of a single-pane terminal
+        name = self.archive_stamp if self.session_count == 1 else f'{self.archive_stamp}-{self.session_count}'
+        session = Session(self, self.plugins, self.archive_dir, name)
+        self.sessions.append(session)
+        self.active = len(self.sessions) - 1
+        self.panes_dirty = True
+        return session
+
+    def close_session(self, session):
+        """
+        Closes a session and its pane; closing the last one quits the terminal.
+        """
+        if session not in self.sessions:
+            return
+        if len(self.sessions) == 1:
             self.running = False
+            return
+        index = self.sessions.index(session)
+        self.sessions.remove(session)
+        # Shut down after this frame's update: 'exit' closes its session from inside it
+        self.closed.append(session)
+        if self.active >= index:
+            self.active = max(0, self.active - 1)
+        self.panes_dirty = True
+
+    def focus(self, index):
+        self.active = index % len(self.sessions)
+
+    def session_at(self, pos):
+        for i, session in enumerate(self.sessions):
+            if session.rect.collidepoint(pos):
+                return i
+        return None
+
+    def close(self):
+        if self.settings_changed in self.settings.listeners:
+            self.settings.listeners.remove(self.settings_changed)
+        if self.remote is not None:
+            self.remote.stop()
+        for session in self.sessions + self.closed:
+            session.close()
+
+    # --- Remote clients ---
+    def serve(self, addresses):
+        """
+        Starts serving commands to remote clients on a background event loop.
+        """
+        handler = CommandHandler()
+        for command in self.plugins:
+            handler.add(command)
+        handler.profiler = self.profiler
+        handler.audio = self.sound_manager.engine
+        handler.settings = self.settings
+        self.remote = RemoteServer(handler, addresses, REMOTE_WORKERS, REMOTE_BATCH_LINES, REMOTE_BATCH_MS,
+                                   REMOTE_QUEUE_FRAMES, REMOTE_COMPRESS_MIN,
+                                   on_command=lambda line: self.remote_lines.append(f"remote> {line}"),
+                                   on_output=self.remote_lines.extend)
+        return self.remote.start()
+
+    def mirror_remote(self):
+        lines = []
+        while self.remote_lines and len(lines) < STREAM_LINES_PER_FRAME:
+            lines.append(self.remote_lines.popleft())
+        if lines:
+            self.sessions[0].add_output(lines)
+
+    def add_output(self, text, flicker=False):
+        """
+        Adds text (or list of lines) to the output history of the active session.
+        """
+        self.session.add_output(text, flicker)
+
+    def update(self):
+        for session in list(self.sessions):
+            session.update()
+        if self.remote_lines:
+            self.mirror_remote()
+        while self.closed:
+            self.closed.pop().close()
+        self.sound_manager.update()
 
     def run(self):
+        profiler = self.profiler
         while self.running:
+            start = time.perf_counter()
+            profiler.begin_frame()
             self.handle_events()
+            profiler.lap('events')
+            self.update()
+            profiler.lap('update')
             self.draw()
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.present()
+            profiler.lap('flip')
+            profiler.end_frame()
+            if self.governor is not None:
+                level = self.governor.level
+                self.governor.observe((time.perf_counter() - start) * 1000)
+                if self.governor.level != level:
+                    self.replan()
+                    self.invalidate()
+            if self.is_idle():
+                self.wait_idle()
+            else:
+                self.clock.tick(self.plan.target_fps)
+        self.close()
         pygame.quit()
         sys.exit()
 
+    def is_idle(self):
+        """
+        True when nothing on screen moves on its own: no output arriving, no typing,
+        no animated effect or flickering row, and no input for idle_delay seconds.
+        Random text glitches keep going, at the idle frame rate.
+        """
+        return (not any(session.busy for session in self.sessions) and not self.remote_lines and not self.rows_animated
+                and not self.pipeline.busy and self.async_fx is None
+                and self.ticks() - self.last_activity > self.plan.idle_delay_ms)
+
+    def wait_idle(self):
+        """
+        Sleeps until the next idle frame is due, waking at once on any event.
+        """
+        event = pygame.event.wait(self.plan.idle_wait_ms)
+        if event.type != pygame.NOEVENT:
+            pygame.event.post(event)
+        self.clock.tick()
+
+    # Editing keys whose repeats within a frame are applied as one edit
+    EDIT_KEYS = (pygame.K_BACKSPACE, pygame.K_DELETE, pygame.K_LEFT, pygame.K_RIGHT)
+
     def handle_events(self):
+        """
+        Handles the frame's events as a batch. Typed text (TEXTINPUT) and repeats of
+        an editing key are coalesced into single edits, applied in order whenever
+        another key needs the input line as it stands, and at the end of the frame.
+        Input goes to the active session.
+        """
+        edits = []  # [kind, value]: ['text', [chunks]] or [edit key, count]
         for event in pygame.event.get():
+            self.last_activity = self.ticks()
+            if event.type == pygame.TEXTINPUT:
+                if edits and edits[-1][0] == 'text':
+                    edits[-1][1].append(event.text)
+                else:
+                    edits.append(['text', [event.text]])
+                continue
+            if event.type == pygame.KEYDOWN and event.key in self.EDIT_KEYS:
+                if edits and edits[-1][0] == event.key:
+                    edits[-1][1] += 1
+                else:
+                    edits.append([event.key, 1])
+                continue
+            self.apply_edits(edits)
+            session = self.session
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == SETTINGS_CHANGED:
+                self.apply_settings(event.changed, event.error)
             elif event.type == pygame.VIDEORESIZE:
                 # Only reset display mode if we own the screen
                 if not hasattr(self, '_external_screen'):
                     self.screen = pygame.display.set_mode(event.size, pygame.FULLSCREEN)
+                self.effects.resize(self.screen.get_size())
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                index = self.session_at(event.pos)
+                if index is not None:
+                    self.focus(index)
             elif event.type == pygame.KEYDOWN:
+                ctrl = event.mod & pygame.KMOD_CTRL
+                shift = event.mod & pygame.KMOD_SHIFT
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
-                if event.key == pygame.K_BACKSPACE:
-                    self.input_line = self.input_line[:-1]
+                elif event.key == pygame.K_F3:
+                    self.toggle_hud()
+                elif event.key == pygame.K_F2:
+                    self.open_session()
+                elif event.key == pygame.K_F4:
+                    self.close_session(session)
+                elif event.key == pygame.K_F6:
+                    self.focus(self.active + (-1 if shift else 1))
+                elif event.key == pygame.K_c and ctrl:
+                    session.cancel_commands()
+                elif (event.key == pygame.K_v and ctrl) or (event.key == pygame.K_INSERT and shift):
+                    session.paste(clipboard_text())
                     self.sound_manager.play_random_keypress()
-                elif event.key == pygame.K_RETURN:
-                    line = self.input_line.strip()
-                    if line:
-                        self.handle_command(line)
-                    self.input_line = ''
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                    session.submit_input()
+                elif event.key == pygame.K_TAB:
+                    session.complete_input()
+                elif event.key == pygame.K_UP and shift:
+                    session.scroll(1)
+                elif event.key == pygame.K_DOWN and shift:
+                    session.scroll(-1)
                 elif event.key == pygame.K_UP:
-                    self.scroll_offset = min(self.scroll_offset + 1, max(0, len(self.output_lines) - 1))
+                    session.editor.history_previous()
                 elif event.key == pygame.K_DOWN:
-                    self.scroll_offset = max(self.scroll_offset - 1, 0)
-                elif event.key < 256:
-                    self.input_line += event.unicode
-                    self.sound_manager.play_random_keypress()
+                    session.editor.history_next()
+                elif event.key == pygame.K_PAGEUP:
+                    session.scroll(session.visible_rows)
+                elif event.key == pygame.K_PAGEDOWN:
+                    session.scroll(-session.visible_rows)
+                elif event.key == pygame.K_HOME and ctrl:
+                    session.scroll_to_line(0)
+                elif event.key == pygame.K_END and ctrl:
+                    session.scroll_to_end()
+                elif event.key == pygame.K_HOME:
+                    session.editor.home()
+                elif event.key == pygame.K_END:
+                    session.editor.end()
+        self.apply_edits(edits)
+
+    def apply_edits(self, edits):
+        """
+        Applies the coalesced edits collected by handle_events to the active session.
+        """
+        if not edits:
+            return
+        self.session.apply_edits(edits)
+        edits.clear()
+        self.sound_manager.play_random_keypress()
+
+    def draw_line(self, surface, text, pos, flicker=False, cells=(), runs=None):
+        """
+        Blits a cached line surface, colored by its ANSI style runs, then patches
+        glitched glyph cells on top of it, in the style of the text they replace.
+        """
+        plan = self.plan
+        surf = self.line_cache.get(text, runs, plan.palette)
+        if surf is None:
+            return
+        if flicker:
+            surf.set_alpha(flicker_alpha(255, plan.flicker_intensity))
+            surface.blit(surf, pos)
+            surf.set_alpha(255)
+        else:
+            surface.blit(surf, pos)
+        if cells:
+            cw, ch = self.glyphs.cell_w, self.glyphs.cell_h
+            x, y = pos
+            for i, c in cells:
+                fg, bg = plan.palette.resolve(style_at(runs, i))
+                cell = (x + i * cw, y)
+                surface.fill(bg, (cell[0], cell[1], cw, ch))
+                self.glyphs.blit_glyph(surface, c, fg, cell)
+
+    def toggle_hud(self):
+        profiler = self.profiler
+        profiler.hud = not profiler.hud
+        if profiler.hud and not profiler.enabled:
+            profiler.reset()
+            profiler.enabled = True
+
+    def invalidate(self):
+        """
+        Forces the next frame to be post-processed and presented as a whole.
+        """
+        self.repaint = True
+
+    def build_pipeline(self, effects=None):
+        """
+        Builds the CRT post-processing pipeline from the effect toggles, or from a
+        collection of effect names ('glow', 'scanlines', 'noise', 'flicker',
+        'corruption', 'jitter', 'warp') when given.
+        """
+        s = self.settings.values
+        if effects is None:
+            effects = {name for name in ('glow', 'scanlines', 'noise', 'flicker', 'corruption', 'jitter', 'warp')
+                       if s['enable_' + name]}
+        stages = []
+        if 'glow' in effects:
+            stages.append(GlowStage(self.colors['glow'], max(4, s['glow_radius'] // 2)))
+        # Classic horizontal scanlines
+        if 'scanlines' in effects:
+            stages.append(ScanlineStage(s['scanline_opacity'], spacing=4))
+        if 'noise' in effects:
+            stages.append(NoiseStage(max(16, s['noise_opacity'] // 2), bank=self.noise_bank))
+        if 'flicker' in effects:
+            stages.append(FlickerStage(s['flicker_intensity']))
+        if 'corruption' in effects:
+            stages.append(CorruptionStage(s['corruption_intensity'], s['corruption_block_size'],
+                                          s['corruption_chance'], s['corruption_duration'], self.corruption_bank))
+        if 'jitter' in effects:
+            stages.append(JitterStage(s['jitter_amount'], self.colors['bg']))
+        if 'warp' in effects:
+            stages.append(WarpStage(s['warp_amount'], self.colors['bg']))
+        return PostProcessPipeline(stages, self.effects, workers=EFFECT_WORKERS)
+
+    def use_pipeline(self, pipeline):
+        """
+        Switches to a (re)built effect pipeline.
+        """
+        old = self.pipeline
+        if self.async_fx is not None:
+            self.async_fx.wait()
+            self.async_fx.pipeline = pipeline
+        self.pipeline = pipeline
+        if self.governor is not None:
+            self.governor.attach(pipeline)
+        if old.executor is not None and old is not pipeline:
+            old.executor.shutdown(wait=False)
+        self.replan()
+        self.invalidate()
+
+    # --- Runtime settings ---
+    def replan(self):
+        """
+        Compiles the current settings and pipeline into the plan the frame loop follows.
+        """
+        self.plan = RenderPlan(self.settings.values, self.pipeline)
+        if self.perf_hud is not None:
+            self.perf_hud.budget_ms = self.plan.budget_ms
+
+    def settings_changed(self, changed, error):
+        pygame.event.post(pygame.event.Event(SETTINGS_CHANGED, changed=changed, error=error))
+
+    def apply_settings(self, changed, error=None):
+        """
+        Applies a settings change between frames: rebuilds what depends on the
+        changed settings, recompiles the plan and repaints.
+        """
+        if error:
+            self.add_output(f"Config error: {error}")
+            return
+        self.colors = COLOR_PRESETS[self.settings['color_scheme']]
+        if self.governor is not None and 'target_fps' in changed:
+            self.governor.budget = 1000.0 / self.settings['target_fps']
+        if changed & PIPELINE_SETTINGS:
+            self.use_pipeline(self.build_pipeline())
+        else:
+            self.replan()
+        # Panes, borders and every row are redrawn in the new palette
+        self.panes_dirty = True
+        self.invalidate()
+
+    def draw_panes(self, layer):
+        """
+        Tiles the panes over the text layer, clears it and draws the pane borders.
+        """
+        w, h = layer.get_size()
+        plan = self.plan
+        layer.fill(plan.bg)
+        border = plan.border
+        for session, rect in zip(self.sessions, tile(len(self.sessions), pygame.Rect(0, 0, w, h))):
+            session.rect = rect
+            session.invalidate()
+            if rect.right < w:
+                layer.fill(border, (rect.right - 1, rect.top, 1, rect.height))
+            if rect.bottom < h:
+                layer.fill(border, (rect.left, rect.bottom - 1, rect.width, 1))
+        self.panes_dirty = False
 
     def draw(self):
-        self.screen.fill(self.colors['bg'])
         w, h = self.screen.get_size()
-        # --- Draw everything to a framebuffer first ---
-        framebuffer = pygame.Surface((w, h))
-        framebuffer.fill(self.colors['bg'])
-        # Draw output lines (scrollable)
-        lines_to_show = (h - self.line_height - self.margin*2) // self.line_height
-        start = max(0, len(self.output_lines) - lines_to_show - self.scroll_offset)
-        end = len(self.output_lines) - self.scroll_offset
-        y = self.margin
-        for i in range(lines_to_show):
-            line_idx = start + i
-            if line_idx < end:
-                line = self.output_lines[line_idx]
-                text = line['text']
-                flicker = line.get('flicker', False) and ENABLE_FLICKER
-                # Apply glitch effect
-                if GLITCHY_TEXT:
-                    text = apply_text_glitch(text, GLITCH_CHANCE)
-            else:
-                text = ''
-                flicker = False
-            color = self.colors['text']
-            alpha = flicker_alpha(255, FLICKER_INTENSITY) if flicker else 255
-            surf = self.font.render(text, True, color)
-            if alpha < 255:
-                surf.set_alpha(alpha)
-            rect = surf.get_rect(topleft=(self.margin, y))
-            framebuffer.blit(surf, rect)
-            y += self.line_height
-        # Draw input line
-        input_text = self.prompt + self.input_line
-        input_surf = self.font.render(input_text, True, self.colors['text'])
-        framebuffer.blit(input_surf, (self.margin, h - self.line_height - self.margin))
-        # --- Effects (apply to framebuffer only) ---
-        if ENABLE_GLOW:
-            apply_glow(framebuffer, self.colors['glow'], max(4, GLOW_RADIUS // 2))
-        # Classic horizontal scanlines
-        if ENABLE_SCANLINES:
-            apply_scanlines(framebuffer, SCANLINE_OPACITY, spacing=4)
-        if ENABLE_NOISE:
-            apply_noise(framebuffer, max(16, NOISE_OPACITY // 2))
-        # --- Corruption effect ---
-        now = pygame.time.get_ticks() / 1000.0
-        if ENABLE_CORRUPTION:
-            if not self.corruption_active and random.random() < CORRUPTION_CHANCE:
-                self.corruption_active = True
-                self.corruption_end_time = now + CORRUPTION_DURATION
-            if self.corruption_active:
-                framebuffer = corrupt_surface(framebuffer, intensity=CORRUPTION_INTENSITY, block_size=CORRUPTION_BLOCK_SIZE)
-                if now > self.corruption_end_time:
-                    self.corruption_active = False
-        # Blit framebuffer to screen
-        self.screen.blit(framebuffer, (0, 0))
+        # --- Compose the sessions' text into the persistent text layer ---
+        if self.effects.resize((w, h)):
+            self.panes_dirty = True
+        if self.profiler.hud != self.hud_shown:
+            # Repaint everything once so the area under a hidden HUD is restored
+            self.hud_shown = self.profiler.hud
+            self.invalidate()
+        layer = self.effects.surface('text', depth=32)
+        damage = []
+        if self.panes_dirty:
+            self.draw_panes(layer)
+            self.invalidate()
+        self.rows_animated = False
+        for i, session in enumerate(self.sessions):
+            damage.extend(session.draw(layer, i == self.active))
+            self.rows_animated = self.rows_animated or session.rows_animated
+        profiler = self.profiler
+        profiler.lap('text')
+        # --- Copy what changed into the framebuffer (all of it when effects animate the whole frame) ---
+        if self.async_fx is not None:
+            # Double-buffered: compose into one buffer while the other is post-processed
+            framebuffer = self.effects.surface(('framebuffer', self.frame_parity), depth=32)
+        else:
+            framebuffer = self.effects.framebuffer
+        full = self.repaint or self.plan.full_frame or self.async_fx is not None
+        self.repaint = False
+        if full:
+            framebuffer.blit(layer, (0, 0))
+            damage = [framebuffer.get_rect()]
+        else:
+            # Regions touched by last frame's whole-frame effects (corruption bands) are restored too
+            damage.extend(self.corrupted_rects)
+            halo = self.plan.pipeline.halo
+            if halo:
+                # Glow spreads a change into its neighbours, which are redrawn with it
+                bounds = framebuffer.get_rect()
+                damage = [expand_rect(rect, halo, self.plan.pipeline.stripe_align, bounds) for rect in damage]
+            # Bands, rows and last frame's bands overlap; each pixel is restored and processed once
+            damage = merge_rects(damage)
+            for rect in damage:
+                framebuffer.blit(layer, rect, rect)
+        # --- Effects (applied in place to the damaged framebuffer regions) ---
+        now = self.ticks() / 1000.0
+        if self.async_fx is not None:
+            done = self.async_fx.submit(framebuffer, damage, now)
+            self.frame_parity ^= 1
+            if done is None:
+                self.damage = []
+                return
+            framebuffer, _ = done
+        else:
+            self.corrupted_rects = self.plan.pipeline.run(framebuffer, damage, now, source=layer)
+            damage.extend(self.corrupted_rects)
+        if profiler.enabled:
+            profiler.lap('effects')
+            for name, ms in self.plan.pipeline.timings.items():
+                profiler.add('fx.' + name, ms)
+        if self.hud_shown:
+            # The HUD is drawn over the screen, so what lies under it is restored every frame
+            hud_rect = self.perf_hud.rect(profiler, (w, h))
+            if self.hud_rect is not None and self.hud_rect != hud_rect:
+                damage.append(self.hud_rect)
+            damage.append(hud_rect)
+            self.hud_rect = hud_rect
+        # Blit damaged regions to screen
+        for rect in damage:
+            self.screen.blit(framebuffer, rect, rect)
+        profiler.lap('blit')
+        if self.hud_shown:
+            self.perf_hud.draw(self.screen, profiler, self.plan.text)
+            profiler.lap('hud')
+        self.damage = damage
+
+    def present(self):
+        """
+        Pushes the frame to the display, updating only damaged regions in damage mode.
+        """
+        if self.plan.render_mode == 'damage':
+            if self.damage:
+                pygame.display.update(self.damage)
+        else:
+            pygame.display.flip()
 
 if __name__ == '__main__':
     # Initialize pygame and create window
+    if HEADLESS:
+        # Render offscreen through SDL's dummy drivers; no window or audio device is opened
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    configure_mixer(buffer=AUDIO_BUFFER)
     pygame.init()
     screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
     
-    # Initialize sound manager
-    from sounds import SoundManager
-    sound_manager = SoundManager()
-    
-    # Show splash/boot screen
-    from config import COLOR_PRESETS, COLOR_SCHEME, FONT_NAME, FONT_SIZE
-    font = pygame.font.Font(FONT_NAME, FONT_SIZE)
-    colors = COLOR_PRESETS[COLOR_SCHEME]
-    splash = SplashScreen(screen, font, colors)
+    # Only the terminal font loads up front; sounds, the HUD font and the scaled
+    # logo load in the background (or come from the disk cache) behind the press enter screen
+    assets = AssetManager(ASSET_CACHE_DIR, ASSET_WORKERS)
+    font = assets.font(FONT_NAME, FONT_SIZE)
+    # Runtime settings: config.py defaults overridden by CONFIG_FILE, reloaded when it changes
+    settings = RuntimeConfig(CONFIG_FILE).watch(CONFIG_POLL_INTERVAL)
+    colors = COLOR_PRESETS[settings['color_scheme']]
+    splash = SplashScreen(screen, font, colors, assets=assets)
+    assets.preload(fonts=[(FONT_NAME, max(10, FONT_SIZE // 2))], images=[(splash.logo_path, splash.logo_fit())])
+    sound_manager = SoundManager(assets)
     
     # Show press enter screen and play startup sound when Enter is pressed
-    splash.show_press_enter_screen(sound_manager)
+    if not HEADLESS:
+        splash.show_press_enter_screen(sound_manager)
     splash.show_logo_intro()
     splash.run()
     
     # Then launch the terminal, reusing the same screen
-    term = Terminal(screen=screen)
+    term = Terminal(screen=screen, assets=assets, settings=settings, sound_manager=sound_manager)
     term.add_output("CYBERPUNK RED TERMINAL ONLINE.")
     term.add_output("Type 'help' for commands.")
     term.run() 
\ No newline at end of file
@@ -0,0 +1,99 @@
+from array import array
+import pygame
+import pytest
+from ansi import (AnsiParser, Palette, apply_sgr, slice_runs, style_at, style_attrs,
+                  BG_SHIFT, BOLD, CONCEAL, COLOR_TABLE, DEFAULT, REVERSE, TRUECOLOR, UNDERLINE)
+from glyphs import GlyphAtlas
+
+RED = 1 + 1
+BLUE = 1 + 4
+
+
+def test_plain_lines_have_no_runs():
+    parser = AnsiParser()
+    assert parser.feed('plain text') == ('plain text', None)
+    assert parser.feed('') == ('', None)
+
+
+def test_feed_splits_text_and_style_runs():
+    parser = AnsiParser()
+    text, runs = parser.feed('\x1b[31mred\x1b[0m and \x1b[1;44mbold\x1b[m')
+    assert text == 'red and bold'
+    assert list(runs) == [0, 3, RED, 3, 5, DEFAULT, 8, 4, BLUE << BG_SHIFT | BOLD << 2 * BG_SHIFT]
+
+
+def test_style_carries_over_to_the_next_line():
+    parser = AnsiParser()
+    assert parser.feed('\x1b[31mstart') == ('start', array('Q', [0, 5, RED]))
+    assert parser.feed('more') == ('more', array('Q', [0, 4, RED]))
+    assert parser.feed('\x1b[0mdone') == ('done', None)
+    parser.feed('\x1b[31m')
+    parser.reset()
+    assert parser.feed('after reset') == ('after reset', None)
+
+
+def test_other_sequences_are_dropped():
+    parser = AnsiParser()
+    assert parser.feed('a\x1b]0;title\x07b\x1b[2Kc\x1b(Bd\x1b') == ('abcd', None)
+    # Adjacent runs of one style are merged
+    assert list(parser.feed('\x1b[31mab\x1b[Kcd')[1]) == [0, 4, RED]
+
+
+def test_apply_sgr():
+    assert apply_sgr(DEFAULT, '31') == RED
+    assert apply_sgr(RED, '') == DEFAULT
+    assert apply_sgr(RED, '39;42') == (1 + 2) << BG_SHIFT
+    assert apply_sgr(DEFAULT, '91') == 1 + 9
+    assert apply_sgr(DEFAULT, '38;5;196') == 1 + 196
+    assert apply_sgr(DEFAULT, '38:2:1:2:3') == TRUECOLOR | 0x010203
+    assert apply_sgr(DEFAULT, '48;2;255;0;999') == (TRUECOLOR | 0xFF00FF) << BG_SHIFT
+    assert apply_sgr(RED, '38;5') == RED  # malformed: ignored
+    styled = apply_sgr(DEFAULT, '1;4;7;8')
+    assert style_attrs(styled) == BOLD | UNDERLINE | REVERSE | CONCEAL
+    assert style_attrs(apply_sgr(styled, '22;24;27;28')) == 0
+
+
+def test_slice_runs():
+    runs = array('Q', [0, 3, RED, 3, 2, DEFAULT, 5, 4, BLUE])
+    assert slice_runs(runs, 0, 9) is runs
+    assert list(slice_runs(runs, 2, 7)) == [0, 1, RED, 1, 2, DEFAULT, 3, 2, BLUE]
+    assert list(slice_runs(runs, 6, 7)) == [0, 1, BLUE]
+    assert slice_runs(runs, 3, 5) is None
+    assert slice_runs(None, 0, 4) is None
+
+
+def test_style_at():
+    runs = array('Q', [0, 3, RED, 5, 4, BLUE])
+    assert [style_at(runs, i) for i in (0, 2, 3, 5, 8, 9)] == [RED, RED, DEFAULT, BLUE, BLUE, DEFAULT]
+    assert style_at(None, 0) == DEFAULT
+
+
+def test_palette_resolves_styles():
+    palette = Palette({'text': (0, 255, 0), 'bg': (0, 0, 0)})
+    assert palette.resolve(DEFAULT) == ((0, 255, 0), (0, 0, 0))
+    assert palette.resolve(RED) == (COLOR_TABLE[1], (0, 0, 0))
+    assert palette.resolve(apply_sgr(DEFAULT, '1;31')) == (COLOR_TABLE[9], (0, 0, 0))
+    assert palette.resolve(apply_sgr(DEFAULT, '7')) == ((0, 0, 0), (0, 255, 0))
+    assert palette.resolve(apply_sgr(DEFAULT, '2')) == ((0, 127, 0), (0, 0, 0))
+    assert palette.resolve(apply_sgr(DEFAULT, '8;44')) == (COLOR_TABLE[4], COLOR_TABLE[4])
+    ramp = palette.ramp(DEFAULT, 4)
+    assert ramp[0] == (0, 0, 0) and ramp[-1] == (0, 255, 0)
+    assert palette.colors((DEFAULT, RED), 4) == ramp + palette.ramp(RED, 4)
+
+
+@pytest.fixture(scope='module')
+def glyphs():
+    pygame.font.init()
+    return GlyphAtlas(pygame.font.Font(None, 16))
+
+
+def test_compose_puts_each_style_in_its_own_slot(glyphs):
+    text, runs = AnsiParser().feed('ab\x1b[31mcd\x1b[4mef')
+    surf, styles, levels = glyphs.compose(text, runs)
+    assert styles == (DEFAULT, RED, RED | UNDERLINE << 2 * BG_SHIFT)
+    assert levels == 16
+    slots = pygame.surfarray.array2d(surf).reshape(len(text), glyphs.cell_w, glyphs.cell_h) // levels
+    assert [set(slots[i].flat) for i in range(len(text))] == [{0}, {0}, {1}, {1}, {2}, {2}]
+    plain, styles, _ = glyphs.compose(text)
+    assert styles == (DEFAULT,)
+    assert pygame.surfarray.array2d(plain).max() < levels
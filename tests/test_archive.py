@@ -0,0 +1,101 @@
+import threading
+from archive import ScrollbackArchive, fold, trigram_bits
+from commands import CommandHandler
+from jobs import CommandRunner
+
+
+def make_archive(tmp_path, lines=(), block_lines=4):
+    archive = ScrollbackArchive(str(tmp_path), 'test', block_lines=block_lines, bloom_bytes=1024)
+    archive.extend(lines)
+    return archive
+
+
+def test_lines_reads_back_what_was_appended(tmp_path):
+    archive = make_archive(tmp_path, [f"line {i}" for i in range(10)])
+    assert len(archive) == 10
+    assert archive.lines(3, 4) == ['line 3', 'line 4', 'line 5', 'line 6']
+    assert archive.lines(8, 10) == ['line 8', 'line 9']
+    assert archive.lines(-2, 3) == ['line 0', 'line 1', 'line 2']
+    assert archive.line(0) == 'line 0'
+    archive.close()
+
+
+def test_search_is_newest_first_and_limited(tmp_path):
+    archive = make_archive(tmp_path, [f"{'match' if i % 3 == 0 else 'other'} {i}" for i in range(30)])
+    assert [n for n, _ in archive.search('MATCH', limit=3)] == [27, 24, 21]
+    assert [n for n, _ in archive.search('match', stop=10)] == [9, 6, 3, 0]
+    assert archive.search('missing') == []
+    archive.close()
+
+
+def test_search_skips_blocks_without_the_query(tmp_path):
+    archive = make_archive(tmp_path, ['alpha'] * 4 + ['beta'] * 4 + ['gamma'] * 4)
+    archive.flush()
+    positions = trigram_bits(fold('beta'), archive.bloom_log2)
+    assert archive._candidate_blocks(positions, 12, archive.flushed) == [1]
+    archive.close()
+
+
+def test_search_folds_non_ascii_case(tmp_path):
+    archive = make_archive(tmp_path, ['ÄRGER IM ÖLWERK', 'x', 'y', 'z', 'tail'])
+    assert archive.search('ärger im öl') == [(0, 'ÄRGER IM ÖLWERK')]
+    assert archive.search('ÖLWERK') == [(0, 'ÄRGER IM ÖLWERK')]
+    archive.close()
+
+
+def test_search_while_appending(tmp_path):
+    archive = make_archive(tmp_path, ['needle 0'], block_lines=64)
+    stop = threading.Event()
+
+    def writer():
+        i = 1
+        while not stop.is_set():
+            archive.extend([f"needle {i}", "hay"])
+            archive.flush()
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(50):
+            for n, text in archive.search('needle', limit=5):
+                assert text == f"needle {text.split()[1]}"
+                assert archive.line(n) == text
+    finally:
+        stop.set()
+        thread.join()
+    archive.close()
+
+
+def test_search_command_ignores_its_own_echo_and_later_output(tmp_path):
+    archive = make_archive(tmp_path, ['found the needle'])
+    handler = CommandHandler()
+    handler.archive = archive
+    jumps = []
+    handler.jump = jumps.append
+    # The echo lands at index 1; a streaming command keeps printing before the search runs
+    archive.extend(['> search needle', 'stream 1', 'stream 2 needle'])
+    output = handler.handle('search needle', origin=1)
+    assert output == ["1 match(es) for 'needle', newest first:", "       0: found the needle"]
+    assert jumps == [0]
+    assert handler.handle('search nothing-here', origin=4) == "No matches for 'nothing-here'."
+    archive.close()
+
+
+def test_multi_line_items_are_split_into_lines(tmp_path):
+    class Handler:
+        def handle(self, line, origin=None):
+            if line == 'list':
+                return ['one', 'two\nthree', 'four', 'five']
+            return (item for item in ['six\nseven', 'eight'])
+
+    runner = CommandRunner(Handler())
+    archive = make_archive(tmp_path)
+    for command in ('list', 'generator'):
+        runner.submit(command)
+        runner.settle()
+        archive.extend(runner.poll())
+    assert archive.lines(0, 8) == ['one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight']
+    assert archive.search('five') == [(4, 'five')]
+    runner.shutdown()
+    archive.close()
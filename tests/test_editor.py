@@ -0,0 +1,94 @@
+import random
+from editor import GapBuffer, InputHistory, LineEditor
+
+
+def test_gap_buffer_edits_at_the_cursor():
+    buf = GapBuffer('hello world', capacity=4)
+    assert (buf.text(), buf.cursor, len(buf)) == ('hello world', 11, 11)
+    buf.move(-6)
+    buf.insert(',')
+    assert (buf.text(), buf.cursor) == ('hello, world', 6)
+    buf.delete(2)
+    buf.backspace(3)
+    assert (buf.text(), buf.cursor) == ('helorld', 3)
+    buf.move(-10)
+    buf.backspace()
+    assert buf.cursor == 0
+    buf.move(100)
+    buf.delete()
+    assert (buf.text(), buf.cursor) == ('helorld', 7)
+    buf.move_to(3)
+    buf.insert('lo w')
+    assert buf.text() == 'hello world'
+    buf.set_text('new')
+    assert (buf.text(), buf.cursor) == ('new', 3)
+
+
+def test_gap_buffer_matches_a_string_model():
+    rng = random.Random(7)
+    buf = GapBuffer(capacity=2)
+    text, cursor = '', 0
+    for _ in range(2000):
+        op = rng.randrange(4)
+        n = rng.randrange(6)
+        if op == 0:
+            s = ''.join(rng.choice('abcé ') for _ in range(n))
+            buf.insert(s)
+            text, cursor = text[:cursor] + s + text[cursor:], cursor + len(s)
+        elif op == 1:
+            buf.backspace(n)
+            k = min(n, cursor)
+            text, cursor = text[:cursor - k] + text[cursor:], cursor - k
+        elif op == 2:
+            buf.delete(n)
+            text = text[:cursor] + text[cursor + n:]
+        else:
+            n = rng.randrange(-8, 9)
+            buf.move(n)
+            cursor = max(0, min(len(text), cursor + n))
+        assert (buf.text(), buf.cursor, len(buf)) == (text, cursor, len(text))
+
+
+def test_history_keeps_the_draft():
+    history = InputHistory(size=3)
+    for line in ['one', 'two', 'two', '', 'three', 'four']:
+        history.add(line)
+    assert list(history.entries) == ['two', 'three', 'four']
+    assert history.previous('draft') == 'four'
+    assert history.previous('ignored') == 'three'
+    assert history.previous('') == 'two'
+    assert history.previous('') is None
+    assert history.next() == 'three'
+    assert history.next() == 'four'
+    assert history.next() == 'draft'
+    assert history.next() is None
+
+
+def test_completion():
+    names = ['help', 'scan', 'scroll', 'search']
+    completer = lambda prefix: [n for n in names if n.startswith(prefix)]
+    editor = LineEditor()
+    editor.insert('h')
+    assert editor.complete(completer) == []
+    assert editor.text() == 'help '
+    editor.submit()
+    editor.insert('sc')
+    assert editor.complete(completer) == ['scan', 'scroll']
+    editor.insert('r')
+    assert editor.complete(completer) == []
+    assert editor.text() == 'scroll '
+    editor.end()
+    editor.insert('x')
+    assert editor.complete(completer) == []  # past the command name
+    assert editor.submit() == 'scroll x'
+    assert editor.text() == ''
+
+
+def test_view_follows_the_cursor():
+    editor = LineEditor()
+    editor.insert('0123456789')
+    assert editor.view(4) == ('789', 3)
+    editor.home()
+    assert editor.view(4) == ('0123', 0)
+    editor.move(5)
+    assert editor.view(4) == ('2345', 3)
@@ -0,0 +1,97 @@
+import numpy as np
+import pygame
+from effects import (PostProcessPipeline, ScanlineStage, NoiseStage, FlickerStage, NoiseBank, apply_scanlines,
+                     apply_noise, disjoint_rects, seed_effects)
+
+SIZE = (64, 48)
+GRAY = (150, 150, 150)
+
+
+def flat(color=GRAY, size=SIZE):
+    surface = pygame.Surface(size, 0, 32)
+    surface.fill(color)
+    return surface
+
+
+def pixels(surface):
+    return pygame.surfarray.array3d(surface).astype(np.int32)
+
+
+def test_scanlines_match_the_blitted_scanlines():
+    for opacity, spacing in ((32, 2), (64, 4), (0, 2)):
+        expected = flat()
+        apply_scanlines(expected, opacity, spacing)
+        surface = flat()
+        PostProcessPipeline([ScanlineStage(opacity, spacing)]).run(surface)
+        assert np.abs(pixels(surface) - pixels(expected)).max() <= 1, (opacity, spacing)
+
+
+def test_scanlines_with_a_steady_flicker_match_scanlines_alone():
+    # Flicker makes the tone pass dense instead of row-sparse; at intensity 0 it changes nothing
+    expected = flat()
+    apply_scanlines(expected, 32, 4)
+    surface = flat()
+    PostProcessPipeline([ScanlineStage(32, 4), FlickerStage(0.0)]).run(surface)
+    assert np.abs(pixels(surface) - pixels(expected)).max() <= 1
+
+
+def test_flicker_dims_every_row_evenly():
+    surface = flat()
+    PostProcessPipeline([FlickerStage(0.0)]).run(surface)
+    assert (pixels(surface) == 150).all()
+    seed_effects(3)
+    surface = flat()
+    PostProcessPipeline([FlickerStage(0.5)]).run(surface)
+    values = np.unique(pixels(surface))
+    assert len(values) == 1 and 75 <= values[0] <= 150
+
+
+def test_noise_matches_the_blended_noise():
+    seed_effects(1)
+    expected = flat(size=(256, 256))
+    apply_noise(expected, 32)
+    want = pixels(expected)
+    bank = NoiseBank(frames=2, tile=64)
+    bank.build()
+    for stage in (NoiseStage(32), NoiseStage(32, bank=bank)):
+        surface = flat(size=(256, 256))
+        PostProcessPipeline([stage]).run(surface)
+        got = pixels(surface)
+        assert abs(got.mean() - want.mean()) < 1.5
+        assert abs(got.std() - want.std()) < 1.5
+        assert got.min() >= 150 * 224 // 256
+
+
+def test_disjoint_rects_cover_each_pixel_once():
+    rects = [(0, 0, 40, 40), (20, 20, 40, 28), (10, 10, 5, 5), (50, 0, 10, 10)]
+    cover = np.zeros(SIZE, np.int32)
+    for rect in disjoint_rects(rects):
+        cover[rect.left:rect.right, rect.top:rect.bottom] += 1
+    expected = np.zeros(SIZE, np.int32)
+    for x, y, w, h in rects:
+        expected[x:x + w, y:y + h] = 1
+    assert (cover == expected).all()
+
+
+def test_overlapping_damage_is_processed_once():
+    rects = [(0, 0, 40, 40), (20, 20, 40, 28), (30, 0, 20, 30)]
+    whole = flat()
+    PostProcessPipeline([ScanlineStage(64, 2), FlickerStage(0.0)]).run(whole)
+    surface = flat()
+    PostProcessPipeline([ScanlineStage(64, 2), FlickerStage(0.0)]).run(surface, rects)
+    got, want = pixels(surface), pixels(whole)
+    for x, y, w, h in rects:
+        assert (got[x:x + w, y:y + h] == want[x:x + w, y:y + h]).all()
+    assert (got[:20, 40:] == 150).all()
+
+
+def test_grain_is_replaced_when_the_opacity_changes():
+    bank = NoiseBank(frames=2, tile=32)
+    bank.build()
+    bank.available()
+    for opacity in (16, 24, 32):
+        stage = NoiseStage(opacity, bank=bank)
+        stage.prepare(PostProcessPipeline(), SIZE)
+        assert int(stage.tiles.max()) <= 255 * opacity
+    assert list(bank.formats) == ['grain']
+    assert bank.formats['grain'][0] == 32
@@ -0,0 +1,46 @@
+from layout import LineLayout
+
+
+def make_layout(texts, cols=4):
+    layout = LineLayout(10, texts.__getitem__)
+    layout.resize(cols * 10)
+    return layout
+
+
+def test_wrap_and_count():
+    layout = make_layout([], cols=4)
+    assert layout.wrap('') == ['']
+    assert layout.wrap('abcd') == ['abcd']
+    assert layout.wrap('abcdefghij') == ['abcd', 'efgh', 'ij']
+    assert [layout.count(t) for t in ('', 'abcd', 'abcde')] == [1, 1, 2]
+
+
+def test_resize_drops_the_memo_only_when_columns_change():
+    texts = ['a' * 10]
+    layout = make_layout(texts, cols=4)
+    assert layout.rows(0) == 3
+    assert not layout.resize(45)  # still 4 columns
+    assert layout.counts
+    assert layout.resize(100)
+    assert not layout.counts
+    assert layout.rows(0) == 1
+
+
+def test_moving_by_visual_rows():
+    texts = ['a' * 10, '', 'b' * 5]  # 3, 1 and 2 rows
+    layout = make_layout(texts, cols=4)
+    assert layout.forward((0, 0), 3, 3) == (1, 0)
+    assert layout.forward((0, 1), 10, 3) == (2, 1)
+    assert layout.back((2, 1), 3, 0) == (0, 2)
+    assert layout.back((2, 0), 10, 0) == (0, 0)
+    assert layout.back((2, 0), 10, 1) == (1, 0)
+    layout.resize(100)
+    assert layout.clamp((0, 2)) == (0, 0)
+
+
+def test_memo_is_bounded():
+    layout = LineLayout(10, lambda i: 'x' * i, max_lines=3)
+    layout.resize(20)
+    for i in range(5):
+        layout.rows(i)
+    assert list(layout.counts) == [2, 3, 4]
@@ -0,0 +1,25 @@
+import pygame
+from effects import PostProcessPipeline
+from plan import RenderPlan
+from profiler import FrameProfiler, PerfHud
+from settings import RuntimeConfig
+
+
+def test_frame_budget_follows_the_target_frame_rate():
+    settings = RuntimeConfig()
+    settings.set('target_fps', 30)
+    plan = RenderPlan(settings.values, PostProcessPipeline())
+    assert plan.budget_ms == 1000.0 / 30
+    settings.set('target_fps', 120)
+    assert RenderPlan(settings.values, PostProcessPipeline()).budget_ms == 1000.0 / 120
+
+
+def test_hud_draws_against_its_budget():
+    pygame.font.init()
+    profiler = FrameProfiler(30, True)
+    hud = PerfHud(pygame.font.Font(None, 12), 1000.0 / 30)
+    assert hud.budget_ms == 1000.0 / 30
+    for _ in range(3):
+        profiler.begin_frame()
+        profiler.end_frame()
+    assert hud.draw(pygame.Surface((640, 480)), profiler, (0, 255, 0)).width == hud.width
@@ -0,0 +1,81 @@
+import textwrap
+from importlib import metadata
+import registry
+from registry import Command, CommandTrie, UsageError, discover
+
+
+def make_trie(names):
+    trie = CommandTrie()
+    for name in names:
+        trie.insert(name, name.upper())
+    return trie
+
+
+def test_trie_lookup_and_count():
+    trie = make_trie(['scan', 'scroll', 'sc', 'help'])
+    assert len(trie) == 4
+    assert trie.get('scan') == 'SCAN'
+    assert trie.get('s') is None
+    assert 'sc' in trie and 'scanner' not in trie
+    trie.insert('scan', 'again')  # replacing a value does not count twice
+    assert len(trie) == 4
+    assert trie.get('scan') == 'again'
+
+
+def test_trie_prefix_queries_are_sorted():
+    trie = make_trie(['scroll', 'scan', 'help', 'sc', 'scanner'])
+    assert [name for name, _ in trie.items('sc')] == ['sc', 'scan', 'scanner', 'scroll']
+    assert trie.complete('', limit=2) == ['help', 'sc']
+    assert trie.complete('x') == []
+
+
+def test_trie_unique_prefix():
+    trie = make_trie(['scan', 'scanner', 'help'])
+    assert trie.unique('h') == ('help', 'HELP')
+    assert trie.unique('scann') == ('scanner', 'SCANNER')
+    assert trie.unique('sca') is None  # scan and scanner
+    assert trie.unique('z') is None
+
+
+def test_plugin_commands_load_on_first_use(tmp_path):
+    plugin = tmp_path / 'greet.py'
+    plugin.write_text(textwrap.dedent("""
+        from registry import command
+        LOADS = []
+        LOADS.append(1)
+
+        @command('greet', help='Say hello', aliases=['hi'], arguments=[(('name',), {})])
+        def greet(args):
+            return f"hello {args.name}"
+    """))
+    commands = discover(str(tmp_path), index_path=str(tmp_path / 'index.json'), entry_points=False)
+    assert [(c.name, c.help, c.aliases, c.loaded) for c in commands] == [('greet', 'Say hello', ('hi',), False)]
+    greet = commands[0]
+    assert greet(['you']) == 'hello you'
+    assert greet.loaded
+    try:
+        greet([])
+    except UsageError as e:
+        assert 'greet' in str(e)
+    else:
+        raise AssertionError('missing argument accepted')
+    # The index is reused while the file is unchanged
+    assert registry.scan_plugin_dir(str(tmp_path), str(tmp_path / 'index.json'))[str(plugin)][0]['name'] == 'greet'
+
+
+def test_entry_points_without_a_function_are_skipped(monkeypatch, capsys):
+    eps = metadata.EntryPoints([
+        metadata.EntryPoint('whole', 'json', registry.ENTRY_POINT_GROUP),
+        metadata.EntryPoint('dumps', 'json:dumps', registry.ENTRY_POINT_GROUP),
+    ])
+    monkeypatch.setattr(registry.metadata, 'entry_points', lambda: eps)
+    commands = discover(entry_points=True)
+    assert [c.name for c in commands] == ['dumps']
+    assert 'whole' in capsys.readouterr().out
+    assert commands[0](['x']) == '["x"]'
+
+
+def test_builtin_command_takes_raw_words():
+    command = Command('echo', func=lambda args: ' '.join(args))
+    assert command.parser() is None
+    assert command(['a', 'b']) == 'a b'
@@ -0,0 +1,54 @@
+from array import array
+import pytest
+from scrollback import Scrollback
+
+
+def test_append_and_index():
+    lines = Scrollback(4)
+    lines.append('first')
+    lines.append('second', flicker=True)
+    assert len(lines) == 2
+    assert lines[0] == ('first', False, None)
+    assert lines[-1] == ('second', True, None)
+    assert lines.text(1) == 'second'
+    with pytest.raises(IndexError):
+        lines[2]
+    with pytest.raises(IndexError):
+        lines[-3]
+
+
+def test_oldest_lines_are_evicted():
+    lines = Scrollback(3)
+    lines.extend(f"line {i}" for i in range(5))
+    assert len(lines) == 3
+    assert lines.appended == 5
+    assert [lines.text(i) for i in range(3)] == ['line 2', 'line 3', 'line 4']
+
+
+def test_window_wraps_around_the_ring():
+    lines = Scrollback(4)
+    lines.extend(f"line {i}" for i in range(6))
+    assert [text for text, _, _ in lines.window(1, 2)] == ['line 3', 'line 4']
+    assert [text for text, _, _ in lines.window(-5, 3)] == ['line 2', 'line 3', 'line 4']
+    assert [text for text, _, _ in lines.window(3, 10)] == ['line 5']
+    assert lines.window(4, 1) == []
+
+
+def test_styled_lines_keep_their_runs():
+    runs = array('Q', [0, 3, 2])
+    lines = Scrollback(2)
+    lines.extend([('red', runs), 'plain'], flicker=True)
+    assert lines[0] == ('red', True, runs)
+    assert lines[1] == ('plain', True, None)
+    lines.append('evicts red')
+    assert lines[0][2] is None
+
+
+def test_clear():
+    lines = Scrollback(2)
+    lines.extend(['a', 'b', 'c'])
+    lines.clear()
+    assert len(lines) == 0
+    assert lines.window(0, 2) == []
+    lines.append('again')
+    assert lines[0] == ('again', False, None)
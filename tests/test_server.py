@@ -0,0 +1,113 @@
+import time
+import asyncio
+import itertools
+import pytest
+from server import RemoteClient, RemoteServer, encode_frame, read_frame, parse_address, FLAG_ZLIB, _HEADER
+
+
+class Handler:
+    """
+    Commands for the tests: 'slow' prints a line, then takes its time over the
+    next; 'flood' never stops; anything else is echoed back.
+    """
+    def handle(self, line, origin=None):
+        if line == 'slow':
+            return self.slow()
+        if line == 'flood':
+            return (f"{i:08d} " + 'x' * 1000 for i in itertools.count())
+        if line == 'ticks':
+            return self.ticks()
+        return [line]
+
+    def slow(self):
+        yield 'first'
+        time.sleep(0.5)
+        yield 'second'
+
+    async def ticks(self):
+        for i in range(3):
+            yield f"tick {i}"
+            await asyncio.sleep(0.2)
+
+
+async def decode(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    messages = []
+    while (message := await read_frame(reader)) is not None:
+        messages.append(message)
+    return messages
+
+
+def test_frames_round_trip():
+    small = {'op': 'output', 'id': 1, 'lines': ['hi']}
+    big = {'op': 'output', 'id': 2, 'lines': ['the same line'] * 200}
+    data = encode_frame(small, compress_min=64) + encode_frame(big, compress_min=64)
+    assert data[4] == 0  # too short to compress
+    assert _HEADER.unpack_from(data, len(encode_frame(small)))[1] == FLAG_ZLIB
+    assert len(encode_frame(big, 64)) < len(encode_frame(big))
+    assert asyncio.run(decode(data)) == [small, big]
+
+
+def test_oversized_frames_are_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(decode(_HEADER.pack(1 << 30, 0)))
+
+
+def test_parse_address():
+    assert parse_address('tcp://example.org:7777') == ('tcp', ('example.org', 7777))
+    assert parse_address(':7777') == ('tcp', ('127.0.0.1', 7777))
+    assert parse_address('unix:///tmp/crt.sock') == ('unix', '/tmp/crt.sock')
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs):
+        server = RemoteServer(Handler(), ['127.0.0.1:0'], **kwargs).start()
+        servers.append(server)
+        return server.bound()[0]
+    yield start
+    for server in servers:
+        server.stop()
+
+
+async def timed(address, line):
+    client = await RemoteClient.connect(address)
+    start = time.monotonic()
+    try:
+        return [(text, time.monotonic() - start) async for text in client.command(line)]
+    finally:
+        await client.close()
+
+
+def test_partial_batch_goes_out_after_batch_ms(serve):
+    address = serve(batch_lines=256, batch_ms=20)
+    (first, t1), (second, t2) = asyncio.run(timed(address, 'slow'))
+    assert (first, second) == ('first', 'second')
+    assert t1 < 0.3 <= t2
+
+
+def test_async_commands_are_batched_by_time(serve):
+    address = serve(batch_lines=256, batch_ms=20)
+    received = asyncio.run(timed(address, 'ticks'))
+    assert [text for text, _ in received] == ['tick 0', 'tick 1', 'tick 2']
+    assert received[0][1] < 0.15 < received[1][1]
+
+
+def test_slow_client_does_not_hold_a_worker(serve):
+    address = serve(workers=1, batch_lines=1, queue_frames=1)
+
+    async def main():
+        # This client never reads, so its flood soon fills every buffer on the way
+        stalled = await RemoteClient.connect(address)
+        stalled.writer.write(encode_frame({'op': 'command', 'id': 1, 'line': 'flood'}))
+        await stalled.writer.drain()
+        await asyncio.sleep(0.3)
+        try:
+            return await asyncio.wait_for(timed(address, 'hello'), 5)
+        finally:
+            await stalled.close()
+    assert [text for text, _ in asyncio.run(main())] == ['hello']
@@ -0,0 +1,18 @@
+import pygame
+from splash import SplashScreen
+
+COLORS = {'bg': (10, 20, 10), 'text': (0, 255, 0), 'glow': (0, 255, 0, 80)}
+
+
+def test_inverted_logo_keeps_the_background():
+    pygame.init()
+    screen = pygame.display.set_mode((320, 200))
+    splash = SplashScreen(screen, pygame.font.Font(None, 16), COLORS)
+    logo = pygame.Surface((20, 10), pygame.SRCALPHA)
+    logo.fill((0, 255, 0, 255), (5, 2, 10, 6))
+    variants = splash.logo_variants(logo)
+    plain, inverted = variants[False, None], variants[True, None]
+    assert plain.get_at((0, 0))[:3] == COLORS['bg']
+    assert inverted.get_at((0, 0))[:3] == COLORS['bg']
+    assert plain.get_at((8, 4))[:3] == (0, 255, 0)
+    assert inverted.get_at((8, 4))[:3] == (255, 0, 255)